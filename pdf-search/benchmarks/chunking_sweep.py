@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Sweep chunking parameters and score each setting on a labeled query set.
+
+Documents come from the extraction cache (downloaded and extracted once on
+the first run) or from PDFs in a fixture directory. Every CHUNK_SIZE x
+CHUNK_OVERLAP combination is chunked in a process pool, embedded into a
+throwaway local index and queried with the labeled set (see
+search_quality.py for the format). Each setting is reported with its
+vector count, embedded tokens, index size, query latency, recall@k and
+MRR, and the Pareto frontier over recall, MRR and vector count is marked,
+so the cheapest setting with acceptable quality can be picked.
+
+Usage:
+    python benchmarks/chunking_sweep.py
+    python benchmarks/chunking_sweep.py --chunk-size 600 1000 1400 --chunk-overlap 0 150
+    python benchmarks/chunking_sweep.py --fixtures ~/pdfs --queries my_queries.json --json
+    python benchmarks/chunking_sweep.py --min-recall 0.9 --k 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import contextlib
+from multiprocessing import Pool
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from boilerplate import embedding_text
+from embeddings import EmbeddingEngine, load_embedding_model
+from local_index import LocalIndex
+from pdf_processor import PDFProcessor
+from search_quality import DEFAULT_QUERIES, load_queries, percentiles, quality
+
+# Documents to chunk, set in each worker by the pool initializer
+_documents: dict = {}
+
+
+def _init_worker(documents: dict) -> None:
+    global _documents
+    _documents = documents
+
+
+def chunk_setting(setting: tuple) -> tuple:
+    """
+    Chunk all documents with one (chunk_size, chunk_overlap) setting.
+
+    Runs in a worker process on the documents passed to the initializer.
+
+    Returns:
+        Tuple of (setting, chunks, seconds)
+    """
+    chunk_size, chunk_overlap = setting
+    processor = PDFProcessor(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        max_chunks=sys.maxsize
+    )
+    start = time.perf_counter()
+    chunks = []
+    with contextlib.redirect_stdout(sys.stderr):
+        for document_id, (text, metadata) in _documents.items():
+            chunks.extend(processor._chunk_text(text, document_id, metadata))
+    return setting, chunks, time.perf_counter() - start
+
+
+def load_documents(queries: list, materials: list, fixtures: str, redownload: bool) -> dict:
+    """
+    Extracted text and chunk metadata of the documents to sweep.
+
+    Args:
+        queries: Labeled queries (their document ids are loaded by default)
+        materials: Manifest material ids to load instead
+        fixtures: Optional directory with *.pdf files (document id = file stem)
+        redownload: Download manifest PDFs even if their extraction is cached
+
+    Returns:
+        {document_id: (text, metadata)}
+    """
+    documents = {}
+
+    if fixtures:
+        processor = PDFProcessor(reuse_downloads=False)
+        for path in sorted(Path(fixtures).expanduser().glob('*.pdf')):
+            text = processor._extract_cached(f"file:{path.resolve()}", path.read_bytes)
+            documents[path.stem] = (text, {})
+        return documents
+
+    processor = PDFProcessor(reuse_downloads=not redownload)
+    material_ids = materials or sorted({
+        target['document_id']
+        for query in queries for target in query['expected'] if 'document_id' in target
+    })
+    for material_id in material_ids:
+        try:
+            text = processor.extract_material_text(material_id)
+            documents[material_id] = (text, processor.material_metadata(material_id))
+        except Exception as e:
+            print(f"✗ {material_id}: {e}")
+    return documents
+
+
+def pareto_frontier(rows: list, maximize: tuple, minimize: tuple) -> list:
+    """
+    Indices of rows no other row dominates.
+
+    A row dominates another when it is at least as good on every objective
+    and strictly better on one.
+
+    Args:
+        rows: Result dicts
+        maximize: Keys where higher is better
+        minimize: Keys where lower is better
+
+    Returns:
+        Sorted list of row indices on the frontier
+    """
+    def vector(row):
+        return [row[key] for key in maximize] + [-row[key] for key in minimize]
+
+    points = [vector(row) for row in rows]
+    frontier = []
+    for i, point in enumerate(points):
+        dominated = any(
+            all(o >= p for o, p in zip(other, point)) and other != point
+            for j, other in enumerate(points) if j != i
+        )
+        if not dominated:
+            frontier.append(i)
+    return frontier
+
+
+def evaluate(
+    setting: tuple,
+    chunks: list,
+    chunk_seconds: float,
+    engine: EmbeddingEngine,
+    queries: list,
+    query_vectors,
+    ks: list,
+    workdir: Path
+) -> dict:
+    """Embed one setting's chunks into a local index and score the query set."""
+    chunk_size, chunk_overlap = setting
+    texts = [embedding_text(chunk['text']) for chunk in chunks]
+    embeddings = engine.encode(texts)
+    embed_stats = engine.last_stats
+
+    index = LocalIndex(
+        embeddings.shape[1],
+        quantization='float32',
+        root=workdir / f"index-{chunk_size}-{chunk_overlap}"
+    )
+    index.add([chunk['id'] for chunk in chunks], embeddings, [chunk['metadata'] for chunk in chunks])
+
+    latencies = []
+    ranked = []
+    for query, vector in zip(queries, query_vectors):
+        start = time.perf_counter()
+        ranked.append(index.search(vector, top_k=max(ks), filter_metadata=query.get('filter')))
+        latencies.append(time.perf_counter() - start)
+
+    scores = quality(queries, ranked, ks, [])
+    return {
+        'chunk_size': chunk_size,
+        'chunk_overlap': chunk_overlap,
+        'vectors': len(chunks),
+        'tokens': embed_stats.get('tokens', 0),
+        'index_mb': round(index.memory_bytes() / 1024 ** 2, 3),
+        'chunk_seconds': round(chunk_seconds, 3),
+        'embed_seconds': round(embed_stats.get('seconds', 0.0), 3),
+        'query': percentiles(latencies),
+        'recall_at_k': scores['recall_at_k'],
+        'mrr': scores['mrr']
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Sweep CHUNK_SIZE / CHUNK_OVERLAP and report the quality/cost Pareto frontier"
+    )
+    parser.add_argument('--queries', default=str(DEFAULT_QUERIES), help='Labeled query set (JSON)')
+    parser.add_argument('--chunk-size', type=int, nargs='+', default=[500, 750, 1000, 1500, 2000],
+                        help='CHUNK_SIZE values')
+    parser.add_argument('--chunk-overlap', type=int, nargs='+', default=[0, 100, 200],
+                        help='CHUNK_OVERLAP values (combinations with overlap >= size are skipped)')
+    parser.add_argument('--materials', nargs='+', help='Manifest material ids (default: those in the query set)')
+    parser.add_argument('--fixtures', help='Directory with *.pdf files to use instead of the manifest')
+    parser.add_argument('--redownload', action='store_true',
+                        help='Download manifest PDFs even if their extraction is cached')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 3, 5, 10], help='Cut-offs for recall@k')
+    parser.add_argument('--objective-k', type=int, help='recall@k used for the frontier (default: largest --k)')
+    parser.add_argument('--min-recall', type=float,
+                        help='Recommend the frontier setting with the fewest vectors at this recall')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Chunking processes')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    objective_k = str(args.objective_k or max(args.k))
+    if int(objective_k) not in args.k:
+        args.k.append(int(objective_k))
+
+    settings = [
+        (size, overlap)
+        for size, overlap in itertools.product(sorted(set(args.chunk_size)), sorted(set(args.chunk_overlap)))
+        if overlap < size
+    ]
+    if not settings:
+        print("✗ No valid chunk size / overlap combination")
+        return 1
+
+    queries = load_queries(Path(args.queries))
+
+    # Progress output goes to stderr so --json stays parseable
+    with tempfile.TemporaryDirectory(prefix='chunking-sweep-') as workdir, \
+            contextlib.redirect_stdout(sys.stderr):
+        documents = load_documents(queries, args.materials, args.fixtures, args.redownload)
+        if not documents:
+            print("✗ No documents to sweep")
+            return 1
+        print(f"Sweeping {len(settings)} settings over {len(documents)} documents")
+
+        wanted = {target['document_id'] for query in queries for target in query['expected']
+                  if 'document_id' in target}
+        missing = wanted - set(documents)
+        if missing and not args.fixtures:
+            print(f"Warning: queries expect documents that were not loaded: {', '.join(sorted(missing))}")
+
+        engine = EmbeddingEngine(load_embedding_model(args.model))
+        query_vectors = engine.encode([query['query'] for query in queries])
+
+        rows = []
+        # Workers chunk the next settings while this process embeds
+        with Pool(processes=min(args.workers, len(settings)), initializer=_init_worker,
+                  initargs=(documents,)) as pool:
+            for setting, chunks, chunk_seconds in pool.imap(chunk_setting, settings):
+                print(f"Evaluating chunk_size={setting[0]} chunk_overlap={setting[1]} "
+                      f"({len(chunks)} chunks)...")
+                rows.append(evaluate(
+                    setting, chunks, chunk_seconds, engine, queries, query_vectors,
+                    args.k, Path(workdir)
+                ))
+
+    for row in rows:
+        row['recall'] = row['recall_at_k'][objective_k]
+    frontier = pareto_frontier(rows, maximize=('recall', 'mrr'), minimize=('vectors',))
+    for i, row in enumerate(rows):
+        row['pareto'] = i in frontier
+
+    recommended = None
+    if args.min_recall is not None:
+        eligible = [rows[i] for i in frontier if rows[i]['recall'] >= args.min_recall]
+        if eligible:
+            recommended = min(eligible, key=lambda row: (row['vectors'], -row['mrr']))
+
+    report = {
+        'model': args.model,
+        'documents': sorted(documents),
+        'queries': len(queries),
+        'objective': f"recall@{objective_k}",
+        'settings': rows,
+        'recommended': recommended and {
+            'chunk_size': recommended['chunk_size'],
+            'chunk_overlap': recommended['chunk_overlap']
+        }
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Chunking Sweep ===\n")
+    print(f"Model: {args.model}, documents: {len(documents)}, queries: {len(queries)}\n")
+    print(f"{'':2}{'Size':>6}{'Overlap':>9}{'Vectors':>9}{'Tokens':>10}{'Index MB':>10}"
+          f"{'Embed s':>9}{'Query p50':>11}{'Recall@' + objective_k:>11}{'MRR':>7}")
+    for row in sorted(rows, key=lambda row: (row['vectors'], -row['recall'])):
+        mark = '*' if row['pareto'] else ' '
+        print(f"{mark:2}{row['chunk_size']:>6}{row['chunk_overlap']:>9}{row['vectors']:>9}"
+              f"{row['tokens']:>10}{row['index_mb']:>10.2f}{row['embed_seconds']:>9.1f}"
+              f"{row['query']['p50_ms']:>9.2f}ms{row['recall']:>11.3f}{row['mrr']:>7.3f}")
+    print(f"\n* Pareto frontier (recall@{objective_k} and MRR up, vectors down)")
+
+    if args.min_recall is not None:
+        if recommended:
+            print(f"✓ Fewest vectors at recall@{objective_k} >= {args.min_recall}: "
+                  f"CHUNK_SIZE={recommended['chunk_size']} CHUNK_OVERLAP={recommended['chunk_overlap']}")
+        else:
+            print(f"✗ No setting reaches recall@{objective_k} >= {args.min_recall}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
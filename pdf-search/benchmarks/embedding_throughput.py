@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure embedding throughput in chunks/s.
+
+Compares a single encode() call over unsorted texts (the previous
+embed_texts behaviour) with EmbeddingEngine at several batch sizes and
+process counts. Texts are mixed-length synthetic chunks, or chunks of a
+stored document when --document is given.
+
+Usage:
+    python benchmarks/embedding_throughput.py
+    python benchmarks/embedding_throughput.py --chunks 2000 --processes 0 4
+    python benchmarks/embedding_throughput.py --document politikfeldanalyse-blum-schubert
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sentence_transformers import SentenceTransformer
+from config import Config
+from chunk_store import ChunkStore
+from embeddings import EmbeddingEngine
+
+
+def synthetic_texts(count: int, seed: int = 0) -> list:
+    """Chunks between 50 and CHUNK_SIZE characters, like a chunked PDF."""
+    rng = random.Random(seed)
+    words = "Politik Gesellschaft Verwaltung Begriff Definition Analyse Staat Akteure Institutionen".split()
+    texts = []
+    for _ in range(count):
+        length = rng.randint(50, Config.CHUNK_SIZE)
+        text = ''
+        while len(text) < length:
+            text += rng.choice(words) + ' '
+        texts.append(text[:length])
+    return texts
+
+
+def document_texts(document_id: str) -> list:
+    """All chunk texts of a document from the local chunk store."""
+    store = ChunkStore()
+    return [store.get_span(document_id, n) for n in range(1, store.chunk_count(document_id) + 1)]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark embedding throughput"
+    )
+    parser.add_argument('--chunks', type=int, default=1000, help='Number of synthetic chunks')
+    parser.add_argument('--document', help='Use chunks of a stored document instead')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[16, 32, 64])
+    parser.add_argument('--processes', type=int, nargs='+', default=[0])
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    texts = document_texts(args.document) if args.document else synthetic_texts(args.chunks)
+    if not texts:
+        print(f"✗ No chunks found for {args.document}")
+        return 1
+
+    model = SentenceTransformer(args.model)
+    model.encode(texts[:8])  # Warm-up
+
+    runs = []
+
+    start = time.perf_counter()
+    model.encode(texts, convert_to_numpy=True)
+    elapsed = time.perf_counter() - start
+    runs.append({'engine': 'encode', 'batch_size': 32, 'processes': 1,
+                 'seconds': elapsed, 'chunks_per_second': len(texts) / elapsed})
+
+    for processes in args.processes:
+        for batch_size in args.batch_sizes:
+            engine = EmbeddingEngine(model, batch_size=batch_size, processes=processes)
+            engine.encode(texts)
+            stats = engine.last_stats
+            engine.close()
+            runs.append({'engine': 'EmbeddingEngine', 'batch_size': batch_size, **stats})
+
+    if args.json:
+        print(json.dumps({'model': args.model, 'chunks': len(texts), 'runs': runs}, indent=2))
+        return 0
+
+    print("=== Embedding Throughput ===\n")
+    print(f"Model: {args.model}, chunks: {len(texts)}\n")
+    print(f"{'Engine':<18}{'Batch':>7}{'Procs':>7}{'Seconds':>10}{'Chunks/s':>11}")
+    for run in runs:
+        print(f"{run['engine']:<18}{run['batch_size']:>7}{run['processes']:>7}"
+              f"{run['seconds']:>10.2f}{run['chunks_per_second']:>11.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
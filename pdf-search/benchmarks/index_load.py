@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Load-test PineconeManager against a fake index with simulated latency and faults.
+
+Runs create_index (readiness polling), upsert_chunks, concurrent search
+and delete_by_document_id on fake_pinecone.FakePinecone with a
+FaultProfile: per-request latency (median/p95, plus a per-vector cost),
+a token-bucket rate limit, a cap on concurrent requests, and injected
+errors and timeouts. Reports throughput, retries, splits and failures,
+so batching and retry settings can be compared without a Pinecone account.
+Runs are reproducible for a given --seed (single-threaded phases exactly).
+
+Embeddings are random unit vectors of the model's dimension; the model
+is only used to embed search queries.
+
+Usage:
+    python benchmarks/index_load.py
+    python benchmarks/index_load.py --latency 20 80 --error-rate 0.05 --rps 20
+    python benchmarks/index_load.py --vectors 20000 --metadata-bytes 2000 --json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from chunk_store import ChunkStore
+from fake_pinecone import FakePinecone, FaultProfile, Latency
+from pinecone_manager import PineconeManager
+from search_quality import percentiles
+
+QUERIES = [
+    'Policy Polity Politics',
+    'Politikfeldanalyse Einleitung',
+    'Institutionen und Akteure',
+    'Methoden der Sozialforschung',
+]
+
+
+def make_chunks(vectors: int, documents: int, metadata_bytes: int) -> list:
+    """Synthetic chunks spread over documents, with padded metadata."""
+    per_document = -(-vectors // documents)
+    chunks = []
+    for number in range(vectors):
+        document_id = f"load-doc-{number // per_document}"
+        chunk_number = number % per_document + 1
+        chunks.append({
+            'id': f"{document_id}#chunk_{chunk_number}",
+            'text': f"Chunk {chunk_number} of {document_id}",
+            'metadata': {
+                'document_id': document_id,
+                'chunk_number': chunk_number,
+                'page_start': chunk_number,
+                'page_end': chunk_number,
+                'learning_unit': 'x' * metadata_bytes
+            }
+        })
+    return chunks
+
+
+def run_searches(manager: PineconeManager, queries: int, workers: int) -> dict:
+    """Run queries on a thread pool, counting failures."""
+    def one(i: int):
+        start = time.perf_counter()
+        try:
+            manager.search(QUERIES[i % len(QUERIES)], top_k=5)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        outcomes = list(pool.map(one, range(queries)))
+        elapsed = time.perf_counter() - start
+
+    ok = [seconds for seconds, error in outcomes if error is None]
+    return {
+        'concurrency': workers,
+        'queries': queries,
+        'errors': len(outcomes) - len(ok),
+        'queries_per_second': round(queries / elapsed, 2),
+        **(percentiles(ok) if ok else {})
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Load-test index operations against a fake Pinecone with injected faults"
+    )
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model (for queries)')
+    parser.add_argument('--vectors', type=int, default=5000, help='Chunks to upsert')
+    parser.add_argument('--documents', type=int, default=4, help='Documents the chunks belong to')
+    parser.add_argument('--metadata-bytes', type=int, default=200, help='Padding per chunk metadata')
+    parser.add_argument('--batch-size', type=int, help='Maximum vectors per upsert request')
+    parser.add_argument('--latency', type=float, nargs='+', default=[10.0], metavar='MS',
+                        help='Request latency median [p95] in milliseconds')
+    parser.add_argument('--per-vector-ms', type=float, default=0.02,
+                        help='Extra upsert latency per vector in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probability of a 503 response')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Probability of a timeout')
+    parser.add_argument('--rps', type=float, help='Rate limit in requests per second (429 above it)')
+    parser.add_argument('--burst', type=int, help='Rate limit bucket size')
+    parser.add_argument('--max-concurrency', type=int, help='Requests the fake serves at once')
+    parser.add_argument('--ready-after', type=float, default=0.0,
+                        help='Seconds until a new index reports ready')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--queries', type=int, default=100, help='Searches per concurrency level')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8],
+                        help='Thread counts for the search test')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    median = args.latency[0] / 1000
+    p95 = args.latency[1] / 1000 if len(args.latency) > 1 else None
+    faults = FaultProfile(
+        latency={
+            'upsert': Latency(median, p95, per_vector=args.per_vector_ms / 1000),
+            'query': Latency(median, p95),
+            'fetch': Latency(median, p95),
+            'list': Latency(median, p95),
+            'delete': Latency(median, p95),
+            'describe_index_stats': Latency(median, p95),
+        },
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        requests_per_second=args.rps,
+        burst=args.burst,
+        max_concurrency=args.max_concurrency,
+        ready_after=args.ready_after,
+        seed=args.seed
+    )
+
+    # Manager and progress output go to stderr so --json stays parseable
+    with tempfile.TemporaryDirectory(prefix='index-load-') as workdir, \
+            contextlib.redirect_stdout(sys.stderr):
+        manager = PineconeManager(
+            index_name='index-load',
+            namespace='index-load',
+            embedding_model=args.model,
+            chunk_store=ChunkStore(Path(workdir) / 'chunk_store'),
+            embedding_cache=None,
+            client=FakePinecone(faults=faults)
+        )
+        manager.CONSISTENCY_WAIT = 0
+        manager.READY_POLL_INTERVAL = 0.05
+        dimension = manager.embedding_model.get_sentence_embedding_dimension()
+
+        start = time.perf_counter()
+        manager.create_index(dimension=dimension)
+        create_seconds = time.perf_counter() - start
+
+        chunks = make_chunks(args.vectors, args.documents, args.metadata_bytes)
+        rng = np.random.default_rng(args.seed)
+        embeddings = rng.standard_normal((len(chunks), dimension)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        upsert = manager.upsert_chunks(
+            chunks, batch_size=args.batch_size, show_progress=False, embeddings=embeddings
+        )
+
+        searches = [run_searches(manager, args.queries, workers) for workers in args.concurrency]
+
+        start = time.perf_counter()
+        deletes = [
+            manager.delete_by_document_id(f"load-doc-{number}")
+            for number in range(args.documents)
+        ]
+        delete_seconds = time.perf_counter() - start
+
+    report = {
+        'vectors': args.vectors,
+        'faults': {
+            'latency_ms': args.latency,
+            'error_rate': args.error_rate,
+            'timeout_rate': args.timeout_rate,
+            'requests_per_second': args.rps,
+            'max_concurrency': args.max_concurrency,
+            'seed': args.seed
+        },
+        'create_index_seconds': round(create_seconds, 3),
+        'upsert': {
+            'seconds': round(upsert['seconds'], 3),
+            'vectors_per_second': round(upsert['vectors_per_second'], 1),
+            'upserted': upsert['upserted'],
+            'failed': upsert['failed'],
+            'requests': upsert['requests'],
+            'retries': upsert['retries'],
+            'splits': upsert['splits']
+        },
+        'search': searches,
+        'delete': {
+            'seconds': round(delete_seconds, 3),
+            'deleted': sum(result.get('deleted_count') or 0 for result in deletes),
+            'failed_documents': sum(1 for result in deletes if not result['success'])
+        },
+        'requests': dict(faults.requests),
+        'injected_errors': {
+            f"{operation}:{status or 'timeout'}": count
+            for (operation, status), count in sorted(faults.errors.items())
+        }
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Index Load Test (fake Pinecone) ===\n")
+    print(f"Vectors: {args.vectors}, latency {args.latency} ms, error rate {args.error_rate}, "
+          f"rate limit {args.rps or '-'} req/s\n")
+    print(f"create_index: {report['create_index_seconds']:.2f}s")
+
+    u = report['upsert']
+    mark = '✓' if u['failed'] == 0 else '✗'
+    print(f"{mark} upsert: {u['upserted']} vectors in {u['seconds']:.2f}s "
+          f"({u['vectors_per_second']:.0f} vectors/s), {u['requests']} requests, "
+          f"{u['retries']} retries, {u['splits']} splits, {u['failed']} failed")
+
+    print(f"\n{'Concurrency':>12}{'Queries/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'Errors':>8}")
+    for run in searches:
+        print(f"{run['concurrency']:>12}{run['queries_per_second']:>12.1f}"
+              f"{run.get('p50_ms', 0):>10.1f}{run.get('p95_ms', 0):>10.1f}{run['errors']:>8}")
+
+    d = report['delete']
+    mark = '✓' if d['failed_documents'] == 0 else '✗'
+    print(f"\n{mark} delete: {d['deleted']} vectors in {d['seconds']:.2f}s")
+
+    print(f"\nRequests: {report['requests']}")
+    print(f"Injected errors: {report['injected_errors'] or 'none'}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check ONNX Runtime embedding parity and throughput against PyTorch.
+
+Exports Config.EMBEDDING_MODEL to ONNX (float32 and dynamic int8), checks
+cosine similarity of the outputs against the SentenceTransformer model,
+and measures chunks/s of each backend through EmbeddingEngine.
+
+Usage:
+    python benchmarks/onnx_backend.py
+    python benchmarks/onnx_backend.py --model sentence-transformers/all-MiniLM-L6-v2 --chunks 2000
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from embeddings import EmbeddingEngine, OnnxEmbeddingModel, load_embedding_model, parity_check
+from embedding_throughput import synthetic_texts
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare ONNX Runtime and PyTorch embedding backends"
+    )
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--chunks', type=int, default=500, help='Number of synthetic chunks')
+    parser.add_argument('--min-cosine', type=float, default=0.99,
+                        help='Fail if any backend falls below this cosine similarity (default: 0.99)')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.chunks)
+    reference = load_embedding_model(args.model, backend='torch')
+
+    backends = {
+        'torch': reference,
+        'onnx': OnnxEmbeddingModel(args.model, quantize=False),
+        'onnx-int8': OnnxEmbeddingModel(args.model, quantize=True)
+    }
+
+    report = {'model': args.model, 'chunks': len(texts), 'backends': {}}
+    for name, model in backends.items():
+        engine = EmbeddingEngine(model)
+        engine.encode(texts[:8])  # Warm-up
+        engine.encode(texts)
+        row = {
+            'seconds': engine.last_stats['seconds'],
+            'chunks_per_second': engine.last_stats['chunks_per_second']
+        }
+        if model is not reference:
+            row.update(parity_check(reference, model, texts[:200]))
+        report['backends'][name] = row
+
+    failed = [
+        name for name, row in report['backends'].items()
+        if row.get('min_cosine', 1.0) < args.min_cosine
+    ]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("=== Embedding Backends ===\n")
+        print(f"Model: {args.model}, chunks: {len(texts)}\n")
+        print(f"{'Backend':<12}{'Chunks/s':>10}{'Min cos':>10}{'Mean cos':>10}")
+        for name, row in report['backends'].items():
+            print(f"{name:<12}{row['chunks_per_second']:>10.1f}"
+                  f"{row.get('min_cosine', 1.0):>10.5f}{row.get('mean_cosine', 1.0):>10.5f}")
+        if failed:
+            print(f"\n✗ Parity below {args.min_cosine}: {', '.join(failed)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
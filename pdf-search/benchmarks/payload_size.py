@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Measure bytes on the wire for full vs. slim vector metadata.
+
+Builds chunks with the same metadata PDFProcessor produces for each
+manifest material and compares the JSON size of upsert requests and
+query responses.
+
+Usage:
+    python benchmarks/payload_size.py
+    python benchmarks/payload_size.py --top-k 50 --json
+"""
+
+import sys
+import json
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import split_metadata
+from config import Config
+
+
+def build_chunks(material: dict, count: int) -> list:
+    """Build chunks with the metadata layout of PDFProcessor.chunk_text."""
+    rng = random.Random(material['id'])
+    words = (material.get('notes', '') or 'lorem ipsum dolor sit amet').split()
+
+    document_metadata = {
+        'document_title': material.get('title', ''),
+        'document_url': material.get('url', ''),
+        'learning_unit': material.get('learning_unit', ''),
+        'course': material.get('course', ''),
+        'material_type': material.get('type', 'pdf'),
+        'total_pages': material.get('pages', 0),
+        'notes': material.get('notes', '')
+    }
+    if 'sections' in material:
+        document_metadata['sections'] = json.dumps(material['sections'])
+
+    chunks = []
+    for i in range(count):
+        text = ' '.join(rng.choice(words) for _ in range(160))[:Config.CHUNK_SIZE]
+        page = i // 3 + 1
+        metadata = {
+            'document_id': material['id'],
+            'chunk_number': i + 1,
+            'total_chunks': count,
+            'chunk_text': text[:500],
+            'created_at': datetime.now().isoformat(),
+            'document_type': 'pdf',
+            'page_number': page,
+            'page_start': page,
+            'page_end': page,
+            'page_range': str(page),
+            'pdf_page_number': page + 8,
+            'pdf_page_start': page + 8,
+            'pdf_page_end': page + 8,
+            'pdf_page_range': str(page + 8)
+        }
+        metadata.update(document_metadata)
+        chunks.append({'id': f"{material['id']}#chunk_{i+1}", 'text': text, 'metadata': metadata})
+
+    return chunks
+
+
+def payload_bytes(chunks: list, top_k: int, slim: bool) -> dict:
+    """Compute JSON payload sizes for one upsert of all chunks and one query."""
+    rng = random.Random(0)
+    values = [round(rng.uniform(-0.1, 0.1), 7) for _ in range(Config.EMBEDDING_DIMENSION)]
+
+    def meta(chunk):
+        return split_metadata(chunk['metadata'])[0] if slim else chunk['metadata']
+
+    metadata_bytes = [len(json.dumps(meta(c), ensure_ascii=False).encode('utf-8')) for c in chunks]
+    upsert = json.dumps({
+        'vectors': [{'id': c['id'], 'values': values, 'metadata': meta(c)} for c in chunks]
+    }).encode('utf-8')
+    query = json.dumps({
+        'matches': [{'id': c['id'], 'score': 0.8, 'metadata': meta(c)} for c in chunks[:top_k]]
+    }, ensure_ascii=False).encode('utf-8')
+
+    return {
+        'upsert_bytes': len(upsert),
+        'query_response_bytes': len(query),
+        'max_metadata_bytes': max(metadata_bytes),
+        'avg_metadata_bytes': sum(metadata_bytes) / len(metadata_bytes)
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare vector payload sizes with full and slim metadata"
+    )
+    parser.add_argument('--chunks', type=int, default=200, help='Chunks per material (default: 200)')
+    parser.add_argument('--top-k', type=int, default=Config.DEFAULT_TOP_K, help='Matches per query')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    with open(Config.MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        materials = json.load(f).get('materials', [])
+
+    report = {'top_k': args.top_k, 'chunks_per_material': args.chunks, 'materials': {}}
+
+    for material in materials:
+        chunks = build_chunks(material, args.chunks)
+        full = payload_bytes(chunks, args.top_k, slim=False)
+        slim = payload_bytes(chunks, args.top_k, slim=True)
+        report['materials'][material['id']] = {
+            'full': full,
+            'slim': slim,
+            'query_reduction': 1 - slim['query_response_bytes'] / full['query_response_bytes'],
+            'upsert_reduction': 1 - slim['upsert_bytes'] / full['upsert_bytes']
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Vector Payload Size ===\n")
+    print(f"Top-K: {args.top_k}, chunks per material: {args.chunks}\n")
+    for material_id, result in report['materials'].items():
+        full, slim = result['full'], result['slim']
+        print(f"{material_id}")
+        print(f"  Query response: {full['query_response_bytes']:>10,} → {slim['query_response_bytes']:>10,} bytes "
+              f"(-{result['query_reduction']:.0%})")
+        print(f"  Upsert payload: {full['upsert_bytes']:>10,} → {slim['upsert_bytes']:>10,} bytes "
+              f"(-{result['upsert_reduction']:.0%})")
+        print(f"  Max metadata:   {full['max_metadata_bytes']:>10,} → {slim['max_metadata_bytes']:>10,} bytes")
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PDF → index pipeline stage by stage.
+
+Times text extraction (each backend and auto-selection), page label parsing,
+chunking, embedding and upsert for synthetic PDFs of several sizes and
+for any PDFs in a fixture directory. Upserts go to an in-process
+FakePinecone index, so no API key or network access is needed.
+
+Results are JSON-serializable. --save-baseline stores them; --baseline
+compares a run against a stored file and exits with 1 when a stage got
+slower than the tolerance allows.
+
+Usage:
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --pages 10 100 --stages extract_pdfplumber chunk
+    python benchmarks/pipeline.py --fixtures ~/pdfs --save-baseline baseline.json
+    python benchmarks/pipeline.py --baseline baseline.json --tolerance 0.25 --json
+"""
+
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import tempfile
+import contextlib
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from boilerplate import embedding_text
+from chunk_store import ChunkStore
+from embedding_cache import EmbeddingCache
+from extractors import EXTRACTORS
+from fake_pinecone import FakePinecone
+from pdf_processor import PDFProcessor
+from pinecone_manager import PineconeManager
+from synthetic_pdfs import make_pdf
+
+STAGES = ('extract_pdfplumber', 'extract_pypdf2', 'extract_pypdfium2', 'extract_pdfminer',
+          'extract_auto', 'page_labels', 'chunk', 'embed', 'upsert')
+MODEL_STAGES = ('embed', 'upsert')
+
+
+def build_corpus(pages: list, fixtures: str = None) -> list:
+    """
+    PDFs to benchmark as (name, content) pairs.
+
+    Args:
+        pages: Page counts of the synthetic PDFs
+        fixtures: Optional directory with *.pdf files
+
+    Returns:
+        List of (name, bytes) tuples
+    """
+    corpus = [(f"synthetic-{count}p", make_pdf(count, seed=count)) for count in pages]
+    if fixtures:
+        for path in sorted(Path(fixtures).expanduser().glob('*.pdf')):
+            corpus.append((path.stem, path.read_bytes()))
+    return corpus
+
+
+def measure(fn, repeat: int):
+    """
+    Run fn repeat times.
+
+    Returns:
+        Tuple of (timing dict with median/min/max seconds, last result)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return {
+        'seconds': statistics.median(times),
+        'min': min(times),
+        'max': max(times)
+    }, result
+
+
+def make_manager(model: str, workdir: Path) -> PineconeManager:
+    """PineconeManager on a FakePinecone index with a scratch chunk store and cache."""
+    manager = PineconeManager(
+        index_name='benchmark',
+        namespace='benchmark',
+        embedding_model=model,
+        chunk_store=ChunkStore(workdir / 'chunk_store'),
+        embedding_cache=EmbeddingCache(model, workdir / 'embeddings', quantization='float32'),
+        client=FakePinecone()
+    )
+    manager.CONSISTENCY_WAIT = 0
+    manager.create_index(dimension=manager.embedding_model.get_sentence_embedding_dimension())
+    return manager
+
+
+def benchmark_document(
+    name: str,
+    content: bytes,
+    stages: list,
+    repeat: int,
+    processor: PDFProcessor,
+    manager: PineconeManager = None
+) -> dict:
+    """
+    Time the selected stages for one PDF.
+
+    Chunking runs on the pdfplumber text; embedding and upsert run on
+    those chunks. Upsert reads embeddings from the cache filled by the
+    embed stage, so it measures chunk store writes, batching and the
+    index calls rather than the model a second time.
+    """
+    timings = {}
+    text = processor.extract_text(content, method='pdfplumber')
+    chunks = processor.chunk_text(text, name)
+
+    if 'extract_pdfplumber' in stages:
+        timings['extract_pdfplumber'], _ = measure(
+            lambda: processor.extract_text_pdfplumber(content), repeat)
+    if 'extract_pypdf2' in stages:
+        timings['extract_pypdf2'], _ = measure(
+            lambda: processor.extract_text_pypdf2(content), repeat)
+    for backend in ('pypdfium2', 'pdfminer'):
+        if f'extract_{backend}' in stages and EXTRACTORS[backend].available():
+            timings[f'extract_{backend}'], _ = measure(
+                lambda: processor.extract_text_with(content, backend), repeat)
+    if 'extract_auto' in stages:
+        timings['extract_auto'], _ = measure(
+            lambda: processor.extract_text(content, method='auto'), repeat)
+    if 'page_labels' in stages:
+        timings['page_labels'], _ = measure(
+            lambda: processor._get_page_labels_from_pdf(content), repeat)
+    if 'chunk' in stages:
+        timings['chunk'], chunks = measure(lambda: processor.chunk_text(text, name), repeat)
+
+    if manager is not None and ('embed' in stages or 'upsert' in stages):
+        texts = [embedding_text(chunk['text']) for chunk in chunks]
+        timing, embeddings = measure(lambda: manager.embed_texts(texts, use_cache=False), repeat)
+        manager.embedding_cache.store(texts, embeddings)
+        if 'embed' in stages:
+            timings['embed'] = timing
+        if 'upsert' in stages:
+            timings['upsert'], stats = measure(
+                lambda: manager.upsert_chunks(chunks, show_progress=False), repeat)
+            if stats['failed']:
+                raise RuntimeError(f"{stats['failed']} chunks failed to upsert for {name}")
+
+    for timing in timings.values():
+        timing['seconds'] = round(timing['seconds'], 6)
+        timing['min'] = round(timing['min'], 6)
+        timing['max'] = round(timing['max'], 6)
+
+    return {
+        'bytes': len(content),
+        'pages': text.count('--- Page '),
+        'characters': len(text),
+        'chunks': len(chunks),
+        'stages': timings
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """
+    Compare stage timings against a baseline run.
+
+    Args:
+        results: Current run
+        baseline: Stored run
+        tolerance: Allowed relative slowdown (0.2 = 20%)
+        min_delta: Ignore differences below this many seconds
+
+    Returns:
+        List of comparison rows; rows with 'regression' True exceed the tolerance
+    """
+    rows = []
+    for name, document in results['documents'].items():
+        previous = baseline.get('documents', {}).get(name)
+        if previous is None:
+            continue
+        for stage, timing in document['stages'].items():
+            before = previous['stages'].get(stage, {}).get('seconds')
+            if not before:
+                continue
+            after = timing['seconds']
+            ratio = after / before
+            rows.append({
+                'document': name,
+                'stage': stage,
+                'baseline': before,
+                'current': after,
+                'ratio': round(ratio, 3),
+                'regression': ratio > 1 + tolerance and after - before > min_delta
+            })
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the PDF → index pipeline"
+    )
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 50, 200],
+                        help='Page counts of the synthetic PDFs')
+    parser.add_argument('--fixtures', help='Directory with additional PDFs to benchmark')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES),
+                        help='Stages to time')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage (median is reported)')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--baseline', help='Compare against a stored baseline JSON file')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown before a stage counts as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help='Ignore slowdowns smaller than this many seconds')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.pages, args.fixtures)
+    if not corpus:
+        print("✗ No PDFs to benchmark")
+        return 1
+
+    processor = PDFProcessor()
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'model': args.model if set(args.stages) & set(MODEL_STAGES) else None,
+            'backend': Config.EMBEDDING_BACKEND,
+            'chunk_size': Config.CHUNK_SIZE,
+            'chunk_overlap': Config.CHUNK_OVERLAP,
+            'repeat': args.repeat
+        },
+        'documents': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='pipeline-benchmark-') as workdir:
+        # Library and pipeline progress output goes to stderr to keep stdout parseable
+        with contextlib.redirect_stdout(sys.stderr):
+            manager = None
+            if set(args.stages) & set(MODEL_STAGES):
+                manager = make_manager(args.model, Path(workdir))
+
+            for name, content in corpus:
+                print(f"Benchmarking {name}...")
+                results['documents'][name] = benchmark_document(
+                    name, content, args.stages, args.repeat, processor, manager
+                )
+
+    totals = {}
+    for document in results['documents'].values():
+        for stage, timing in document['stages'].items():
+            totals[stage] = round(totals.get(stage, 0.0) + timing['seconds'], 6)
+    results['totals'] = totals
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        results['comparison'] = compare(results, baseline, args.tolerance, args.min_delta)
+        regressions = [row for row in results['comparison'] if row['regression']]
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 1 if regressions else 0
+
+    print("=== Pipeline Benchmark ===\n")
+    header = f"{'Document':<24}{'Pages':>6}{'Chunks':>8}"
+    header += ''.join(f"{stage:>20}" for stage in args.stages)
+    print(header)
+    for name, document in results['documents'].items():
+        row = f"{name:<24}{document['pages']:>6}{document['chunks']:>8}"
+        for stage in args.stages:
+            timing = document['stages'].get(stage)
+            row += f"{timing['seconds']:>19.3f}s" if timing else f"{'-':>20}"
+        print(row)
+
+    if args.save_baseline:
+        print(f"\n✓ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        print(f"\nCompared with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for row in results['comparison']:
+            mark = '✗' if row['regression'] else '✓'
+            print(f"  {mark} {row['document']:<24}{row['stage']:<20}"
+                  f"{row['baseline']:>9.3f}s → {row['current']:>7.3f}s  ({row['ratio']:.2f}x)")
+        if regressions:
+            print(f"\n✗ {len(regressions)} stage(s) regressed")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure memory and recall of quantized local indexes and embedding caches.
+
+Uses synthetic unit vectors with low-dimensional structure and compares
+int8 and binary codes, with and without float32 rescoring, against exact
+float32 search.
+
+Usage:
+    python benchmarks/quantization.py
+    python benchmarks/quantization.py --vectors 50000 --top-k 10 --json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from local_index import LocalIndex, normalize
+from embedding_cache import EmbeddingCache
+
+
+def synthetic_vectors(count: int, dimension: int, seed: int, latent: int = 64) -> np.ndarray:
+    """
+    Unit vectors with low-dimensional structure, like sentence embeddings.
+
+    Points are drawn in a small latent space and projected up with a fixed
+    random matrix, so neighbourhoods are meaningful in every dimension.
+    """
+    projection = np.random.default_rng(42).normal(size=(latent, dimension)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(count, latent)).astype(np.float32)
+    noise = rng.normal(scale=0.5, size=(count, dimension)).astype(np.float32)
+    return normalize(points @ projection + noise)
+
+
+def recall_at_k(found: list, expected: list) -> float:
+    return len(set(found) & set(expected)) / len(expected)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark int8/binary quantization for the local index and embedding cache"
+    )
+    parser.add_argument('--vectors', type=int, default=20000, help='Number of indexed vectors')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--dimension', type=int, default=Config.EMBEDDING_DIMENSION)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dimension, seed=0)
+    queries = synthetic_vectors(args.queries, args.dimension, seed=1)
+    ids = [f"doc#chunk_{i+1}" for i in range(args.vectors)]
+
+    exact = LocalIndex(args.dimension, 'float32')
+    exact.add(ids, vectors)
+    truth = [[r['id'] for r in exact.search(q, args.top_k)] for q in queries]
+
+    report = {
+        'vectors': args.vectors,
+        'dimension': args.dimension,
+        'top_k': args.top_k,
+        'index': {},
+        'cache': {}
+    }
+
+    for quantization in ('float32', 'int8', 'binary'):
+        index = LocalIndex(args.dimension, quantization)
+        index.add(ids, vectors)
+
+        for rescore in ((False,) if quantization == 'float32' else (False, True)):
+            start = time.perf_counter()
+            found = [[r['id'] for r in index.search(q, args.top_k, rescore=rescore)] for q in queries]
+            elapsed = time.perf_counter() - start
+
+            name = quantization + ('+rescore' if rescore else '')
+            report['index'][name] = {
+                'memory_bytes': index.memory_bytes(),
+                'compression': exact.memory_bytes() / index.memory_bytes(),
+                'recall_at_k': float(np.mean([recall_at_k(f, t) for f, t in zip(found, truth)])),
+                'avg_query_ms': elapsed / len(queries) * 1000
+            }
+        index.close()
+    exact.close()
+
+    texts = [f"chunk text {i}" for i in range(args.vectors)]
+    for quantization in ('float32', 'int8'):
+        cache = EmbeddingCache('benchmark', Path(tempfile.mkdtemp()), quantization)
+        cache.store(texts, vectors)
+        restored, _ = cache.lookup(texts)
+        cosine = np.sum(normalize(restored) * vectors, axis=1)
+        report['cache'][quantization] = {
+            'memory_bytes': cache.memory_bytes(),
+            'file_bytes': cache.path.stat().st_size,
+            'min_cosine_to_original': float(cosine.min())
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Quantization Benchmark ===\n")
+    print(f"{args.vectors} vectors x {args.dimension} dims, recall@{args.top_k} vs exact float32\n")
+    print(f"{'Index':<18}{'Memory':>14}{'Smaller':>10}{'Recall':>10}{'Query ms':>10}")
+    for name, row in report['index'].items():
+        print(f"{name:<18}{row['memory_bytes']:>14,}{row['compression']:>9.1f}x"
+              f"{row['recall_at_k']:>10.3f}{row['avg_query_ms']:>10.2f}")
+
+    print(f"\n{'Cache':<18}{'Memory':>14}{'File':>14}{'Min cosine':>12}")
+    for name, row in report['cache'].items():
+        print(f"{name:<18}{row['memory_bytes']:>14,}{row['file_bytes']:>14,}{row['min_cosine_to_original']:>12.5f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Measure search latency, throughput and retrieval quality on a labeled query set.
+
+Each query in the set has a text, an optional metadata filter and the
+expected hits: {document_id, page_start, page_end} targets (a hit is
+relevant when its page range overlaps) and/or explicit chunk 'ids'.
+Queries run through PineconeManager.search, either against the
+configured Pinecone index or against a local FakePinecone index built
+from the documents in the local chunk store.
+
+Reports p50/p95/p99 latency, queries/s at several concurrency levels,
+hit rate / recall@k, MRR, and precision and recall at score thresholds
+so DEFAULT_TOP_K and SIMILARITY_THRESHOLD can be tuned on data.
+
+Usage:
+    python benchmarks/search_quality.py
+    python benchmarks/search_quality.py --backend local --k 1 3 5 10
+    python benchmarks/search_quality.py --concurrency 1 4 8 --repeat 5 --json
+    python benchmarks/search_quality.py --backend local --hierarchical
+    python benchmarks/search_quality.py --backend local --rerank --rerank-candidates 20
+"""
+
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from boilerplate import embedding_text
+from chunk_store import ChunkStore
+from fake_pinecone import FakePinecone
+from hierarchy import build_summaries
+from pdf_processor import PDFProcessor
+from pinecone_manager import PineconeManager
+
+DEFAULT_QUERIES = Path(__file__).parent / 'queries' / 'ubung_a.json'
+
+
+def load_queries(path: Path) -> list:
+    """Load a query set and normalize 'expected' to a list of targets."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    queries = data['queries'] if isinstance(data, dict) else data
+    for query in queries:
+        expected = query.get('expected', [])
+        query['expected'] = expected if isinstance(expected, list) else [expected]
+    return queries
+
+
+def is_relevant(result: dict, query: dict) -> bool:
+    """
+    Check a search result against the expected hits of a query.
+
+    Args:
+        result: Search result with 'id' and 'metadata'
+        query: Labeled query
+
+    Returns:
+        True if the result ID is expected or it overlaps an expected page range
+    """
+    if result['id'] in query.get('ids', []):
+        return True
+
+    metadata = result.get('metadata', {})
+    for target in query['expected']:
+        if metadata.get('document_id') != target.get('document_id'):
+            continue
+        if 'page_start' not in target:
+            return True
+        start, end = metadata.get('page_start'), metadata.get('page_end')
+        if start is None or end is None:
+            continue
+        if not (end < target['page_start'] or start > target['page_end']):
+            return True
+    return False
+
+
+def build_local_manager(model: str, queries: list) -> PineconeManager:
+    """
+    PineconeManager on a FakePinecone index holding the queried documents.
+
+    Chunk texts come from the local chunk store; page metadata is derived
+    from their page markers the same way chunk_text does at indexing time.
+    The chunk store itself is only read. Section and document summary
+    vectors are built as well (manifest sections when the stored document
+    metadata has them), so hierarchical search can be compared.
+    """
+    store = ChunkStore()
+    manager = PineconeManager(
+        index_name='search-quality',
+        namespace='search-quality',
+        embedding_model=model,
+        chunk_store=store,
+        embedding_cache=None,
+        client=FakePinecone()
+    )
+    manager.CONSISTENCY_WAIT = 0
+    manager.create_index(dimension=manager.embedding_model.get_sentence_embedding_dimension())
+    index = manager.get_index()
+    processor = PDFProcessor()
+
+    document_ids = sorted({
+        target['document_id']
+        for query in queries for target in query['expected'] if 'document_id' in target
+    } | {
+        query['filter']['document_id']
+        for query in queries if isinstance(query.get('filter', {}).get('document_id'), str)
+    })
+
+    for document_id in document_ids:
+        total = store.chunk_count(document_id)
+        if total == 0:
+            print(f"✗ {document_id} is not in the local chunk store, skipping")
+            continue
+
+        sections = store.get_documents([document_id]).get(document_id, {}).get('sections')
+        chunks = []
+        for number in range(1, total + 1):
+            text = store.get_span(document_id, number)
+            metadata = {'document_id': document_id, 'chunk_number': number, 'total_chunks': total}
+            metadata.update(processor._extract_page_numbers(text))
+            if sections:
+                metadata['sections'] = sections
+            chunks.append({'id': f"{document_id}#chunk_{number}", 'text': text, 'metadata': metadata})
+
+        print(f"Embedding {total} chunks of {document_id}...")
+        embeddings = manager.embed_texts([embedding_text(chunk['text']) for chunk in chunks])
+        for start in range(0, len(chunks), 100):
+            index.upsert(
+                vectors=manager._build_batch(chunks, embeddings, start, start + 100),
+                namespace=manager.namespace
+            )
+        index.upsert(
+            vectors=build_summaries(chunks, embeddings, [manager.namespace] * len(chunks)),
+            namespace=manager.summary_namespace
+        )
+
+    return manager
+
+
+def percentiles(latencies: list) -> dict:
+    """p50/p95/p99 and mean of latencies in milliseconds."""
+    values = np.asarray(latencies) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p95_ms': round(float(np.percentile(values, 95)), 2),
+        'p99_ms': round(float(np.percentile(values, 99)), 2),
+        'mean_ms': round(float(values.mean()), 2)
+    }
+
+
+def run_search(manager: PineconeManager, query: dict, top_k: int, search_args: dict):
+    """Run one query, returning (latency seconds, results)."""
+    start = time.perf_counter()
+    results = manager.search(
+        query=query['query'],
+        top_k=top_k,
+        filter_metadata=query.get('filter'),
+        include_metadata=True,
+        **search_args
+    )
+    return time.perf_counter() - start, results
+
+
+def quality(queries: list, results: list, ks: list, thresholds: list) -> dict:
+    """
+    Retrieval quality over one ranked result list per query.
+
+    recall@k is the fraction of expected ids found in the top k when a
+    query lists 'ids'; for page-range targets, where the number of
+    relevant chunks is open, it is the hit rate (any relevant hit in top k).
+
+    Returns:
+        Dict with 'recall_at_k', 'mrr' and per-threshold precision/recall
+    """
+    recall_at_k = {}
+    for k in ks:
+        scores = []
+        for query, ranked in zip(queries, results):
+            top = ranked[:k]
+            if query.get('ids') and not query['expected']:
+                found = {r['id'] for r in top} & set(query['ids'])
+                scores.append(len(found) / len(query['ids']))
+            else:
+                scores.append(1.0 if any(is_relevant(r, query) for r in top) else 0.0)
+        recall_at_k[str(k)] = round(float(np.mean(scores)), 4)
+
+    reciprocal_ranks = []
+    for query, ranked in zip(queries, results):
+        rank = next((i for i, r in enumerate(ranked, 1) if is_relevant(r, query)), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    by_threshold = {}
+    for threshold in thresholds:
+        kept = relevant_kept = answered = 0
+        for query, ranked in zip(queries, results):
+            above = [r for r in ranked if r['score'] >= threshold]
+            kept += len(above)
+            hits = sum(1 for r in above if is_relevant(r, query))
+            relevant_kept += hits
+            answered += 1 if hits else 0
+        by_threshold[str(threshold)] = {
+            'precision': round(relevant_kept / kept, 4) if kept else None,
+            'hit_rate': round(answered / len(queries), 4),
+            'results_per_query': round(kept / len(queries), 2)
+        }
+
+    return {
+        'recall_at_k': recall_at_k,
+        'mrr': round(float(np.mean(reciprocal_ranks)), 4),
+        'thresholds': by_threshold
+    }
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark search latency and recall on a labeled query set"
+    )
+    parser.add_argument('--queries', default=str(DEFAULT_QUERIES), help='Labeled query set (JSON)')
+    parser.add_argument('--backend', choices=['pinecone', 'local'], default='pinecone',
+                        help='Configured Pinecone index, or a local index built from the chunk store')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 3, 5, 10],
+                        help='Cut-offs for recall@k')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.3, 0.5, 0.7],
+                        help='Score thresholds to evaluate')
+    parser.add_argument('--repeat', type=int, default=3, help='Latency runs per query')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4],
+                        help='Thread counts for the throughput test')
+    parser.add_argument('--expand', type=int, default=0, help='Pass expand=N to search')
+    parser.add_argument('--diversify', choices=['collapse', 'mmr'], help='Pass diversify to search')
+    parser.add_argument('--hierarchical', action='store_true',
+                        help='Pass hierarchical=True to search (section → chunk)')
+    parser.add_argument('--rerank', action='store_true',
+                        help='Pass rerank=True to search (cross-encoder over the candidates)')
+    parser.add_argument('--rerank-candidates', type=int, default=Config.RERANK_CANDIDATES,
+                        help='Candidates to re-rank')
+    parser.add_argument('--rerank-budget-ms', type=int, default=Config.RERANK_BUDGET_MS,
+                        help='Re-ranking time budget in ms (0 = no limit)')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    queries = load_queries(Path(args.queries))
+    top_k = max(args.k)
+    search_args = {'expand': args.expand, 'diversify': args.diversify,
+                   'hierarchical': args.hierarchical, 'rerank': args.rerank}
+    if args.rerank:
+        search_args['rerank_candidates'] = args.rerank_candidates
+        search_args['rerank_budget'] = args.rerank_budget_ms / 1000 if args.rerank_budget_ms > 0 else None
+
+    try:
+        if args.backend == 'local':
+            manager = build_local_manager(args.model, queries)
+        else:
+            manager = PineconeManager(embedding_model=args.model)
+    except Exception as e:
+        print(f"✗ Failed to initialize {args.backend} backend: {e}")
+        return 1
+
+    run_search(manager, queries[0], top_k, search_args)  # Warm-up
+
+    # Sequential latency; the last run of each query is scored
+    latencies = []
+    ranked = []
+    for query in queries:
+        for _ in range(args.repeat):
+            latency, results = run_search(manager, query, top_k, search_args)
+            latencies.append(latency)
+        ranked.append(results)
+
+    throughput = []
+    workload = [query for query in queries for _ in range(args.repeat)]
+    for workers in args.concurrency:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            start = time.perf_counter()
+            timings = list(pool.map(
+                lambda q: run_search(manager, q, top_k, search_args)[0], workload
+            ))
+            elapsed = time.perf_counter() - start
+        throughput.append({
+            'concurrency': workers,
+            'queries': len(workload),
+            'queries_per_second': round(len(workload) / elapsed, 2),
+            **percentiles(timings)
+        })
+
+    report = {
+        'backend': args.backend,
+        'model': args.model,
+        'queries': len(queries),
+        'top_k': top_k,
+        'search': search_args,
+        'latency': percentiles(latencies),
+        'throughput': throughput,
+        **quality(queries, ranked, args.k, args.thresholds),
+        'per_query': [
+            {
+                'id': query.get('id', query['query']),
+                'first_relevant_rank': next(
+                    (i for i, r in enumerate(results, 1) if is_relevant(r, query)), None
+                ),
+                'top_score': round(results[0]['score'], 4) if results else None
+            }
+            for query, results in zip(queries, ranked)
+        ]
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Search Quality ===\n")
+    print(f"Backend: {args.backend}, model: {args.model}, queries: {len(queries)}\n")
+
+    latency = report['latency']
+    print(f"Latency: p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms, "
+          f"p99 {latency['p99_ms']:.1f} ms")
+
+    print(f"\n{'Concurrency':>12}{'Queries/s':>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for run in throughput:
+        print(f"{run['concurrency']:>12}{run['queries_per_second']:>12.1f}"
+              f"{run['p50_ms']:>10.1f}{run['p95_ms']:>10.1f}")
+
+    print(f"\nMRR: {report['mrr']:.3f}")
+    for k, value in report['recall_at_k'].items():
+        print(f"Recall@{k}: {value:.3f}")
+
+    print(f"\n{'Threshold':>10}{'Precision':>11}{'Hit rate':>10}{'Results/q':>11}")
+    for threshold, values in report['thresholds'].items():
+        precision = f"{values['precision']:.3f}" if values['precision'] is not None else '-'
+        print(f"{threshold:>10}{precision:>11}{values['hit_rate']:>10.3f}"
+              f"{values['results_per_query']:>11.1f}")
+
+    print("\nPer query (rank of first relevant hit):")
+    for row in report['per_query']:
+        mark = '✓' if row['first_relevant_rank'] else '✗'
+        print(f"  {mark} {row['id']:<32} rank {row['first_relevant_rank'] or '-':<4} "
+              f"top score {row['top_score']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,128 @@
+"""
+Generate synthetic PDFs for benchmarks.
+
+Pages look like the course textbooks: a running header with chapter title
+and printed page number, paragraphs of German text, and a footer page
+number. Optionally a /PageLabels tree maps front matter to roman numerals
+and the body to decimal page numbers, as in the real readers.
+"""
+
+import random
+from typing import List, Optional
+
+WORDS = (
+    "Politik Gesellschaft Verwaltung Begriff Definition Analyse Staat Akteure "
+    "Institutionen Policy Polity Politics Öffentlichkeit Entscheidung Prozess "
+    "Steuerung Interessen Macht Legitimität Demokratie Regierung Bürger "
+    "Wissenschaft Methode Theorie Forschung Hypothese Daten Ergebnis"
+).split()
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+LINES_PER_PAGE = 48
+CHARS_PER_LINE = 90
+
+
+def _escape(text: str) -> bytes:
+    """Encode a string as a PDF literal string body (WinAnsi/Latin-1)."""
+    data = text.encode('latin-1', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _page_lines(rng: random.Random, chapter: int, title: str, printed_page: Optional[str]) -> List[str]:
+    """Header, body paragraphs and footer of one page."""
+    lines = []
+    if printed_page is not None:
+        lines.append(f"{chapter} {title} {printed_page}")
+
+    while len(lines) < LINES_PER_PAGE - 2:
+        line = ''
+        while len(line) < CHARS_PER_LINE:
+            line += rng.choice(WORDS) + ' '
+        lines.append(line.strip())
+        if rng.random() < 0.12:
+            lines.append('')
+
+    if printed_page is not None:
+        lines.append(printed_page)
+    return lines
+
+
+def make_pdf(
+    pages: int,
+    front_matter: int = 4,
+    page_labels: bool = True,
+    seed: int = 0
+) -> bytes:
+    """
+    Build a text PDF.
+
+    Args:
+        pages: Total number of pages
+        front_matter: Leading pages labelled i, ii, ... (when page_labels is set)
+        page_labels: Add a /PageLabels tree to the catalog
+        seed: Random seed for the body text
+
+    Returns:
+        PDF file content as bytes
+    """
+    rng = random.Random(seed)
+    front_matter = min(front_matter, pages) if page_labels else 0
+
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b'')  # Filled in once the page tree exists
+    pages_id = add(b'')
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+
+    page_ids = []
+    for index in range(pages):
+        body_number = index - front_matter + 1
+        printed = str(body_number) if body_number >= 1 else None
+        chapter = 1 + max(body_number, 0) // 20
+        lines = _page_lines(rng, chapter, 'Einleitung', printed)
+
+        stream = [b'BT /F1 10 Tf 14 TL 56 800 Td']
+        for line in lines:
+            stream.append(b'(' + _escape(line) + b') Tj T*')
+        stream.append(b'ET')
+        content = b'\n'.join(stream)
+
+        content_id = add(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        page_ids.append(add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, font_id, content_id)
+        ))
+
+    kids = b' '.join(b'%d 0 R' % pid for pid in page_ids)
+    objects[pages_id - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+
+    catalog = b'<< /Type /Catalog /Pages %d 0 R' % pages_id
+    if page_labels:
+        nums = []
+        if front_matter:
+            nums.append(b'0 << /S /r >>')
+        nums.append(b'%d << /S /D /St 1 >>' % front_matter)
+        catalog += b' /PageLabels << /Nums [' + b' '.join(nums) + b'] >>'
+    objects[catalog_id - 1] = catalog + b' >>'
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+
+    return bytes(out)
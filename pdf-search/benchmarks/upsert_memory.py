@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Compare peak memory and time of the upsert vector-building paths.
+
+The list path converts the whole embedding matrix with .tolist() and
+builds every vector dict up front (the previous upsert_chunks behaviour).
+The view path keeps one float32 matrix and builds each batch from row
+views with PineconeManager._build_batch. Both feed a sink that unboxes
+values per batch the way the Pinecone client does when serializing.
+
+Usage:
+    python benchmarks/upsert_memory.py
+    python benchmarks/upsert_memory.py --chunks 20000 --json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from pinecone_manager import PineconeManager
+
+
+def sink(batch: list) -> int:
+    """Serialize a batch like the client: unbox all values of the batch, then drop them."""
+    converted = [
+        v['values'] if isinstance(v['values'], list) else v['values'].tolist()
+        for v in batch
+    ]
+    return sum(len(values) for values in converted)
+
+
+def list_path(chunks: list, embeddings: np.ndarray, batch_size: int) -> int:
+    """Previous behaviour: nested lists for all chunks before batching."""
+    vectors = []
+    for chunk, embedding in zip(chunks, embeddings.tolist()):
+        vectors.append({'id': chunk['id'], 'values': embedding, 'metadata': chunk['metadata']})
+    return sum(sink(vectors[i:i + batch_size]) for i in range(0, len(vectors), batch_size))
+
+
+def view_path(chunks: list, embeddings: np.ndarray, batch_size: int) -> int:
+    """Current behaviour: batches of row views over one float32 matrix."""
+    return sum(
+        sink(PineconeManager._build_batch(chunks, embeddings, i, i + batch_size))
+        for i in range(0, len(chunks), batch_size)
+    )
+
+
+def measure(path, chunks: list, embeddings: np.ndarray, batch_size: int) -> dict:
+    """Run one path under tracemalloc and time it."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    path(chunks, embeddings, batch_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_bytes': peak}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark memory of building upsert batches"
+    )
+    parser.add_argument('--chunks', type=int, default=5000, help='Number of chunks')
+    parser.add_argument('--dimension', type=int, default=Config.EMBEDDING_DIMENSION)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help='Output results as JSON')
+
+    args = parser.parse_args()
+
+    embeddings = np.random.default_rng(0).normal(size=(args.chunks, args.dimension)).astype(np.float32)
+    chunks = [
+        {'id': f"doc#chunk_{i+1}", 'metadata': {'document_id': 'doc', 'chunk_number': i + 1}}
+        for i in range(args.chunks)
+    ]
+
+    report = {
+        'chunks': args.chunks,
+        'dimension': args.dimension,
+        'batch_size': args.batch_size,
+        'embedding_matrix_bytes': embeddings.nbytes,
+        'list_path': measure(list_path, chunks, embeddings, args.batch_size),
+        'view_path': measure(view_path, chunks, embeddings, args.batch_size)
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("=== Upsert Batch Building ===\n")
+    print(f"{args.chunks} chunks x {args.dimension} dims, batch size {args.batch_size}")
+    print(f"Embedding matrix: {embeddings.nbytes:,} bytes\n")
+    for name in ('list_path', 'view_path'):
+        row = report[name]
+        print(f"{name:<10} peak {row['peak_bytes']:>14,} bytes   {row['seconds']:.3f}s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -0,0 +1,100 @@
+"""
+Running header and footer removal for extracted pages.
+Detects lines repeated across page tops and bottoms by frequency counting.
+"""
+
+import re
+from collections import Counter
+from typing import List, Dict, Any, Set, Tuple
+
+# Lines at the top and bottom of a page that may be header or footer
+HEADER_LINES = 3
+FOOTER_LINES = 3
+
+# A zone line is boilerplate when it recurs (after normalization) on this many pages
+MIN_REPEATS = 3
+
+# Longer lines are body text even when they repeat
+MAX_LINE_LENGTH = 100
+
+PAGE_MARKER_PATTERN = re.compile(r'^--- Page [^\n]* ---\n?', re.MULTILINE)
+
+
+def normalize_line(line: str) -> str:
+    """Line key for counting: numbers replaced by '#', case and spacing folded."""
+    line = re.sub(r'\s+', ' ', line.strip().lower())
+    line = re.sub(r'\d+', '#', line)
+    # Roman page numbers of the front matter
+    return re.sub(r'^[ivxlc]+$', '#', line)
+
+
+def _zones(lines: List[str]) -> List[int]:
+    """Indices of the header and footer lines among a page's non-empty lines."""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:HEADER_LINES] + filled[-FOOTER_LINES:]))
+
+
+def find_boilerplate(pages: List[str], min_repeats: int = MIN_REPEATS) -> Set[str]:
+    """
+    Normalized header/footer lines that recur across pages.
+
+    Each line is counted once per page, only when it is among the first
+    HEADER_LINES or last FOOTER_LINES non-empty lines. Numbers are
+    normalized, so "1 Einleitung 3" and "1 Einleitung 5" count as one
+    running header.
+
+    Args:
+        pages: Text of each page
+        min_repeats: Pages a line must appear on
+
+    Returns:
+        Set of normalized lines (see normalize_line)
+    """
+    counts: Counter = Counter()
+    for text in pages:
+        lines = text.split('\n')
+        keys = {
+            normalize_line(lines[i]) for i in _zones(lines)
+            if len(lines[i].strip()) <= MAX_LINE_LENGTH
+        }
+        counts.update(keys)
+    return {key for key, count in counts.items() if count >= min_repeats}
+
+
+def strip_boilerplate(
+    records: List[Dict[str, Any]],
+    min_repeats: int = MIN_REPEATS
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Remove running headers and footers from page records.
+
+    Labels and PDF page numbers are kept, so page attribution is unchanged;
+    only repeated lines in the header and footer zones are dropped. Pages
+    left empty are dropped.
+
+    Args:
+        records: Page records ({'pdf_page', 'label', 'text'}) of one document
+        min_repeats: Pages a line must appear on to count as boilerplate
+
+    Returns:
+        Tuple of (new records, number of lines removed)
+    """
+    boilerplate = find_boilerplate([record['text'] for record in records], min_repeats)
+    if not boilerplate:
+        return records, 0
+
+    cleaned = []
+    removed = 0
+    for record in records:
+        lines = record['text'].split('\n')
+        drop = {i for i in _zones(lines) if normalize_line(lines[i]) in boilerplate}
+        removed += len(drop)
+        text = '\n'.join(line for i, line in enumerate(lines) if i not in drop).strip('\n')
+        if text.strip():
+            cleaned.append({**record, 'text': text})
+    return cleaned, removed
+
+
+def embedding_text(text: str) -> str:
+    """Chunk text without '--- Page X (PDF Y) ---' markers, for embedding."""
+    return PAGE_MARKER_PATTERN.sub('', text)
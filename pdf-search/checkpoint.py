@@ -0,0 +1,217 @@
+"""
+Checkpoint journal for resumable indexing runs.
+Append-only JSONL log of per-document and per-batch progress, plus the
+chunks and embeddings of each document so a resumed run skips completed work.
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from config import Config
+
+
+class DocumentProgress:
+    """Progress of one document, rebuilt from the journal."""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.chunked = False
+        self.embedded = False
+        self.done = False
+        self.upserted_ids: set = set()
+        self.failed_ids: set = set()
+
+    @property
+    def started(self) -> bool:
+        return self.chunked or bool(self.upserted_ids) or self.done
+
+
+class CheckpointJournal:
+    """
+    Durable progress journal for scripts/index_pdfs.py.
+
+    Every event is one JSON line, flushed and fsynced before the call
+    returns, so a crash loses at most the batch in flight. Events:
+
+        run_start       {materials}
+        chunked         {document_id, chunks}   chunks saved to <dir>/documents/<doc>/chunks.json
+        embedded        {document_id}           embeddings saved to <dir>/documents/<doc>/embeddings.npy
+        batch           {document_id, ids, error}
+        document_done   {document_id, upserted, failed}
+        run_end         {}
+
+    A batch with an error puts its IDs on the document's retry queue; a
+    later successful batch with the same IDs takes them off again.
+    """
+
+    JOURNAL_FILE = 'journal.jsonl'
+    DOCUMENTS_DIR = 'documents'
+
+    # Files a document directory may hold (including interrupted writes)
+    DOCUMENT_FILES = ('chunks.json', 'chunks.json.tmp', 'embeddings.npy', 'embeddings.tmp.npy')
+
+    def __init__(self, root: Optional[Path] = None, resume: bool = False):
+        """
+        Open a checkpoint directory.
+
+        Args:
+            root: Checkpoint directory (defaults to Config.CACHE_DIR / 'checkpoints' / 'index_pdfs')
+            resume: Keep and replay an existing journal; otherwise start fresh
+        """
+        self.root = Path(root or Config.CACHE_DIR / 'checkpoints' / 'index_pdfs')
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / self.JOURNAL_FILE
+
+        self.documents: Dict[str, DocumentProgress] = {}
+        self.materials: List[str] = []
+        if not resume:
+            self._clear()
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _clear(self) -> None:
+        """
+        Remove the journal and saved document state of a previous run.
+
+        Only the files the journal wrote for the documents it lists are
+        deleted; directories are removed only once empty, so anything else
+        in the checkpoint directory is left alone.
+        """
+        if not self.path.exists():
+            return
+
+        self._replay()
+        for document_id in self.documents:
+            document_dir = self._document_dir(document_id)
+            for name in self.DOCUMENT_FILES:
+                (document_dir / name).unlink(missing_ok=True)
+            self._remove_if_empty(document_dir)
+        self._remove_if_empty(self.root / self.DOCUMENTS_DIR)
+        self.path.unlink()
+
+        self.documents = {}
+        self.materials = []
+
+    @staticmethod
+    def _remove_if_empty(directory: Path) -> None:
+        try:
+            directory.rmdir()
+        except OSError:
+            pass  # Missing, or holds files the journal did not write
+
+    def _replay(self) -> None:
+        """Rebuild progress from the journal, ignoring a torn last line."""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crash
+                self._apply(event)
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event['event']
+        if kind == 'run_start':
+            self.materials = event.get('materials', [])
+            return
+        if 'document_id' not in event:
+            return
+
+        progress = self.progress(event['document_id'])
+        if kind == 'chunked':
+            progress.chunked = True
+        elif kind == 'embedded':
+            progress.embedded = True
+        elif kind == 'batch':
+            ids = set(event['ids'])
+            if event.get('error'):
+                progress.failed_ids |= ids
+            else:
+                progress.upserted_ids |= ids
+                progress.failed_ids -= ids
+        elif kind == 'document_done':
+            progress.done = event.get('failed', 0) == 0
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        event = {'event': event.pop('event'), 'timestamp': round(time.time(), 3), **event}
+        self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(event)
+
+    def progress(self, document_id: str) -> DocumentProgress:
+        """Progress record of a document (created on first use)."""
+        if document_id not in self.documents:
+            self.documents[document_id] = DocumentProgress(document_id)
+        return self.documents[document_id]
+
+    def _document_dir(self, document_id: str) -> Path:
+        return self.root / self.DOCUMENTS_DIR / re.sub(r'[^\w.-]', '_', document_id)
+
+    def start_run(self, materials: List[str]) -> None:
+        self._write({'event': 'run_start', 'materials': materials})
+
+    def end_run(self) -> None:
+        self._write({'event': 'run_end'})
+
+    def save_chunks(self, document_id: str, chunks: List[Dict[str, Any]]) -> None:
+        """Persist a document's chunks, then journal that it is chunked."""
+        document_dir = self._document_dir(document_id)
+        document_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = document_dir / 'chunks.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(chunks, f, ensure_ascii=False)
+        tmp_path.replace(document_dir / 'chunks.json')
+        self._write({'event': 'chunked', 'document_id': document_id, 'chunks': len(chunks)})
+
+    def load_chunks(self, document_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Chunks saved by save_chunks, or None."""
+        path = self._document_dir(document_id) / 'chunks.json'
+        if not self.progress(document_id).chunked or not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_embeddings(self, document_id: str, embeddings: np.ndarray) -> None:
+        """Persist a document's embeddings, then journal that it is embedded."""
+        document_dir = self._document_dir(document_id)
+        document_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = document_dir / 'embeddings.tmp.npy'
+        np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+        tmp_path.replace(document_dir / 'embeddings.npy')
+        self._write({'event': 'embedded', 'document_id': document_id})
+
+    def load_embeddings(self, document_id: str) -> Optional[np.ndarray]:
+        """Embeddings saved by save_embeddings, or None."""
+        path = self._document_dir(document_id) / 'embeddings.npy'
+        if not self.progress(document_id).embedded or not path.exists():
+            return None
+        return np.load(path)
+
+    def record_batch(self, document_id: str, ids: List[str], error: Optional[Exception] = None) -> None:
+        """Journal one upsert batch (failed batches go on the retry queue)."""
+        self._write({
+            'event': 'batch',
+            'document_id': document_id,
+            'ids': ids,
+            'error': str(error) if error else None
+        })
+
+    def finish_document(self, document_id: str, upserted: int, failed: int) -> None:
+        """Journal the end of a document (complete when no chunk failed)."""
+        self._write({
+            'event': 'document_done',
+            'document_id': document_id,
+            'upserted': upserted,
+            'failed': failed
+        })
+
+    def close(self) -> None:
+        self._file.close()
@@ -0,0 +1,550 @@
+"""
+Local chunk store for document text and document metadata.
+Keeps bulky fields out of Pinecone vector metadata.
+"""
+
+import json
+import mmap
+import re
+import struct
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from config import Config
+
+
+CHUNK_ID_PATTERN = re.compile(r'^(?P<document_id>.+)#chunk_(?P<chunk_number>\d+)$')
+
+
+def split_metadata(
+    metadata: Dict[str, Any],
+    vector_fields: tuple = Config.VECTOR_METADATA_FIELDS
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split chunk metadata into vector metadata and local-only metadata.
+
+    Args:
+        metadata: Full chunk metadata as produced by PDFProcessor.chunk_text
+        vector_fields: Fields that stay in Pinecone (ids and filter fields)
+
+    Returns:
+        Tuple of (vector_metadata, local_metadata)
+    """
+    vector_metadata = {}
+    local_metadata = {}
+
+    for key, value in metadata.items():
+        if key in vector_fields:
+            vector_metadata[key] = value
+        else:
+            local_metadata[key] = value
+
+    return vector_metadata, local_metadata
+
+
+def parse_chunk_id(chunk_id: str) -> Optional[Tuple[str, int]]:
+    """
+    Parse a 'document_id#chunk_N' identifier.
+
+    Args:
+        chunk_id: Chunk identifier
+
+    Returns:
+        Tuple of (document_id, chunk_number) or None if the ID has another form
+    """
+    match = CHUNK_ID_PATTERN.match(chunk_id)
+    if not match:
+        return None
+    return match.group('document_id'), int(match.group('chunk_number'))
+
+
+def assemble_document(chunks: List[Dict[str, Any]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Rebuild document text and chunk character spans from chunks.
+
+    Chunks carrying 'start_index' (see PDFProcessor.chunk_text) are laid
+    out at their original offsets, so overlapping text is stored once.
+    Gaps left by stripped separators are filled with newlines. Without
+    offsets, chunks are concatenated in order.
+
+    Args:
+        chunks: Chunks of a single document, ordered by chunk number
+
+    Returns:
+        Tuple of (document_text, [(char_start, char_end), ...])
+    """
+    pieces = []
+    spans = []
+    cursor = 0
+
+    if all('start_index' in chunk for chunk in chunks):
+        for chunk in chunks:
+            text = chunk['text']
+            start = chunk['start_index']
+            end = start + len(text)
+
+            if start > cursor:
+                pieces.append('\n' * (start - cursor))
+                cursor = start
+            if end > cursor:
+                pieces.append(text[cursor - start:])
+                cursor = end
+
+            spans.append((start, end))
+    else:
+        for chunk in chunks:
+            if pieces:
+                pieces.append('\n\n')
+                cursor += 2
+            pieces.append(chunk['text'])
+            spans.append((cursor, cursor + len(chunk['text'])))
+            cursor += len(chunk['text'])
+
+    return ''.join(pieces), spans
+
+
+def merge_overlapping(
+    texts: List[str],
+    overlap: int = Config.CHUNK_OVERLAP,
+    min_match: int = 10
+) -> str:
+    """
+    Join consecutive chunk texts, dropping the text they share.
+
+    The splitter repeats at most `overlap` characters at the start of the
+    next chunk, so only that window is searched for a suffix/prefix match.
+
+    Args:
+        texts: Chunk texts in document order
+        overlap: Maximum overlap between consecutive chunks
+        min_match: Shortest shared text treated as real overlap
+
+    Returns:
+        Merged text
+    """
+    if not texts:
+        return ''
+
+    merged = texts[0]
+    for text in texts[1:]:
+        shared = 0
+        for size in range(min(overlap, len(merged), len(text)), min_match - 1, -1):
+            if merged.endswith(text[:size]):
+                shared = size
+                break
+
+        if shared:
+            merged += text[shared:]
+        else:
+            merged += '\n\n' + text
+
+    return merged
+
+
+class ChunkStore:
+    """
+    Store for document text and per-document metadata.
+
+    Layout of the store directory:
+        documents.json      {document_id: {document-level metadata}}
+        text/<doc_id>.blk   Compressed, block-indexed document text
+
+    A .blk file is a fixed header, a block table, a chunk offset table and
+    the zlib-compressed blocks of the UTF-8 document text:
+
+        magic (8s) | block_size (I) | n_blocks (I) | n_chunks (I) | text_bytes (Q)
+        n_blocks x (data_offset Q, compressed_length I)
+        n_chunks x (byte_start Q, byte_end Q)
+        compressed blocks...
+
+    Both tables have fixed-size entries, so any chunk or range of chunks is
+    located with a single struct read and decoded from the one or two
+    blocks it spans, without parsing the rest of the file.
+    """
+
+    DOCUMENTS_FILE = 'documents.json'
+    TEXT_DIR = 'text'
+    TEXT_SUFFIX = '.blk'
+
+    MAGIC = b'PDFSBLK1'
+    HEADER = struct.Struct('<8sIIIQ')
+    BLOCK_ENTRY = struct.Struct('<QI')
+    CHUNK_ENTRY = struct.Struct('<QQ')
+    BLOCK_SIZE = 64 * 1024
+    BLOCK_CACHE_SIZE = 32
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Initialize chunk store.
+
+        Args:
+            root: Store directory (defaults to Config.CHUNK_STORE_DIR)
+        """
+        self.root = Path(root or Config.CHUNK_STORE_DIR)
+        self.text_dir = self.root / self.TEXT_DIR
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+
+        self.documents_path = self.root / self.DOCUMENTS_FILE
+        self._documents = self._load_json(self.documents_path)
+
+        self._maps: Dict[str, Tuple[mmap.mmap, Tuple[int, int, int], int]] = {}
+        self._blocks: OrderedDict = OrderedDict()
+
+    def _load_json(self, path: Path) -> Dict[str, Any]:
+        """Load a JSON object from disk, or return an empty dict."""
+        if not path.exists():
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_json(self, path: Path, data: Dict[str, Any]) -> None:
+        """Atomically write a JSON object to disk."""
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    def _text_path(self, document_id: str) -> Path:
+        """Path of a document's block file."""
+        safe_id = re.sub(r'[^\w.-]', '_', document_id)
+        return self.text_dir / f"{safe_id}{self.TEXT_SUFFIX}"
+
+    def _forget(self, document_id: str) -> None:
+        """Drop cached maps and blocks of a document."""
+        entry = self._maps.pop(document_id, None)
+        if entry is not None:
+            entry[0].close()
+        for key in [k for k in self._blocks if k[0] == document_id]:
+            del self._blocks[key]
+
+    def close(self) -> None:
+        """Release all memory maps."""
+        for document_id in list(self._maps):
+            self._forget(document_id)
+
+    def has_document(self, document_id: str) -> bool:
+        """Check whether a document's text is stored."""
+        return self._text_path(document_id).exists()
+
+    def put_document(
+        self,
+        document_id: str,
+        text: str,
+        spans: List[Tuple[int, int]]
+    ) -> None:
+        """
+        Write a document's text and chunk offset table.
+
+        Args:
+            document_id: Document identifier
+            text: Full document text
+            spans: Character span (start, end) of each chunk, by chunk number
+        """
+        # Convert character offsets to byte offsets in one pass
+        positions = sorted({p for span in spans for p in span})
+        byte_offsets = {}
+        char_cursor = 0
+        byte_cursor = 0
+        for position in positions:
+            byte_cursor += len(text[char_cursor:position].encode('utf-8'))
+            char_cursor = position
+            byte_offsets[position] = byte_cursor
+
+        data = text.encode('utf-8')
+        blocks = [
+            zlib.compress(data[i:i + self.BLOCK_SIZE])
+            for i in range(0, len(data), self.BLOCK_SIZE)
+        ]
+
+        block_table = []
+        data_offset = 0
+        for block in blocks:
+            block_table.append(self.BLOCK_ENTRY.pack(data_offset, len(block)))
+            data_offset += len(block)
+
+        chunk_table = [
+            self.CHUNK_ENTRY.pack(byte_offsets[start], byte_offsets[end])
+            for start, end in spans
+        ]
+
+        path = self._text_path(document_id)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.BLOCK_SIZE, len(blocks), len(spans), len(data)
+            ))
+            f.write(b''.join(block_table))
+            f.write(b''.join(chunk_table))
+            f.write(b''.join(blocks))
+
+        self._forget(document_id)
+        tmp_path.replace(path)
+
+    def _open(self, document_id: str) -> Optional[Tuple[mmap.mmap, Tuple[int, int, int]]]:
+        """Map a document's block file and read its header."""
+        path = self._text_path(document_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._forget(document_id)
+            return None
+
+        # Remap if another writer replaced the file
+        if document_id in self._maps:
+            data, header, mapped_mtime = self._maps[document_id]
+            if mapped_mtime == mtime:
+                return data, header
+            self._forget(document_id)
+
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, block_size, n_blocks, n_chunks, _ = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            data.close()
+            raise ValueError(f"Not a chunk store file: {path}")
+
+        self._maps[document_id] = (data, (block_size, n_blocks, n_chunks), mtime)
+        return data, (block_size, n_blocks, n_chunks)
+
+    def _block(self, document_id: str, data: mmap.mmap, n_blocks: int, n_chunks: int, block_index: int) -> bytes:
+        """Decompress one block, with a small LRU cache."""
+        key = (document_id, block_index)
+        if key in self._blocks:
+            self._blocks.move_to_end(key)
+            return self._blocks[key]
+
+        tables_end = (
+            self.HEADER.size
+            + n_blocks * self.BLOCK_ENTRY.size
+            + n_chunks * self.CHUNK_ENTRY.size
+        )
+        offset, length = self.BLOCK_ENTRY.unpack_from(
+            data, self.HEADER.size + block_index * self.BLOCK_ENTRY.size
+        )
+        block = zlib.decompress(data[tables_end + offset:tables_end + offset + length])
+
+        self._blocks[key] = block
+        if len(self._blocks) > self.BLOCK_CACHE_SIZE:
+            self._blocks.popitem(last=False)
+        return block
+
+    def chunk_count(self, document_id: str) -> int:
+        """Number of chunks stored for a document (0 if unknown)."""
+        opened = self._open(document_id)
+        return opened[1][2] if opened else 0
+
+    def get_span(
+        self,
+        document_id: str,
+        first_chunk: int,
+        last_chunk: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Fetch the text covering a range of chunks.
+
+        Args:
+            document_id: Document identifier
+            first_chunk: First chunk number (1-based)
+            last_chunk: Last chunk number (defaults to first_chunk)
+
+        Returns:
+            Text from the start of first_chunk to the end of last_chunk,
+            or None if the document or chunks are not stored
+        """
+        opened = self._open(document_id)
+        if opened is None:
+            return None
+
+        data, (block_size, n_blocks, n_chunks) = opened
+        last_chunk = last_chunk or first_chunk
+        if first_chunk < 1 or last_chunk > n_chunks or first_chunk > last_chunk:
+            return None
+
+        table_offset = self.HEADER.size + n_blocks * self.BLOCK_ENTRY.size
+        start, _ = self.CHUNK_ENTRY.unpack_from(
+            data, table_offset + (first_chunk - 1) * self.CHUNK_ENTRY.size
+        )
+        _, end = self.CHUNK_ENTRY.unpack_from(
+            data, table_offset + (last_chunk - 1) * self.CHUNK_ENTRY.size
+        )
+        if end <= start:
+            return ''
+
+        first_block = start // block_size
+        last_block = (end - 1) // block_size
+        raw = b''.join(
+            self._block(document_id, data, n_blocks, n_chunks, i)
+            for i in range(first_block, last_block + 1)
+        )
+        base = first_block * block_size
+
+        return raw[start - base:end - base].decode('utf-8')
+
+    def get_context(
+        self,
+        document_id: str,
+        first_chunk: int,
+        last_chunk: int,
+        overlap: int = Config.CHUNK_OVERLAP
+    ) -> Optional[str]:
+        """
+        Fetch a run of neighbouring chunks as one de-duplicated text.
+
+        Args:
+            document_id: Document identifier
+            first_chunk: First chunk number (1-based)
+            last_chunk: Last chunk number
+            overlap: Maximum overlap between consecutive chunks
+
+        Returns:
+            Merged text, or None if the document is not stored
+        """
+        n_chunks = self.chunk_count(document_id)
+        if n_chunks == 0:
+            return None
+
+        first_chunk = max(1, first_chunk)
+        last_chunk = min(n_chunks, last_chunk)
+        texts = [
+            self.get_span(document_id, number)
+            for number in range(first_chunk, last_chunk + 1)
+        ]
+
+        return merge_overlapping([t for t in texts if t is not None], overlap)
+
+    def put_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        vector_fields: tuple = Config.VECTOR_METADATA_FIELDS,
+        slim: bool = Config.SLIM_METADATA
+    ) -> List[Dict[str, Any]]:
+        """
+        Store document text and document metadata locally.
+
+        Chunks are grouped by document; each document's text file is
+        rewritten, so pass all chunks of a document together.
+
+        Args:
+            chunks: List of chunk dicts with 'id', 'text', and 'metadata'
+            vector_fields: Metadata fields that stay on the vector
+            slim: Reduce returned chunk metadata to vector_fields
+
+        Returns:
+            Chunks to upsert (with slim metadata if requested)
+        """
+        by_document: Dict[str, List[Dict[str, Any]]] = {}
+        result = []
+
+        for chunk in chunks:
+            vector_metadata, local_metadata = split_metadata(
+                chunk['metadata'], vector_fields
+            )
+
+            # Chunk text goes to the text file, everything else is per document
+            local_metadata.pop('chunk_text', None)
+            document_id = vector_metadata.get('document_id')
+            if document_id:
+                by_document.setdefault(document_id, []).append(chunk)
+                if local_metadata:
+                    self._documents.setdefault(document_id, {}).update(local_metadata)
+
+            if slim:
+                chunk = dict(chunk, metadata=vector_metadata)
+            result.append(chunk)
+
+        for document_id, doc_chunks in by_document.items():
+            doc_chunks.sort(key=lambda c: c['metadata'].get('chunk_number', 0))
+            text, spans = assemble_document(doc_chunks)
+            self.put_document(document_id, text, spans)
+
+        self._write_json(self.documents_path, self._documents)
+
+        return result
+
+    def get_texts(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch chunk texts.
+
+        Args:
+            chunk_ids: Chunk IDs in 'document_id#chunk_N' form
+
+        Returns:
+            Dict mapping chunk ID to text (missing IDs are omitted)
+        """
+        texts = {}
+        for chunk_id in set(chunk_ids):
+            parsed = parse_chunk_id(chunk_id)
+            if parsed is None:
+                continue
+            text = self.get_span(*parsed)
+            if text is not None:
+                texts[chunk_id] = text
+        return texts
+
+    def get_documents(self, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch document-level metadata.
+
+        Args:
+            document_ids: Document identifiers
+
+        Returns:
+            Dict mapping document ID to its metadata
+        """
+        return {
+            doc_id: self._documents[doc_id]
+            for doc_id in set(document_ids) if doc_id in self._documents
+        }
+
+    def hydrate(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Restore full metadata on search results in a single batch.
+
+        Args:
+            results: Search results with slim 'metadata'
+
+        Returns:
+            The same results with full 'chunk_text' and document metadata filled in
+        """
+        texts = self.get_texts([r['id'] for r in results])
+        documents = self.get_documents([
+            r.get('metadata', {}).get('document_id', '') for r in results
+        ])
+
+        for result in results:
+            metadata = result.get('metadata')
+            if metadata is None:
+                continue
+
+            hydrated = dict(documents.get(metadata.get('document_id', ''), {}))
+            hydrated.update(metadata)
+            if result['id'] in texts:
+                hydrated['chunk_text'] = texts[result['id']]
+            result['metadata'] = hydrated
+
+        return results
+
+    def delete_document(self, document_id: str) -> bool:
+        """
+        Forget a document's text and metadata.
+
+        Args:
+            document_id: Document identifier
+
+        Returns:
+            True if anything was removed
+        """
+        self._forget(document_id)
+
+        path = self._text_path(document_id)
+        existed = path.exists()
+        if existed:
+            path.unlink()
+
+        if self._documents.pop(document_id, None) is not None:
+            existed = True
+            self._write_json(self.documents_path, self._documents)
+
+        return existed
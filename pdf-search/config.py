@@ -39,24 +39,79 @@ class Config:
     PINECONE_ENVIRONMENT: str = os.getenv('PINECONE_ENVIRONMENT', 'us-east-1')
     PINECONE_INDEX_NAME: str = os.getenv('PINECONE_INDEX_NAME', 'sociology-pdfs')
     PINECONE_NAMESPACE: str = os.getenv('PINECONE_NAMESPACE', 'default')
+    SHARD_BY: str = os.getenv('SHARD_BY', '')  # '', 'course' or 'learning_unit'
 
     # Embedding Settings
     EMBEDDING_MODEL: str = os.getenv('EMBEDDING_MODEL', 'llama-text-embed-v2')
     EMBEDDING_DIMENSION: int = int(os.getenv('EMBEDDING_DIMENSION', '1024'))
+    EMBEDDING_CACHE: str = os.getenv('EMBEDDING_CACHE', 'off')  # off, int8 or float32
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+    EMBEDDING_MAX_TOKENS_PER_BATCH: int = int(os.getenv('EMBEDDING_MAX_TOKENS_PER_BATCH', '16384'))
+    EMBEDDING_PROCESSES: int = int(os.getenv('EMBEDDING_PROCESSES', '0'))  # 0 = in-process
+    EMBEDDING_BACKEND: str = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch or onnx
+    ONNX_QUANTIZE: bool = os.getenv('ONNX_QUANTIZE', 'false').lower() in ('1', 'true', 'yes')
+    ONNX_THREADS: int = int(os.getenv('ONNX_THREADS', '0'))  # 0 = runtime default
 
     # PDF Processing
     CHUNK_SIZE: int = int(os.getenv('CHUNK_SIZE', '1000'))
     CHUNK_OVERLAP: int = int(os.getenv('CHUNK_OVERLAP', '200'))
     MAX_CHUNKS_PER_PDF: int = int(os.getenv('MAX_CHUNKS_PER_PDF', '1000'))
+    PDF_EXTRACTOR: str = os.getenv('PDF_EXTRACTOR', 'auto')  # auto, pypdfium2, pdfminer, pdfplumber, pypdf2
+    EXTRACTION_CACHE: bool = os.getenv('EXTRACTION_CACHE', 'true').lower() in ('1', 'true', 'yes')
+    STRIP_BOILERPLATE: bool = os.getenv('STRIP_BOILERPLATE', 'true').lower() in ('1', 'true', 'yes')
+    DEDUP: str = os.getenv('DEDUP', 'off')  # off, skip or alias (near-duplicate chunks)
+
+    # Upsert Settings
+    UPSERT_MAX_BYTES: int = int(os.getenv('UPSERT_MAX_BYTES', str(1800 * 1024)))  # Pinecone limit: 2 MB
+    UPSERT_MAX_BATCH: int = int(os.getenv('UPSERT_MAX_BATCH', '1000'))  # Pinecone limit: 1000 vectors
+    UPSERT_MAX_RETRIES: int = int(os.getenv('UPSERT_MAX_RETRIES', '5'))
+    UPSERT_BACKOFF_BASE: float = float(os.getenv('UPSERT_BACKOFF_BASE', '0.5'))  # seconds
+    UPSERT_BACKOFF_MAX: float = float(os.getenv('UPSERT_BACKOFF_MAX', '30'))  # seconds
 
     # Search Settings
     DEFAULT_TOP_K: int = int(os.getenv('DEFAULT_TOP_K', '5'))
     SIMILARITY_THRESHOLD: float = float(os.getenv('SIMILARITY_THRESHOLD', '0.7'))
+    SUMMARY_VECTORS: bool = os.getenv('SUMMARY_VECTORS', 'true').lower() in ('1', 'true', 'yes')
+    HIERARCHICAL_SEARCH: bool = os.getenv('HIERARCHICAL_SEARCH', 'false').lower() in ('1', 'true', 'yes')
+    HIERARCHICAL_SECTIONS: int = int(os.getenv('HIERARCHICAL_SECTIONS', '4'))
+    RERANK: bool = os.getenv('RERANK', 'false').lower() in ('1', 'true', 'yes')
+    RERANK_MODEL: str = os.getenv('RERANK_MODEL', 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1')
+    RERANK_CANDIDATES: int = int(os.getenv('RERANK_CANDIDATES', '20'))  # ANN pool per query
+    RERANK_BATCH_SIZE: int = int(os.getenv('RERANK_BATCH_SIZE', '16'))
+    RERANK_BUDGET_MS: int = int(os.getenv('RERANK_BUDGET_MS', '0'))  # 0 = no limit
+
+    # Vector Metadata
+    # When enabled, only ids and filter fields are sent to Pinecone; chunk text
+    # and document-level metadata live in the local chunk store.
+    SLIM_METADATA: bool = os.getenv('SLIM_METADATA', 'true').lower() in ('1', 'true', 'yes')
+    VECTOR_METADATA_FIELDS: tuple = (
+        'document_id',
+        'chunk_number',
+        'total_chunks',
+        'page_number',
+        'page_start',
+        'page_end',
+        'page_range',
+        'pdf_page_number',
+        'pdf_page_start',
+        'pdf_page_end',
+        'pdf_page_range',
+        'learning_unit',
+        'course',
+        'material_type',
+        'document_type',
+    )
 
     # Paths
     BASE_DIR: Path = Path(__file__).parent.parent
     MATERIALS_DIR: Path = BASE_DIR / 'materials'
     MANIFEST_PATH: Path = MATERIALS_DIR / 'manifest.json'
+    CACHE_DIR: Path = Path(os.getenv('PDF_SEARCH_CACHE_DIR', str(Path(__file__).parent / '.cache')))
+    CHUNK_STORE_DIR: Path = CACHE_DIR / 'chunk_store'
+
+    # Instrumentation
+    METRICS_LOG: str = os.getenv('METRICS_LOG', '')  # JSON-lines stage events, '' = off
+    METRICS_PROM_FILE: str = os.getenv('METRICS_PROM_FILE', '')  # Prometheus text file, '' = off
 
     @classmethod
     def validate(cls) -> tuple[bool, Optional[str]]:
@@ -72,6 +127,15 @@ class Config:
         if not cls.PINECONE_INDEX_NAME:
             return False, "PINECONE_INDEX_NAME is not set"
 
+        if cls.SHARD_BY not in ('', 'course', 'learning_unit'):
+            return False, "SHARD_BY must be empty, 'course' or 'learning_unit'"
+
+        if cls.PDF_EXTRACTOR not in ('auto', 'pypdfium2', 'pdfminer', 'pdfplumber', 'pypdf2'):
+            return False, "PDF_EXTRACTOR must be auto, pypdfium2, pdfminer, pdfplumber or pypdf2"
+
+        if cls.DEDUP not in ('off', 'skip', 'alias'):
+            return False, "DEDUP must be off, skip or alias"
+
         if cls.CHUNK_SIZE < 100:
             return False, "CHUNK_SIZE must be at least 100"
 
@@ -99,16 +163,24 @@ class Config:
         print(f"Pinecone Environment: {cls.PINECONE_ENVIRONMENT}")
         print(f"Index Name: {cls.PINECONE_INDEX_NAME}")
         print(f"Namespace: {cls.PINECONE_NAMESPACE}")
+        print(f"Shard By: {cls.SHARD_BY or 'off'}")
         print()
         print(f"Embedding Model: {cls.EMBEDDING_MODEL}")
         print(f"Embedding Dimension: {cls.EMBEDDING_DIMENSION}")
+        print(f"Embedding Backend: {cls.EMBEDDING_BACKEND}"
+              f"{' (int8)' if cls.EMBEDDING_BACKEND == 'onnx' and cls.ONNX_QUANTIZE else ''}")
         print()
         print(f"Chunk Size: {cls.CHUNK_SIZE} chars")
         print(f"Chunk Overlap: {cls.CHUNK_OVERLAP} chars")
+        print(f"PDF Extractor: {cls.PDF_EXTRACTOR}")
+        print(f"Near-Duplicate Chunks: {cls.DEDUP}")
         print(f"Default Top-K: {cls.DEFAULT_TOP_K}")
         print(f"Similarity Threshold: {cls.SIMILARITY_THRESHOLD}")
+        print(f"Re-ranking: {cls.RERANK_MODEL if cls.RERANK else 'off'}")
+        print(f"Slim Metadata: {cls.SLIM_METADATA}")
         print()
         print(f"Manifest Path: {cls.MANIFEST_PATH}")
+        print(f"Chunk Store: {cls.CHUNK_STORE_DIR}")
         print("=" * 35)
 
 
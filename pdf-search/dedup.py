@@ -0,0 +1,328 @@
+"""
+Near-duplicate chunk detection with MinHash signatures and LSH banding.
+Keeps a persisted signature index of indexed chunks across runs.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from config import Config
+from chunk_store import parse_chunk_id
+
+NUM_PERM = 128
+
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard become candidates
+BANDS = 16
+
+SHINGLE_WORDS = 5
+
+# Estimated Jaccard similarity of word shingles for a duplicate
+THRESHOLD = 0.85
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Fixed seed: signatures must stay comparable across runs
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> List[str]:
+    """Word n-grams of lowercased text (empty for texts shorter than size words)."""
+    words = re.findall(r'\w+', text.lower())
+    return list({' '.join(words[i:i + size]) for i in range(len(words) - size + 1)})
+
+
+def _document_of(chunk_id: str) -> Optional[str]:
+    parsed = parse_chunk_id(chunk_id)
+    return parsed[0] if parsed is not None else None
+
+
+class DuplicateIndex:
+    """
+    MinHash LSH index of chunk signatures.
+
+    Signatures are NUM_PERM 32-bit minimum hashes of a chunk's word
+    shingles; the fraction of equal positions estimates the Jaccard
+    similarity of two chunks. LSH buckets per band find candidates without
+    comparing against every indexed chunk.
+
+    Files under root:
+        <name>.npz            'signatures' (uint32 matrix), 'ids' and 'scopes'
+        <name>.aliases.json   {duplicate chunk ID: original chunk ID}
+    """
+
+    def __init__(
+        self,
+        name: str = 'default',
+        root: Optional[Path] = None,
+        threshold: float = THRESHOLD,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS
+    ):
+        """
+        Initialize duplicate index.
+
+        Args:
+            name: Index file name (e.g. '<index>.<namespace>')
+            root: Directory for index files (defaults to Config.CACHE_DIR / 'dedup')
+            threshold: Minimum estimated Jaccard similarity for a duplicate
+            num_perm: Signature length
+            bands: LSH bands (num_perm must be divisible by bands)
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a, self._b = _permutations(num_perm)
+
+        self.root = Path(root or Config.CACHE_DIR / 'dedup')
+        self.root.mkdir(parents=True, exist_ok=True)
+        safe_name = re.sub(r'[^\w.-]', '_', name)
+        self.path = self.root / f"{safe_name}.npz"
+        self.aliases_path = self.root / f"{safe_name}.aliases.json"
+
+        self.ids: List[str] = []
+        self.scopes: List[str] = []
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._positions: Dict[str, int] = {}
+        self._pending: Dict[str, Tuple[np.ndarray, str]] = {}
+        self.aliases: Dict[str, str] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if self.path.exists():
+            with np.load(self.path) as data:
+                self.ids = [str(chunk_id) for chunk_id in data['ids']]
+                self.scopes = [str(scope) for scope in data['scopes']]
+                self._signatures = data['signatures']
+            self._rebuild()
+        if self.aliases_path.exists():
+            with open(self.aliases_path, 'r', encoding='utf-8') as f:
+                self.aliases = json.load(f)
+
+    def _rebuild(self) -> None:
+        self._buckets = [{} for _ in range(self.bands)]
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        for i, signature in enumerate(self._signatures):
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of a text.
+
+        Returns:
+            uint32 array of length num_perm, or None for texts too short to shingle
+        """
+        grams = shingles(text)
+        if not grams:
+            return None
+        hashes = np.array([zlib.crc32(gram.encode('utf-8')) for gram in grams], dtype=np.uint64)
+        permuted = (hashes[:, None] * self._a + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _best(
+        self,
+        signature: np.ndarray,
+        buckets: List[Dict[bytes, List[int]]],
+        signatures: np.ndarray,
+        exclude: frozenset = frozenset()
+    ) -> Tuple[int, float]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(buckets[band].get(key, ()))
+        candidates -= exclude
+        if not candidates:
+            return -1, 0.0
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (signatures[positions] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return int(positions[best]), float(similarity[best])
+
+    def _owned_positions(self, chunk_id: str, owned: Dict[str, frozenset]) -> frozenset:
+        # Positions of indexed chunks of chunk_id's document, cached per document
+        document_id = _document_of(chunk_id)
+        if document_id is None:
+            position = self._positions.get(chunk_id)
+            return frozenset() if position is None else frozenset((position,))
+        if document_id not in owned:
+            owned[document_id] = frozenset(
+                i for i, indexed_id in enumerate(self.ids) if _document_of(indexed_id) == document_id
+            )
+        return owned[document_id]
+
+    def match(self, ids: List[str], texts: List[str], scopes: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Find chunks that duplicate an indexed chunk or an earlier chunk of the batch.
+
+        A chunk never matches an indexed chunk of its own document (its own
+        earlier version, e.g. when re-indexing with another chunk size) and
+        only matches chunks of the same scope. Signatures of the
+        non-duplicates are kept for add().
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts (as embedded)
+            scopes: Scope per chunk, e.g. its shard namespace (default: one scope)
+
+        Returns:
+            {duplicate chunk ID: original chunk ID}
+        """
+        scopes = scopes or [''] * len(ids)
+        self._pending = {}
+        batch_ids: List[str] = []
+        batch_signatures: List[np.ndarray] = []
+        batch_buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        duplicates = {}
+        owned: Dict[str, frozenset] = {}
+
+        for chunk_id, text, scope in zip(ids, texts, scopes):
+            signature = self.signature(text)
+            if signature is None:
+                continue
+
+            best_id, best = None, 0.0
+            if self.ids:
+                exclude = self._owned_positions(chunk_id, owned)
+                position, similarity = self._best(signature, self._buckets, self._signatures, exclude)
+                if position >= 0 and self.scopes[position] == scope:
+                    best_id, best = self.ids[position], similarity
+            if batch_ids:
+                position, similarity = self._best(signature, batch_buckets, np.stack(batch_signatures))
+                if position >= 0 and similarity > best and self._pending[batch_ids[position]][1] == scope:
+                    best_id, best = batch_ids[position], similarity
+
+            if best_id is not None and best >= self.threshold:
+                duplicates[chunk_id] = self.aliases.get(best_id, best_id)
+                continue
+
+            for band, key in enumerate(self._band_keys(signature)):
+                batch_buckets[band].setdefault(key, []).append(len(batch_ids))
+            batch_ids.append(chunk_id)
+            batch_signatures.append(signature)
+            self._pending[chunk_id] = (signature, scope)
+
+        return duplicates
+
+    def add(self, ids: List[str]) -> int:
+        """
+        Register signatures computed by the last match() call.
+
+        Call this for the chunks that were actually indexed; IDs without a
+        pending signature are ignored.
+
+        Args:
+            ids: Chunk IDs
+
+        Returns:
+            Number of signatures added or replaced
+        """
+        added = 0
+        new_ids, new_scopes, new_signatures = [], [], []
+        for chunk_id in ids:
+            if chunk_id not in self._pending:
+                continue
+            signature, scope = self._pending.pop(chunk_id)
+            position = self._positions.get(chunk_id)
+            if position is not None:
+                # Re-indexed chunk: replace in place, buckets are rebuilt below
+                self._signatures[position] = signature
+                self.scopes[position] = scope
+            else:
+                new_ids.append(chunk_id)
+                new_scopes.append(scope)
+                new_signatures.append(signature)
+            added += 1
+
+        replaced = added - len(new_ids)
+        if new_ids:
+            start = len(self.ids)
+            self.ids.extend(new_ids)
+            self.scopes.extend(new_scopes)
+            self._signatures = np.vstack([self._signatures, np.stack(new_signatures)])
+            if not replaced:
+                for offset, signature in enumerate(new_signatures):
+                    self._positions[new_ids[offset]] = start + offset
+                    for band, key in enumerate(self._band_keys(signature)):
+                        self._buckets[band].setdefault(key, []).append(start + offset)
+        if replaced:
+            self._rebuild()
+        return added
+
+    def add_aliases(self, duplicates: Dict[str, str]) -> None:
+        """Record duplicate chunk IDs for their original chunks."""
+        self.aliases.update(duplicates)
+
+    def aliases_of(self, chunk_id: str) -> List[str]:
+        """Duplicate chunk IDs recorded for an original chunk."""
+        return sorted(dup for dup, original in self.aliases.items() if original == chunk_id)
+
+    def remove_document(self, document_id: str) -> List[str]:
+        """
+        Drop a document's signatures and aliases.
+
+        Args:
+            document_id: Document whose chunks were deleted
+
+        Returns:
+            Duplicate chunk IDs of other documents that pointed at the
+            document's chunks (their text is no longer indexed anywhere)
+        """
+        def owned(chunk_id: str) -> bool:
+            return _document_of(chunk_id) == document_id
+
+        keep = [i for i, chunk_id in enumerate(self.ids) if not owned(chunk_id)]
+        if len(keep) < len(self.ids):
+            self.ids = [self.ids[i] for i in keep]
+            self.scopes = [self.scopes[i] for i in keep]
+            self._signatures = self._signatures[keep]
+            self._rebuild()
+
+        orphaned = sorted(dup for dup, original in self.aliases.items() if owned(original) and not owned(dup))
+        self.aliases = {
+            dup: original for dup, original in self.aliases.items()
+            if not owned(dup) and not owned(original)
+        }
+        return orphaned
+
+    def save(self) -> None:
+        """Write signatures and aliases (atomically)."""
+        tmp_path = self.path.with_name(self.path.stem + '.tmp.npz')
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            scopes=np.array(self.scopes, dtype=str),
+            signatures=self._signatures
+        )
+        tmp_path.replace(self.path)
+
+        tmp_path = self.aliases_path.with_name(self.aliases_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.aliases, f, indent=1)
+        tmp_path.replace(self.aliases_path)
+
+    def clear(self) -> None:
+        """Delete all signatures and aliases."""
+        self.ids, self.scopes, self.aliases, self._pending = [], [], {}, {}
+        self._signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._rebuild()
+        self.path.unlink(missing_ok=True)
+        self.aliases_path.unlink(missing_ok=True)
@@ -0,0 +1,141 @@
+"""
+Post-retrieval diversification of search results.
+Removes near-duplicate passages caused by overlapping chunks.
+"""
+
+from typing import List, Dict, Any, Sequence
+import numpy as np
+
+
+# Candidates to fetch per requested result for each strategy. A kept hit
+# collapses at most its two direct neighbours, so 3x always leaves k
+# distinct passages when the index has them.
+FETCH_FACTORS = {
+    'collapse': 3,
+    'mmr': 2,
+}
+
+
+def candidate_count(strategy: str, top_k: int) -> int:
+    """
+    Number of candidates to request from the index.
+
+    Args:
+        strategy: Diversification strategy ('collapse' or 'mmr')
+        top_k: Number of results wanted
+
+    Returns:
+        Candidate pool size
+    """
+    if strategy not in FETCH_FACTORS:
+        raise ValueError(f"Unknown diversification strategy: {strategy}")
+    return top_k * FETCH_FACTORS[strategy]
+
+
+def collapse_adjacent(
+    results: List[Dict[str, Any]],
+    top_k: int,
+    distance: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Collapse hits on neighbouring chunks of the same document.
+
+    Chunks within `distance` chunk numbers of a better-ranked hit share
+    overlapping text, so they are folded into that hit and listed under
+    'collapsed_ids'. Page ranges of the kept hit are widened to cover them.
+
+    Args:
+        results: Search results with metadata, best first
+        top_k: Number of results to return
+        distance: Maximum chunk_number distance treated as overlap
+
+    Returns:
+        Up to top_k distinct results
+    """
+    kept = []
+    kept_chunks: Dict[str, List[Dict[str, Any]]] = {}
+
+    for result in results:
+        metadata = result.get('metadata', {})
+        document_id = metadata.get('document_id')
+        chunk_number = metadata.get('chunk_number')
+
+        if document_id is not None and chunk_number is not None:
+            owner = next(
+                (
+                    k for k in kept_chunks.get(document_id, [])
+                    if abs(int(k['metadata']['chunk_number']) - int(chunk_number)) <= distance
+                ),
+                None
+            )
+            if owner is not None:
+                owner.setdefault('collapsed_ids', []).append(result['id'])
+                _widen_pages(owner['metadata'], metadata)
+                continue
+
+        if len(kept) >= top_k:
+            continue
+
+        kept.append(result)
+        if document_id is not None and chunk_number is not None:
+            kept_chunks.setdefault(document_id, []).append(result)
+
+    return kept
+
+
+def _widen_pages(target: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Extend target's page range fields to include other's pages."""
+    for prefix in ('page', 'pdf_page'):
+        start_key, end_key = f'{prefix}_start', f'{prefix}_end'
+        if start_key not in target or start_key not in other:
+            continue
+
+        start = min(target[start_key], other[start_key])
+        end = max(target[end_key], other[end_key])
+        target[start_key] = start
+        target[end_key] = end
+        target[f'{prefix}_range'] = str(start) if start == end else f"{start}-{end}"
+
+
+def mmr(
+    query_vector: Sequence[float],
+    results: List[Dict[str, Any]],
+    top_k: int,
+    lambda_mult: float = 0.5
+) -> List[Dict[str, Any]]:
+    """
+    Maximal Marginal Relevance selection over returned vectors.
+
+    Args:
+        query_vector: Query embedding
+        results: Search results carrying 'values', best first
+        top_k: Number of results to return
+        lambda_mult: Trade-off between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Up to top_k results in selection order
+    """
+    candidates = [r for r in results if r.get('values') is not None]
+    if not candidates:
+        return results[:top_k]
+
+    vectors = np.asarray([r['values'] for r in candidates], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(query_vector, dtype=np.float32)
+    # Not in place: query_vector may be the caller's float32 array
+    query = query / (np.linalg.norm(query) + 1e-12)
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+
+    while len(selected) < min(top_k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, similarity[best])
+
+    return [candidates[i] for i in selected]
@@ -0,0 +1,136 @@
+"""
+On-disk embedding cache keyed by model and text hash.
+Stores int8-quantized vectors to keep the cache 4x smaller than float32.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+from config import Config
+from local_index import quantize_int8, dequantize_int8
+
+
+class EmbeddingCache:
+    """
+    Cache of text embeddings stored as NumPy arrays.
+
+    Entries are kept per model in <root>/<model>.npz with three arrays:
+    'keys' (20-byte SHA-1 digests), 'codes' and 'scales'. With
+    quantization='int8' the codes are int8 with one float32 scale per
+    vector; with 'float32' the vectors are stored as is.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        root: Optional[Path] = None,
+        quantization: str = 'int8'
+    ):
+        """
+        Initialize embedding cache.
+
+        Args:
+            model_name: Embedding model name (part of the cache key)
+            root: Cache directory (defaults to Config.CACHE_DIR / 'embeddings')
+            quantization: 'int8' or 'float32'
+        """
+        if quantization not in ('int8', 'float32'):
+            raise ValueError(f"Unsupported cache quantization: {quantization}")
+
+        self.model_name = model_name
+        self.quantization = quantization
+        self.root = Path(root or Config.CACHE_DIR / 'embeddings')
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        safe_name = re.sub(r'[^\w.-]', '_', model_name)
+        self.path = self.root / f"{safe_name}.{quantization}.npz"
+
+        self._keys: dict = {}
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._load()
+
+    def _load(self) -> None:
+        """Load cached arrays from disk."""
+        if not self.path.exists():
+            return
+        with np.load(self.path) as data:
+            keys = data['keys']
+            self._codes = data['codes']
+            self._scales = data['scales']
+        self._keys = {bytes(key): i for i, key in enumerate(keys)}
+
+    def _digest(self, text: str) -> bytes:
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the cached vectors."""
+        codes = self._codes.nbytes if self._codes is not None else 0
+        return codes + self._scales.nbytes
+
+    def lookup(self, texts: List[str]) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Look up embeddings for texts.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Tuple of (float32 array with cached rows filled, indices of misses).
+            The array is None if the cache is empty.
+        """
+        if self._codes is None:
+            return None, list(range(len(texts)))
+
+        positions = [self._keys.get(self._digest(text), -1) for text in texts]
+        hits = np.array([i for i, p in enumerate(positions) if p >= 0], dtype=np.int64)
+        misses = [i for i, p in enumerate(positions) if p < 0]
+
+        embeddings = np.zeros((len(texts), self._codes.shape[1]), dtype=np.float32)
+        if len(hits):
+            rows = np.array([positions[i] for i in hits], dtype=np.int64)
+            if self.quantization == 'int8':
+                embeddings[hits] = dequantize_int8(self._codes[rows], self._scales[rows])
+            else:
+                embeddings[hits] = self._codes[rows]
+
+        return embeddings, misses
+
+    def store(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """
+        Add embeddings to the cache and persist it.
+
+        Args:
+            texts: Texts that were embedded
+            embeddings: float32 array of shape (len(texts), dimension)
+        """
+        new = {}
+        for i, text in enumerate(texts):
+            digest = self._digest(text)
+            if digest not in self._keys and digest not in new:
+                new[digest] = i
+        if not new:
+            return
+        new = list(new.items())
+
+        rows = np.asarray(embeddings, dtype=np.float32)[[i for _, i in new]]
+        if self.quantization == 'int8':
+            codes, scales = quantize_int8(rows)
+        else:
+            codes, scales = rows, np.zeros(0, dtype=np.float32)
+
+        start = len(self._keys)
+        self._codes = codes if self._codes is None else np.concatenate([self._codes, codes])
+        self._scales = np.concatenate([self._scales, scales])
+        for offset, (digest, _) in enumerate(new):
+            self._keys[digest] = start + offset
+
+        keys = np.frombuffer(b''.join(self._keys), dtype=np.uint8).reshape(-1, 20)
+        tmp_path = self.path.with_name(self.path.name + '.tmp.npz')
+        np.savez(tmp_path, keys=keys, codes=self._codes, scales=self._scales)
+        tmp_path.replace(self.path)
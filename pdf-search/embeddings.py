@@ -0,0 +1,420 @@
+"""
+Embedding engine: length-bucketed batching and optional multi-process encode.
+Wraps a SentenceTransformer model or the ONNX Runtime backend.
+"""
+
+import inspect
+import json
+import re
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import numpy as np
+from config import Config
+from instrumentation import observe
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+class OnnxEmbeddingModel:
+    """
+    SentenceTransformer-compatible encoder running under ONNX Runtime.
+
+    The transformer of the configured model is exported to ONNX once
+    (optionally with dynamic int8 weight quantization) and cached on disk
+    together with its tokenizer and pooling settings. encode() mirrors the
+    SentenceTransformer signature used by EmbeddingEngine.
+    """
+
+    SETTINGS_FILE = 'embedding.json'
+
+    def __init__(
+        self,
+        model_name: str = Config.EMBEDDING_MODEL,
+        quantize: bool = Config.ONNX_QUANTIZE,
+        cache_dir: Optional[Path] = None,
+        threads: int = Config.ONNX_THREADS
+    ):
+        """
+        Initialize ONNX embedding model, exporting it if not cached.
+
+        Args:
+            model_name: SentenceTransformer model name
+            quantize: Use dynamic int8 weight quantization
+            cache_dir: Export directory (defaults to Config.CACHE_DIR / 'onnx')
+            threads: Intra-op threads for ONNX Runtime (0 = runtime default)
+        """
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is not installed. Run: pip install onnxruntime")
+
+        from transformers import AutoTokenizer
+
+        safe_name = re.sub(r'[^\w.-]', '_', model_name)
+        root = Path(cache_dir or Config.CACHE_DIR / 'onnx') / safe_name
+        model_path = root / ('model.int8.onnx' if quantize else 'model.onnx')
+        if not model_path.exists():
+            export_onnx(model_name, root, quantize=quantize)
+
+        with open(root / self.SETTINGS_FILE, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(root))
+        self.max_seq_length = settings['max_seq_length']
+        self.pooling = settings['pooling']
+        self.normalize = settings['normalize']
+        self.dimension = settings['dimension']
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True
+    ) -> np.ndarray:
+        """
+        Embed texts.
+
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per inference call
+            show_progress_bar: Accepted for compatibility; ignored
+            convert_to_numpy: Accepted for compatibility; always NumPy
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        output = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            feed = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+
+            if self.pooling == 'cls':
+                pooled = hidden[:, 0]
+            else:
+                mask = encoded['attention_mask'][:, :, None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+            if self.normalize:
+                pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+            output[start:start + len(pooled)] = pooled
+
+        return output
+
+
+def export_onnx(model_name: str, output_dir: Path, quantize: bool = False) -> Path:
+    """
+    Export a SentenceTransformer's transformer to ONNX.
+
+    Writes model.onnx (and model.int8.onnx when quantize is set), the
+    tokenizer files and embedding.json with pooling settings.
+
+    Args:
+        model_name: SentenceTransformer model name
+        output_dir: Directory for the exported files
+        quantize: Also write a dynamically int8-quantized model
+
+    Returns:
+        Path of the model to load
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_path = output_dir / 'model.onnx'
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0]
+    pooling = 'mean'
+    normalize = False
+    for module in st_model:
+        name = type(module).__name__
+        if name == 'Pooling' and getattr(module, 'pooling_mode_cls_token', False):
+            pooling = 'cls'
+        if name == 'Normalize':
+            normalize = True
+
+    if not model_path.exists():
+        tokenizer = transformer.tokenizer
+        sample = tokenizer(['export sample', 'a longer export sample text'], padding=True, return_tensors='pt')
+        input_names = [k for k in ('input_ids', 'attention_mask', 'token_type_ids') if k in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+        class _Wrapper(torch.nn.Module):
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        # Use the TorchScript exporter, which understands dynamic_axes
+        export_options = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            export_options['dynamo'] = False
+
+        torch.onnx.export(
+            _Wrapper(transformer.auto_model).eval(),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            **export_options
+        )
+        tokenizer.save_pretrained(str(output_dir))
+
+    with open(output_dir / OnnxEmbeddingModel.SETTINGS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'max_seq_length': st_model.max_seq_length,
+            'pooling': pooling,
+            'normalize': normalize,
+            'dimension': st_model.get_sentence_embedding_dimension()
+        }, f, indent=2)
+
+    if not quantize:
+        return model_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = output_dir / 'model.int8.onnx'
+    quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def load_embedding_model(
+    model_name: str = Config.EMBEDDING_MODEL,
+    backend: str = Config.EMBEDDING_BACKEND
+):
+    """
+    Load an embedding model for the configured backend.
+
+    Args:
+        model_name: SentenceTransformer model name
+        backend: 'torch' (SentenceTransformer) or 'onnx' (ONNX Runtime)
+
+    Returns:
+        Model object with a SentenceTransformer-compatible encode()
+    """
+    if backend == 'onnx':
+        return OnnxEmbeddingModel(model_name)
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def parity_check(
+    reference,
+    candidate,
+    texts: List[str]
+) -> Dict[str, float]:
+    """
+    Compare two embedding models by cosine similarity of their outputs.
+
+    Args:
+        reference: Reference model (e.g. PyTorch SentenceTransformer)
+        candidate: Model under test (e.g. OnnxEmbeddingModel)
+        texts: Texts to embed with both
+
+    Returns:
+        Dict with min and mean cosine similarity
+    """
+    a = np.asarray(reference.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    b = np.asarray(candidate.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    a /= np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b /= np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cosine = np.sum(a * b, axis=1)
+    return {'min_cosine': float(cosine.min()), 'mean_cosine': float(cosine.mean())}
+
+
+class EmbeddingEngine:
+    """
+    Encodes texts in batches of similar token length.
+
+    Texts are sorted by token count and cut into batches under a token
+    budget (batch_size x longest text), so short chunks travel in large
+    batches and long ones in small batches, with little padding. Results
+    are written back in the caller's order.
+    """
+
+    def __init__(
+        self,
+        model,
+        batch_size: int = Config.EMBEDDING_BATCH_SIZE,
+        max_tokens_per_batch: int = Config.EMBEDDING_MAX_TOKENS_PER_BATCH,
+        processes: int = Config.EMBEDDING_PROCESSES
+    ):
+        """
+        Initialize embedding engine.
+
+        Args:
+            model: SentenceTransformer (or any object with encode())
+            batch_size: Maximum texts per batch
+            max_tokens_per_batch: Padded token budget per batch
+            processes: Worker processes for encode_multi_process (0 = in-process)
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.processes = processes
+        self._pool = None
+        self.last_stats: Dict[str, Any] = {}
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        """
+        Token count of each text (capped at the model's max sequence length).
+
+        Falls back to a characters / 4 estimate if the model has no tokenizer.
+        """
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        max_length = getattr(self.model, 'max_seq_length', None) or 512
+
+        if tokenizer is None:
+            lengths = [len(text) // 4 + 2 for text in texts]
+        else:
+            encoded = tokenizer(
+                texts,
+                add_special_tokens=True,
+                truncation=True,
+                max_length=max_length
+            )
+            lengths = [len(ids) for ids in encoded['input_ids']]
+
+        return np.minimum(np.asarray(lengths, dtype=np.int64), max_length)
+
+    def make_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group text indices into length-sorted batches under the token budget.
+
+        Args:
+            lengths: Token count per text
+
+        Returns:
+            List of index arrays, one per batch
+        """
+        order = np.argsort(lengths, kind='stable')
+        batches = []
+        current = []
+
+        for i in order:
+            # Sorted ascending, so this text is the longest in the batch
+            padded = int(lengths[i]) * (len(current) + 1)
+            if current and (len(current) >= self.batch_size or padded > self.max_tokens_per_batch):
+                batches.append(np.asarray(current))
+                current = []
+            current.append(i)
+
+        if current:
+            batches.append(np.asarray(current))
+
+        return batches
+
+    def _start_pool(self):
+        """Start the sentence-transformers worker pool once."""
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(
+                target_devices=['cpu'] * self.processes
+            )
+        return self._pool
+
+    def close(self) -> None:
+        """Stop worker processes, if any."""
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def encode(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
+        """
+        Embed texts, preserving input order.
+
+        Args:
+            texts: Texts to embed
+            show_progress: Show progress bar
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        start = time.perf_counter()
+        lengths = self.token_lengths(texts)
+
+        multi_process = hasattr(self.model, 'encode_multi_process')
+        if self.processes > 1 and multi_process and len(texts) > self.batch_size:
+            order = np.argsort(lengths, kind='stable')
+            encoded = self.model.encode_multi_process(
+                [texts[i] for i in order],
+                self._start_pool(),
+                batch_size=self.batch_size
+            )
+            embeddings = np.empty_like(encoded, dtype=np.float32)
+            embeddings[order] = encoded
+            batch_count = -(-len(texts) // self.batch_size)
+            padded_tokens = None
+        else:
+            batches = self.make_batches(lengths)
+            iterator = batches
+            if show_progress:
+                try:
+                    from tqdm import tqdm
+                    iterator = tqdm(batches, desc="Embedding batches")
+                except ImportError:
+                    pass
+
+            embeddings = None
+            for batch in iterator:
+                batch_start = time.perf_counter()
+                encoded = self.model.encode(
+                    [texts[i] for i in batch],
+                    batch_size=len(batch),
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
+                observe('embed_batch_seconds', time.perf_counter() - batch_start)
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+                embeddings[batch] = encoded
+
+            if embeddings is None:
+                dimension = self.model.get_sentence_embedding_dimension() or Config.EMBEDDING_DIMENSION
+                embeddings = np.empty((0, dimension), dtype=np.float32)
+
+            batch_count = len(batches)
+            padded_tokens = int(sum(len(b) * lengths[b].max() for b in batches))
+
+        elapsed = time.perf_counter() - start
+        self.last_stats = {
+            'chunks': len(texts),
+            'batches': batch_count,
+            'seconds': elapsed,
+            'chunks_per_second': len(texts) / elapsed if elapsed > 0 else 0.0,
+            'tokens': int(lengths.sum()),
+            'padded_tokens': padded_tokens,
+            'processes': max(self.processes, 1)
+        }
+
+        return embeddings
@@ -0,0 +1,158 @@
+"""
+On-disk cache of extracted PDF pages keyed by content hash and extractor configuration.
+Lets re-chunking runs skip the download and the text extraction.
+"""
+
+import hashlib
+import json
+import zlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from config import Config
+
+
+def content_hash(pdf_content: bytes) -> str:
+    """SHA-256 hex digest of a PDF's bytes."""
+    return hashlib.sha256(pdf_content).hexdigest()
+
+
+def config_key(extractor_config: Dict[str, Any]) -> str:
+    """Short stable hash of an extractor configuration (see extractors.extractor_config)."""
+    data = json.dumps(extractor_config, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+class ExtractionCache:
+    """
+    Cache of per-page extraction results.
+
+    Layout under root:
+        <sha256>.<config_key>.json.z    zlib-compressed JSON with the page
+                                        records [[pdf_page, label, text], ...]
+        sources.json                    {source URL or Drive ID:
+                                         {'sha256', 'validator'}}
+
+    An entry is only reused for the same PDF bytes and the same extractor
+    configuration (method, installed backend versions, quality gate), so
+    upgrading a backend or changing PDF_EXTRACTOR re-extracts.
+    """
+
+    SOURCES_FILE = 'sources.json'
+
+    def __init__(self, root: Optional[Path] = None, level: int = 6):
+        """
+        Initialize extraction cache.
+
+        Args:
+            root: Cache directory (defaults to Config.CACHE_DIR / 'extractions')
+            level: zlib compression level
+        """
+        self.root = Path(root or Config.CACHE_DIR / 'extractions')
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.sources_path = self.root / self.SOURCES_FILE
+        self._sources: Dict[str, Dict[str, Optional[str]]] = {}
+        if self.sources_path.exists():
+            with open(self.sources_path, 'r', encoding='utf-8') as f:
+                self._sources = {
+                    source: entry for source, entry in json.load(f).items()
+                    # Entries without a validator (plain hashes) are never reused
+                    if isinstance(entry, dict)
+                }
+
+    def _path(self, digest: str, key: str) -> Path:
+        return self.root / f"{digest}.{key}.json.z"
+
+    def source_hash(self, source: str, validator: Optional[str]) -> Optional[str]:
+        """
+        Content hash last downloaded from a source, if it is still current.
+
+        Args:
+            source: Source identifier
+            validator: Current validator of the source (see remember_source)
+
+        Returns:
+            The hash, or None if the source is unknown, has no validator or
+            its validator changed
+        """
+        entry = self._sources.get(source)
+        if entry is None or validator is None or entry.get('validator') != validator:
+            return None
+        return entry['sha256']
+
+    def remember_source(self, source: str, digest: str, validator: Optional[str] = None) -> None:
+        """
+        Record the content hash downloaded from a source.
+
+        Args:
+            source: Source identifier
+            digest: Content hash of the download
+            validator: Cheap fingerprint of the source (e.g. ETag, Last-Modified
+                       and Content-Length); None means the source is
+                       downloaded again next time
+        """
+        entry = {'sha256': digest, 'validator': validator}
+        if self._sources.get(source) == entry:
+            return
+        self._sources[source] = entry
+        tmp_path = self.sources_path.with_name(self.sources_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._sources, f, indent=1)
+        tmp_path.replace(self.sources_path)
+
+    def get(self, digest: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load cached page records.
+
+        Args:
+            digest: PDF content hash
+            key: Extractor configuration key
+
+        Returns:
+            Page records ({'pdf_page', 'label', 'text'}) or None on a miss
+        """
+        path = self._path(digest, key)
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(zlib.decompress(path.read_bytes()).decode('utf-8'))
+        except (zlib.error, ValueError) as e:
+            print(f"Warning: Ignoring corrupt extraction cache entry {path.name}: {e}")
+            return None
+        return [
+            {'pdf_page': pdf_page, 'label': label, 'text': text}
+            for pdf_page, label, text in entry['pages']
+        ]
+
+    def put(self, digest: str, key: str, records: List[Dict[str, Any]]) -> None:
+        """
+        Store page records.
+
+        Args:
+            digest: PDF content hash
+            key: Extractor configuration key
+            records: Page records ({'pdf_page', 'label', 'text'})
+        """
+        entry = {
+            'pages': [[record['pdf_page'], record['label'], record['text']] for record in records]
+        }
+        data = zlib.compress(json.dumps(entry, ensure_ascii=False).encode('utf-8'), self.level)
+        path = self._path(digest, key)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+
+    def clear(self) -> int:
+        """
+        Delete all cached extractions and the source map.
+
+        Returns:
+            Number of entries deleted
+        """
+        deleted = 0
+        for path in self.root.glob('*.json.z'):
+            path.unlink()
+            deleted += 1
+        self.sources_path.unlink(missing_ok=True)
+        self._sources = {}
+        return deleted
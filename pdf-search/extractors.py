@@ -0,0 +1,469 @@
+"""
+PDF text extraction backends.
+Registry of per-page extractors (pdfplumber, PyPDF2, pypdfium2, pdfminer)
+and auto-selection of the best one for a document from a sample of pages.
+"""
+
+import io
+import importlib.metadata
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    from pdfminer.high_level import extract_pages as pdfminer_extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    pdfminer_extract_pages = None
+
+# Order tried by auto mode and as fallbacks: fastest first
+PREFERENCE = ('pypdfium2', 'pdfminer', 'pypdf2', 'pdfplumber')
+
+# Backends within this much of the best sample quality count as equally good
+QUALITY_TOLERANCE = 0.05
+
+# Characters of ordinary prose besides letters and digits
+PROSE_PUNCTUATION = set('.,;:!?()[]-–—"\'„“”‚‘’«»/%&§*+=')
+
+# Bump when extraction output changes without a backend version change
+EXTRACTION_VERSION = 1
+
+# Page quality gate: pages failing it are re-extracted with the other backends
+MIN_PAGE_CHARACTERS = 20
+MIN_ALPHA_RATIO = 0.5
+MIN_ENTROPY = 3.0  # bits per character; German prose is around 4.2
+MAX_ENTROPY = 6.5
+
+
+class Extractor(ABC):
+    """
+    Text extractor backend.
+
+    extract_pages() returns one entry per requested page: the page text,
+    or None when that page could not be extracted.
+    """
+
+    name = ''
+    package = ''
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether the backend's package is installed."""
+
+    @abstractmethod
+    def page_count(self, pdf_content: bytes) -> int:
+        """Number of pages in a PDF."""
+
+    @abstractmethod
+    def extract_pages(
+        self,
+        pdf_content: bytes,
+        pages: Optional[List[int]] = None
+    ) -> List[Optional[str]]:
+        """
+        Extract text per page.
+
+        Args:
+            pdf_content: PDF file content as bytes
+            pages: 0-based page indices (None for all pages)
+
+        Returns:
+            Text of each requested page (None where extraction failed)
+        """
+
+    def require(self) -> None:
+        """Raise ImportError if the backend's package is missing."""
+        if not self.available():
+            raise ImportError(f"{self.package} is not installed. Run: pip install {self.package}")
+
+
+class PdfplumberExtractor(Extractor):
+    """pdfplumber: character-level layout analysis in pure Python (slow, careful)."""
+
+    name = 'pdfplumber'
+    package = 'pdfplumber'
+
+    def available(self) -> bool:
+        return pdfplumber is not None
+
+    def page_count(self, pdf_content: bytes) -> int:
+        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+            return len(pdf.pages)
+
+    def extract_pages(self, pdf_content, pages=None):
+        self.require()
+        texts = []
+        with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+            for index in pages if pages is not None else range(len(pdf.pages)):
+                try:
+                    texts.append(pdf.pages[index].extract_text() or '')
+                except Exception as e:
+                    print(f"Warning: Could not extract page {index + 1}: {e}")
+                    texts.append(None)
+        return texts
+
+
+class PyPDF2Extractor(Extractor):
+    """PyPDF2: content-stream text operators, no layout analysis."""
+
+    name = 'pypdf2'
+    package = 'PyPDF2'
+
+    def available(self) -> bool:
+        return PyPDF2 is not None
+
+    def page_count(self, pdf_content: bytes) -> int:
+        return len(PyPDF2.PdfReader(io.BytesIO(pdf_content)).pages)
+
+    def extract_pages(self, pdf_content, pages=None):
+        self.require()
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        texts = []
+        for index in pages if pages is not None else range(len(reader.pages)):
+            try:
+                texts.append(reader.pages[index].extract_text() or '')
+            except Exception as e:
+                print(f"Warning: Could not extract page {index + 1}: {e}")
+                texts.append(None)
+        return texts
+
+
+class PdfiumExtractor(Extractor):
+    """pypdfium2: PDFium's native text extraction (fast, good reading order)."""
+
+    name = 'pypdfium2'
+    package = 'pypdfium2'
+
+    def available(self) -> bool:
+        return pypdfium2 is not None
+
+    def page_count(self, pdf_content: bytes) -> int:
+        pdf = pypdfium2.PdfDocument(pdf_content)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def extract_pages(self, pdf_content, pages=None):
+        self.require()
+        pdf = pypdfium2.PdfDocument(pdf_content)
+        texts = []
+        try:
+            for index in pages if pages is not None else range(len(pdf)):
+                try:
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range()
+                    textpage.close()
+                    page.close()
+                    texts.append(text.replace('\r\n', '\n').replace('\r', '\n'))
+                except Exception as e:
+                    print(f"Warning: Could not extract page {index + 1}: {e}")
+                    texts.append(None)
+        finally:
+            pdf.close()
+        return texts
+
+
+class PdfminerExtractor(Extractor):
+    """
+    pdfminer.six layout analysis with tuned LAParams.
+
+    boxes_flow=None skips the costly reading-order sort of text boxes
+    (single-column textbooks do not need it) and vertical text detection
+    is off.
+    """
+
+    name = 'pdfminer'
+    package = 'pdfminer.six'
+
+    def __init__(self, laparams: Optional[Dict[str, Any]] = None):
+        self.laparams = laparams or {
+            'line_margin': 0.5,
+            'char_margin': 2.0,
+            'word_margin': 0.1,
+            'boxes_flow': None,
+            'detect_vertical': False,
+        }
+
+    def available(self) -> bool:
+        return pdfminer_extract_pages is not None
+
+    def page_count(self, pdf_content: bytes) -> int:
+        return sum(1 for _ in PDFPage.get_pages(io.BytesIO(pdf_content)))
+
+    def extract_pages(self, pdf_content, pages=None):
+        self.require()
+        # Count pages up front, so pages after a parse error come back as None
+        wanted = list(pages) if pages is not None else list(range(self.page_count(pdf_content)))
+        # Selected pages come back in document order
+        order = sorted(set(wanted))
+        found: Dict[int, str] = {}
+        try:
+            for position, layout in enumerate(pdfminer_extract_pages(
+                io.BytesIO(pdf_content),
+                page_numbers=set(wanted),
+                laparams=LAParams(**self.laparams)
+            )):
+                found[order[position]] = ''.join(
+                    element.get_text() for element in layout if isinstance(element, LTTextContainer)
+                )
+        except Exception as e:
+            print(f"Warning: pdfminer stopped after {len(found)} pages: {e}")
+
+        return [found.get(index) for index in wanted]
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(extractor: Extractor) -> None:
+    """Add or replace an extractor backend under its name."""
+    EXTRACTORS[extractor.name] = extractor
+
+
+for _extractor in (PdfplumberExtractor(), PyPDF2Extractor(), PdfiumExtractor(), PdfminerExtractor()):
+    register_extractor(_extractor)
+
+
+def get_extractor(name: str) -> Extractor:
+    """Extractor by name (ValueError for unknown names)."""
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction method: {name}")
+    return EXTRACTORS[name]
+
+
+def available_extractors() -> List[str]:
+    """Names of installed backends, in PREFERENCE order (others last)."""
+    names = [name for name in PREFERENCE if name in EXTRACTORS]
+    names += [name for name in EXTRACTORS if name not in names]
+    return [name for name in names if EXTRACTORS[name].available()]
+
+
+def extractor_config(method: str) -> Dict[str, Any]:
+    """
+    Everything the extraction output depends on, for cache keys.
+
+    Auto-selection and page repair may use any installed backend, so the
+    versions of all of them are included, whatever the method.
+
+    Args:
+        method: Extraction method ('auto' or a backend name)
+
+    Returns:
+        JSON-serializable configuration dict
+    """
+    versions = {}
+    for name in available_extractors():
+        try:
+            versions[name] = importlib.metadata.version(EXTRACTORS[name].package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[name] = 'unknown'
+    return {
+        'version': EXTRACTION_VERSION,
+        'method': method,
+        'backends': versions,
+        'quality_tolerance': QUALITY_TOLERANCE,
+        'page_gate': [MIN_PAGE_CHARACTERS, MIN_ALPHA_RATIO, MIN_ENTROPY, MAX_ENTROPY]
+    }
+
+
+def text_quality(text: Optional[str]) -> float:
+    """
+    Heuristic quality of extracted text in [0, 1].
+
+    High for ordinary prose: letters, digits and punctuation, words
+    separated by spaces. Low for empty pages, (cid:NN) glyph codes,
+    replacement characters, symbol soup and words run together.
+
+    Args:
+        text: Page text
+
+    Returns:
+        Quality score
+    """
+    if not text or not text.strip():
+        return 0.0
+
+    stripped = re.sub(r'\s+', '', text)
+    if not stripped:
+        return 0.0
+    prose_ratio = sum(ch.isalnum() or ch in PROSE_PUNCTUATION for ch in stripped) / len(stripped)
+
+    broken = len(re.findall(r'\(cid:\d+\)', text)) + text.count('�')
+    broken_ratio = min(1.0, broken * 4 / len(stripped))
+
+    words = text.split()
+    mean_word = sum(len(word) for word in words) / len(words)
+    # German prose averages ~6 characters per word; much longer means lost spaces
+    spacing = 1.0 if mean_word <= 12 else max(0.0, 1.0 - (mean_word - 12) / 12)
+
+    return round(prose_ratio * (1.0 - broken_ratio) * spacing, 4)
+
+
+def sample_pages(page_count: int, samples: int = 3) -> List[int]:
+    """Evenly spaced page indices away from the front and back matter."""
+    if page_count <= samples:
+        return list(range(page_count))
+    step = page_count / (samples + 1)
+    return sorted({int(step * (i + 1)) for i in range(samples)})
+
+
+def select_extractor(
+    pdf_content: bytes,
+    candidates: Optional[List[str]] = None,
+    samples: int = 3
+) -> Tuple[str, Dict[str, Dict[str, float]]]:
+    """
+    Pick the best backend for a document by extracting a few sample pages.
+
+    Every candidate extracts the same pages; the best quality wins, and
+    among backends within QUALITY_TOLERANCE of it the fastest is chosen.
+    Candidates are tried fastest first, and sampling stops once one scores
+    within QUALITY_TOLERANCE of perfect, since no slower backend can beat it.
+
+    Args:
+        pdf_content: PDF file content as bytes
+        candidates: Backend names to try (defaults to all installed)
+        samples: Number of pages to sample
+
+    Returns:
+        Tuple of (chosen name, {name: {'quality', 'seconds_per_page'}})
+
+    Raises:
+        ValueError: If no candidate backend is installed or none can read the PDF
+    """
+    candidates = candidates or available_extractors()
+    scores: Dict[str, Dict[str, float]] = {}
+    pages: Optional[List[int]] = None
+
+    for name in candidates:
+        extractor = get_extractor(name)
+        if not extractor.available():
+            continue
+        try:
+            if pages is None:
+                pages = sample_pages(extractor.page_count(pdf_content), samples)
+            start = time.perf_counter()
+            texts = extractor.extract_pages(pdf_content, pages)
+            seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"Warning: {name} could not read the PDF: {e}")
+            continue
+        scores[name] = {
+            'quality': round(sum(text_quality(t) for t in texts) / max(1, len(texts)), 4),
+            'seconds_per_page': round(seconds / max(1, len(texts)), 5)
+        }
+        if scores[name]['quality'] >= 1.0 - QUALITY_TOLERANCE:
+            break
+
+    if not scores:
+        raise ValueError("No installed PDF extractor could read the document")
+
+    best_quality = max(score['quality'] for score in scores.values())
+    good = [name for name, score in scores.items() if score['quality'] >= best_quality - QUALITY_TOLERANCE]
+    chosen = min(good, key=lambda name: scores[name]['seconds_per_page'])
+    return chosen, scores
+
+
+def char_entropy(text: str) -> float:
+    """Shannon entropy of the non-whitespace characters, in bits per character."""
+    counts = Counter(ch for ch in text if not ch.isspace())
+    total = sum(counts.values())
+    if not total:
+        return 0.0
+    return -sum(n / total * math.log2(n / total) for n in counts.values())
+
+
+def page_issue(text: Optional[str]) -> Optional[str]:
+    """
+    Check one page's text against the quality gate.
+
+    Args:
+        text: Page text (None if extraction failed)
+
+    Returns:
+        None if the page passes, else 'failed', 'empty', 'alpha' (too few
+        letters) or 'entropy' (repetitive or random characters)
+    """
+    if text is None:
+        return 'failed'
+    stripped = re.sub(r'\s+', '', text)
+    if len(stripped) < MIN_PAGE_CHARACTERS:
+        return 'empty'
+    if sum(ch.isalpha() for ch in stripped) / len(stripped) < MIN_ALPHA_RATIO:
+        return 'alpha'
+    if not MIN_ENTROPY <= char_entropy(stripped) <= MAX_ENTROPY:
+        return 'entropy'
+    return None
+
+
+def repair_pages(
+    pdf_content: bytes,
+    texts: List[Optional[str]],
+    primary: str,
+    candidates: Optional[List[str]] = None
+) -> Tuple[List[Optional[str]], Dict[int, str]]:
+    """
+    Re-extract pages that fail the quality gate with the other backends.
+
+    Only the failing pages are extracted again. The alternate backends run
+    concurrently, one thread per backend (a PDFium document must not be
+    shared between threads). Each failing page takes the alternate text
+    with the highest text_quality, if it beats the original.
+
+    Args:
+        pdf_content: PDF file content as bytes
+        texts: Per-page text from the primary backend
+        primary: Name of the primary backend
+        candidates: Alternate backend names (defaults to all other installed ones)
+
+    Returns:
+        Tuple of (per-page texts, {page index: backend that replaced it})
+    """
+    failing = [i for i, text in enumerate(texts) if page_issue(text)]
+    alternates = [name for name in (candidates or available_extractors()) if name != primary]
+    if not failing or not alternates:
+        return texts, {}
+
+    def extract(name: str) -> List[Optional[str]]:
+        try:
+            return get_extractor(name).extract_pages(pdf_content, failing)
+        except Exception as e:
+            print(f"Warning: {name} could not re-extract pages: {e}")
+            return [None] * len(failing)
+
+    with ThreadPoolExecutor(max_workers=len(alternates)) as pool:
+        results = dict(zip(alternates, pool.map(extract, alternates)))
+
+    texts = list(texts)
+    repaired = {}
+    for position, index in enumerate(failing):
+        best_quality = text_quality(texts[index])
+        for name in alternates:
+            text = results[name][position]
+            quality = text_quality(text)
+            if quality > best_quality:
+                texts[index], best_quality = text, quality
+                repaired[index] = name
+    return texts, repaired
@@ -0,0 +1,487 @@
+"""
+In-process stand-in for the Pinecone client.
+Used by benchmarks to run the indexing and search paths without network access,
+optionally with simulated latency, throttling and injected errors.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Any, Iterator, Optional, Union
+import numpy as np
+from local_index import matches_filter, normalize
+from upsert_batching import MAX_REQUEST_BYTES, MAX_REQUEST_VECTORS, estimate_vector_bytes
+
+try:
+    from pinecone.exceptions import PineconeApiException
+except ImportError:
+    class PineconeApiException(Exception):
+        """Error response with an HTTP status (stand-in when pinecone is not installed)."""
+
+        def __init__(self, message: str, status_code: int, body: Optional[dict] = None):
+            super().__init__(f"[{status_code}] {message}")
+            self.message = message
+            self.status_code = status_code
+            self.body = body
+
+OPERATIONS = ('upsert', 'query', 'fetch', 'list', 'delete', 'describe_index_stats')
+
+ERROR_MESSAGES = {
+    400: 'Bad Request',
+    413: 'Request size exceeds the maximum allowed',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class Latency:
+    """
+    Request latency distribution in seconds.
+
+    Constant at median, or lognormal with the given median and 95th
+    percentile; per_vector adds a cost per vector in the request.
+    """
+
+    def __init__(self, median: float = 0.0, p95: Optional[float] = None, per_vector: float = 0.0):
+        if p95 is not None and median > 0 and p95 < median:
+            raise ValueError("p95 latency must not be below the median")
+        self.median = median
+        self.p95 = p95
+        self.per_vector = per_vector
+
+    def sample(self, rng: random.Random, vectors: int = 0) -> float:
+        seconds = self.median
+        if self.p95 is not None and self.median > 0 and self.p95 > self.median:
+            sigma = math.log(self.p95 / self.median) / 1.6449  # z of the 95th percentile
+            seconds = rng.lognormvariate(math.log(self.median), sigma)
+        return seconds + self.per_vector * vectors
+
+
+class FaultProfile:
+    """
+    Simulated service behaviour for FakeIndex requests.
+
+    All randomness comes from one seeded generator, so a single-threaded
+    run injects the same errors and latencies every time. Checks run in
+    this order per request: scripted failures, throttling, request limits,
+    random errors and timeouts; accepted requests then take their latency.
+    """
+
+    def __init__(
+        self,
+        latency: Union[Latency, Dict[str, Latency], None] = None,
+        error_rate: Union[float, Dict[str, float]] = 0.0,
+        error_status: int = 503,
+        timeout_rate: float = 0.0,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_request_bytes: Optional[int] = MAX_REQUEST_BYTES,
+        max_request_vectors: Optional[int] = MAX_REQUEST_VECTORS,
+        ready_after: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize fault profile.
+
+        Args:
+            latency: One distribution for all operations, or one per operation name
+                     (upsert, query, fetch, list, delete, describe_index_stats)
+            error_rate: Probability of an error_status response, overall or per operation
+            error_status: HTTP status of injected errors (e.g. 500, 503)
+            timeout_rate: Probability that a request times out (TimeoutError)
+            requests_per_second: Token-bucket rate limit; requests over it get 429
+            burst: Bucket size (defaults to one second of requests)
+            max_concurrency: Requests served at once; the rest wait for a slot
+            max_request_bytes: Upserts estimated above this get 413 (None = no limit)
+            max_request_vectors: Upserts with more vectors get 400 (None = no limit)
+            ready_after: Seconds after create_index until the index reports ready
+            seed: Random seed
+        """
+        self.latency = latency or Latency()
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.requests_per_second = requests_per_second
+        self.burst = burst or max(1, int(requests_per_second or 1))
+        self.max_request_bytes = max_request_bytes
+        self.max_request_vectors = max_request_vectors
+        self.ready_after = ready_after
+        self.rng = random.Random(seed)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._scripted: Dict[str, List[Union[int, type]]] = {}
+
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def fail_next(self, operation: str, status: int = 503, times: int = 1) -> None:
+        """
+        Fail the next requests of an operation.
+
+        Args:
+            operation: Operation name
+            status: HTTP status, or 0 for a timeout
+            times: Number of requests to fail
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        with self._lock:
+            self._scripted.setdefault(operation, []).extend([status] * times)
+
+    def _for_operation(self, value: Any, operation: str, default: Any) -> Any:
+        return value.get(operation, default) if isinstance(value, dict) else value
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.requests_per_second)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _fail(self, operation: str, status: int) -> None:
+        self.errors[(operation, status)] += 1
+        if status == 0:
+            raise TimeoutError(f"{operation} request timed out")
+        raise PineconeApiException(ERROR_MESSAGES.get(status, 'Error'), status_code=status)
+
+    def request(self, operation: str, vectors: Optional[List[Any]] = None) -> None:
+        """
+        Run the checks for one request and wait out its latency.
+
+        Args:
+            operation: Operation name
+            vectors: Upsert payload, checked against the request limits
+
+        Raises:
+            PineconeApiException: Injected error, throttling (429) or a request limit
+            TimeoutError: Injected timeout
+        """
+        with self._lock:
+            self.requests[operation] += 1
+            scripted = self._scripted.get(operation)
+            if scripted:
+                self._fail(operation, scripted.pop(0))
+            if self.requests_per_second and not self._take_token():
+                self._fail(operation, 429)
+            if vectors is not None:
+                if self.max_request_vectors and len(vectors) > self.max_request_vectors:
+                    self._fail(operation, 400)
+                if self.max_request_bytes and sum(
+                    estimate_vector_bytes(vector) for vector in vectors
+                ) > self.max_request_bytes:
+                    self._fail(operation, 413)
+            roll = self.rng.random()
+            error_rate = self._for_operation(self.error_rate, operation, 0.0)
+            if roll < error_rate:
+                self._fail(operation, self.error_status)
+            if roll < error_rate + self.timeout_rate:
+                self._fail(operation, 0)
+            latency = self._for_operation(self.latency, operation, Latency())
+            seconds = latency.sample(self.rng, len(vectors) if vectors is not None else 0)
+
+        if self._slots is not None:
+            with self._slots:
+                time.sleep(seconds)
+        elif seconds > 0:
+            time.sleep(seconds)
+
+
+class _IndexList(list):
+    """List of index descriptions with the client's names() helper."""
+
+    def names(self) -> List[str]:
+        return [description['name'] for description in self]
+
+
+class FakeIndex:
+    """
+    Brute-force cosine index with the Pinecone Index interface.
+
+    Vectors are kept per namespace as {id: (normalized float32 vector, metadata)}.
+    Only the methods PineconeManager calls are implemented. With a
+    FaultProfile, every call first goes through its latency, throttling
+    and error checks; a rejected request changes nothing.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        dimension: int,
+        metric: str = 'cosine',
+        faults: Optional[FaultProfile] = None
+    ):
+        """
+        Initialize fake index.
+
+        Args:
+            name: Index name
+            dimension: Vector dimension
+            metric: Distance metric (only cosine is scored)
+            faults: Simulated latency and errors (None for instant, reliable calls)
+        """
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self.faults = faults
+        self.namespaces: Dict[str, Dict[str, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def _request(self, operation: str, vectors: Optional[List[Any]] = None) -> None:
+        if self.faults is not None:
+            self.faults.request(operation, vectors)
+
+    def upsert(self, vectors: List[Any], namespace: str = '') -> Dict[str, int]:
+        """
+        Insert or replace vectors.
+
+        Args:
+            vectors: Dicts with 'id', 'values', 'metadata' or (id, values[, metadata]) tuples
+            namespace: Target namespace
+
+        Returns:
+            {'upserted_count': n}
+        """
+        records = []
+        for vector in vectors:
+            if isinstance(vector, dict):
+                vector_id, values, metadata = vector['id'], vector['values'], vector.get('metadata')
+            else:
+                vector_id, values, metadata = (tuple(vector) + (None,))[:3]
+            records.append({'id': vector_id, 'values': values, 'metadata': metadata})
+
+        self._request('upsert', records)
+
+        # Validate the whole request before storing any of it
+        entries = []
+        for record in records:
+            values = np.asarray(record['values'], dtype=np.float32)
+            if values.shape != (self.dimension,):
+                raise ValueError(
+                    f"Vector dimension {values.shape[-1]} does not match the dimension "
+                    f"of the index {self.dimension}"
+                )
+            entries.append((record['id'], normalize(values), dict(record['metadata'] or {})))
+
+        with self._lock:
+            store = self.namespaces.setdefault(namespace, {})
+            for vector_id, values, metadata in entries:
+                store[vector_id] = (values, metadata)
+
+        return {'upserted_count': len(records)}
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: str = ''
+    ) -> Dict[str, Any]:
+        """
+        Cosine similarity search.
+
+        Returns:
+            {'matches': [{'id', 'score'[, 'metadata'][, 'values']}], 'namespace': namespace}
+        """
+        self._request('query')
+        with self._lock:
+            store = dict(self.namespaces.get(namespace, {}))
+        ids = [
+            vector_id for vector_id, (_, metadata) in store.items()
+            if matches_filter(metadata, filter)
+        ]
+
+        matches = []
+        if ids:
+            matrix = np.stack([store[vector_id][0] for vector_id in ids])
+            scores = matrix @ normalize(vector).reshape(-1)
+            for position in np.argsort(-scores, kind='stable')[:top_k]:
+                vector_id = ids[position]
+                match = {'id': vector_id, 'score': float(scores[position])}
+                if include_metadata:
+                    match['metadata'] = dict(store[vector_id][1])
+                if include_values:
+                    match['values'] = store[vector_id][0].tolist()
+                matches.append(match)
+
+        return {'matches': matches, 'namespace': namespace}
+
+    def fetch(self, ids: List[str], namespace: str = '') -> Dict[str, Any]:
+        """Fetch stored vectors by ID."""
+        self._request('fetch')
+        with self._lock:
+            store = dict(self.namespaces.get(namespace, {}))
+        return {
+            'vectors': {
+                vector_id: {
+                    'id': vector_id,
+                    'values': store[vector_id][0].tolist(),
+                    'metadata': dict(store[vector_id][1])
+                }
+                for vector_id in ids if vector_id in store
+            },
+            'namespace': namespace
+        }
+
+    def list_paginated(
+        self,
+        prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        pagination_token: Optional[str] = None,
+        namespace: str = ''
+    ) -> '_Record':
+        """
+        One page of vector IDs in ID order.
+
+        Returns:
+            Record with 'vectors' [{'id'}], 'namespace' and 'pagination'
+            ({'next': token} or None on the last page)
+        """
+        limit = limit or 100
+        if not 1 <= limit <= 100:
+            raise ValueError("limit must be between 1 and 100")
+
+        self._request('list')
+        with self._lock:
+            ids = sorted(
+                vector_id for vector_id in self.namespaces.get(namespace, {})
+                if vector_id.startswith(prefix or '')
+            )
+        if pagination_token is not None:
+            ids = [vector_id for vector_id in ids if vector_id > pagination_token]
+
+        page = ids[:limit]
+        more = len(ids) > limit
+        return _Record(
+            vectors=[_Record(id=vector_id) for vector_id in page],
+            namespace=namespace,
+            pagination=_Record(next=page[-1]) if more else None
+        )
+
+    def list(
+        self,
+        prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        namespace: str = ''
+    ) -> Iterator['_Record']:
+        """Yield pages of vector IDs, following the pagination tokens."""
+        token = None
+        while True:
+            page = self.list_paginated(prefix=prefix, limit=limit, pagination_token=token,
+                                       namespace=namespace)
+            if page.vectors:
+                yield page
+            if page.pagination is None:
+                return
+            token = page.pagination.next
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: str = ''
+    ) -> Dict[str, Any]:
+        """Delete vectors by ID, by metadata filter, or all in a namespace."""
+        self._request('delete')
+        with self._lock:
+            store = self.namespaces.get(namespace, {})
+            if delete_all:
+                store.clear()
+            elif ids is not None:
+                for vector_id in ids:
+                    store.pop(vector_id, None)
+            elif filter:
+                for vector_id in [i for i, (_, m) in store.items() if matches_filter(m, filter)]:
+                    del store[vector_id]
+        return {}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Vector counts per namespace."""
+        self._request('describe_index_stats')
+        with self._lock:
+            namespaces = {
+                name: {'vector_count': len(store)}
+                for name, store in self.namespaces.items() if store
+            }
+        return {
+            'dimension': self.dimension,
+            'index_fullness': 0.0,
+            'total_vector_count': sum(ns['vector_count'] for ns in namespaces.values()),
+            'namespaces': namespaces
+        }
+
+
+class FakePinecone:
+    """
+    Client holding FakeIndex instances, with the Pinecone control-plane methods.
+
+    Drop-in for pinecone.Pinecone via PineconeManager(client=...):
+
+        faults = FaultProfile(latency=Latency(0.02, 0.08), error_rate=0.01,
+                              requests_per_second=50)
+        manager = PineconeManager(client=FakePinecone(faults=faults), ...)
+    """
+
+    def __init__(self, api_key: Optional[str] = None, faults: Optional[FaultProfile] = None):
+        """
+        Initialize fake client.
+
+        Args:
+            api_key: Ignored
+            faults: Fault profile shared by all indexes (None for instant, reliable calls)
+        """
+        self.faults = faults
+        self.indexes: Dict[str, FakeIndex] = {}
+        self._created: Dict[str, float] = {}
+
+    def list_indexes(self) -> _IndexList:
+        return _IndexList(
+            {'name': index.name, 'dimension': index.dimension, 'metric': index.metric}
+            for index in self.indexes.values()
+        )
+
+    def create_index(self, name: str, dimension: int, metric: str = 'cosine', spec: Any = None) -> None:
+        if name in self.indexes:
+            raise ValueError(f"Index '{name}' already exists")
+        self.indexes[name] = FakeIndex(name, dimension, metric, self.faults)
+        self._created[name] = time.monotonic()
+
+    def describe_index(self, name: str) -> Any:
+        index = self.indexes[name]
+        ready_after = self.faults.ready_after if self.faults is not None else 0.0
+        ready = time.monotonic() - self._created[name] >= ready_after
+        return _Description(name=name, dimension=index.dimension, metric=index.metric, ready=ready)
+
+    def Index(self, name: str) -> FakeIndex:
+        return self.indexes[name]
+
+    def delete_index(self, name: str) -> None:
+        self.indexes.pop(name, None)
+        self._created.pop(name, None)
+
+
+class _Record(dict):
+    """Response object supporting both attribute and key access."""
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self.__dict__ = self
+
+
+class _Description(_Record):
+    """Index description with its readiness status."""
+
+    def __init__(self, ready: bool = True, **fields):
+        status = {'ready': ready, 'state': 'Ready' if ready else 'Initializing'}
+        super().__init__(status=status, **fields)
@@ -0,0 +1,195 @@
+"""
+Section and document summary vectors for coarse-to-fine search.
+A summary vector is the normalized mean of its chunks' embeddings.
+"""
+
+import json
+import re
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+# Chunks per section for chunks outside the manifest sections
+SECTION_WINDOW = 20
+
+# Vector metadata copied from the chunks to their summaries (filter fields)
+INHERITED_FIELDS = ('course', 'learning_unit', 'material_type', 'document_type')
+
+
+def parse_page_range(pages: Any) -> Optional[Tuple[int, int]]:
+    """
+    Parse a manifest page range like '9-28' or '7'.
+
+    Returns:
+        (first, last) printed page, or None if it cannot be parsed
+    """
+    numbers = [int(n) for n in re.findall(r'\d+', str(pages or ''))]
+    if not numbers:
+        return None
+    return min(numbers), max(numbers)
+
+
+def _sections_of(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    sections = metadata.get('sections')
+    if isinstance(sections, str):
+        try:
+            sections = json.loads(sections)
+        except json.JSONDecodeError:
+            return []
+    return sections if isinstance(sections, list) else []
+
+
+def group_sections(
+    chunks: List[Dict[str, Any]],
+    window: int = SECTION_WINDOW
+) -> List[Dict[str, Any]]:
+    """
+    Assign one document's chunks to sections.
+
+    Chunks belong to every manifest section whose page range overlaps their
+    printed pages; a chunk without a page marker is on the page the
+    previous chunk ended on. Chunks no manifest section covers form
+    consecutive windows of their own.
+
+    Args:
+        chunks: Chunks of one document (full metadata, in order)
+        window: Chunks per section for uncovered chunks
+
+    Returns:
+        List of {'title', 'positions' (indices into chunks)[, 'page_start', 'page_end']}
+    """
+    # Only chunks containing a page marker carry page metadata; the others
+    # continue the page the previous chunk ended on
+    chunk_pages: List[Optional[Tuple[int, int]]] = []
+    last_page = None
+    for chunk in chunks:
+        start = chunk['metadata'].get('page_start')
+        if start is None:
+            chunk_pages.append(None if last_page is None else (last_page, last_page))
+        else:
+            last_page = chunk['metadata'].get('page_end', start)
+            chunk_pages.append((start, last_page))
+
+    sections = []
+    for number, section in enumerate(_sections_of(chunks[0]['metadata']) if chunks else [], 1):
+        pages = parse_page_range(section.get('pages'))
+        if pages is None:
+            continue
+        positions = [
+            i for i, span in enumerate(chunk_pages)
+            if span is not None and span[0] <= pages[1] and span[1] >= pages[0]
+        ]
+        if positions:
+            sections.append({
+                'title': str(section.get('title') or f"Section {section.get('chapter', number)}"),
+                'positions': positions,
+                'page_start': pages[0],
+                'page_end': pages[1]
+            })
+
+    # Chunks outside every manifest section (front matter, appendix) or
+    # without page metadata go into windowed sections, so each chunk is
+    # reachable from some section. Windows break at gaps, since a section
+    # is searched as one contiguous chunk range.
+    covered = {i for section in sections for i in section['positions']}
+    runs: List[List[int]] = []
+    for i in range(len(chunks)):
+        if i in covered:
+            continue
+        if runs and runs[-1][-1] == i - 1 and len(runs[-1]) < window:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    for positions in runs:
+        sections.append({
+            'title': f"Chunks {positions[0] + 1}-{positions[-1] + 1}",
+            'positions': positions
+        })
+    return sections
+
+
+def _mean_vector(embeddings: np.ndarray) -> np.ndarray:
+    mean = embeddings.mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm > 0 else mean).astype(np.float32)
+
+
+def build_summaries(
+    chunks: List[Dict[str, Any]],
+    embeddings: np.ndarray,
+    namespaces: Optional[List[str]] = None,
+    window: int = SECTION_WINDOW
+) -> List[Dict[str, Any]]:
+    """
+    Build section and document summary vectors.
+
+    Section metadata records the chunk_number range it covers and the
+    namespace its chunks live in, so a search can restrict the chunk query
+    to the selected sections.
+
+    Args:
+        chunks: Chunks with full metadata (before the chunk store slims it)
+        embeddings: float32 matrix aligned with chunks
+        namespaces: Namespace of each chunk (None: all in '')
+        window: Chunks per section for chunks outside the manifest sections
+
+    Returns:
+        Vector dicts ({'id', 'values', 'metadata'}), ids '<document_id>#section_<n>'
+        and '<document_id>#document'
+    """
+    by_document: Dict[str, List[int]] = {}
+    for i, chunk in enumerate(chunks):
+        by_document.setdefault(chunk['metadata']['document_id'], []).append(i)
+
+    vectors = []
+    for document_id, positions in by_document.items():
+        document_chunks = [chunks[i] for i in positions]
+        first = document_chunks[0]['metadata']
+        common = {'document_id': document_id}
+        common.update({field: first[field] for field in INHERITED_FIELDS if first.get(field)})
+        common['namespace'] = namespaces[positions[0]] if namespaces else ''
+
+        def chunk_range(indices: List[int]) -> Dict[str, int]:
+            numbers = [document_chunks[i]['metadata'].get('chunk_number', positions[i] + 1) for i in indices]
+            return {'chunk_start': min(numbers), 'chunk_end': max(numbers)}
+
+        for number, section in enumerate(group_sections(document_chunks, window), 1):
+            metadata = {**common, 'level': 'section', 'section': number, 'section_title': section['title']}
+            metadata.update(chunk_range(section['positions']))
+            if 'page_start' in section:
+                metadata['page_start'] = section['page_start']
+                metadata['page_end'] = section['page_end']
+            vectors.append({
+                'id': f"{document_id}#section_{number}",
+                'values': _mean_vector(embeddings[[positions[i] for i in section['positions']]]),
+                'metadata': metadata
+            })
+
+        metadata = {**common, 'level': 'document'}
+        metadata.update(chunk_range(list(range(len(document_chunks)))))
+        vectors.append({
+            'id': f"{document_id}#document",
+            'values': _mean_vector(embeddings[positions]),
+            'metadata': metadata
+        })
+
+    return vectors
+
+
+def section_filter(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Chunk filter covering the chunk ranges of selected section summaries.
+
+    Args:
+        sections: Metadata of section summary vectors
+
+    Returns:
+        Pinecone filter ({'$or': [...]} of document_id and chunk_number ranges)
+    """
+    clauses = [
+        {
+            'document_id': section['document_id'],
+            'chunk_number': {'$gte': section['chunk_start'], '$lte': section['chunk_end']}
+        }
+        for section in sections
+    ]
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
@@ -0,0 +1,264 @@
+"""
+Lightweight metrics for the indexing pipeline.
+Timers, counters and histograms with JSON-lines and Prometheus text export.
+"""
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from config import Config
+
+
+# Latency buckets in seconds, from single embedding batches to whole PDFs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (
+        name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile (upper bound of the bucket holding it)."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+class Metrics:
+    """
+    Registry of counters and histograms for pipeline stages.
+
+    stage() times a block, records '<stage>_seconds' and adds every numeric
+    field the block reports to a '<stage>_<field>' counter. Each finished
+    stage is also emitted as one structured event: appended as a JSON line
+    to log_path (if set) and passed to registered listeners.
+    """
+
+    def __init__(self, namespace: str = 'pdf_search', log_path: Optional[Path] = None):
+        """
+        Initialize metrics registry.
+
+        Args:
+            namespace: Prefix of exported Prometheus metric names
+            log_path: JSON-lines file for stage events (None disables logging)
+        """
+        self.namespace = namespace
+        self.log_path = Path(log_path) if log_path else None
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to a counter."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value (usually seconds) in a histogram."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Time a block into the '<name>_seconds' histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    @contextmanager
+    def stage(self, name: str, **labels) -> Iterator[Dict[str, Any]]:
+        """
+        Time a pipeline stage.
+
+        Yields a dict the block fills with what it processed, e.g.
+        {'pages': 120} or {'bytes': len(content)}. Numeric fields are added
+        to counters and reported per second in the stage event; other
+        fields (document ids, file names) only appear in the event.
+
+        Args:
+            name: Stage name (extract, chunking, embed, upsert, ...)
+            **labels: Low-cardinality labels (method, source, ...)
+        """
+        fields: Dict[str, Any] = {}
+        self.emit({'event': 'stage_start', 'stage': name, 'labels': labels})
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield fields
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f"{name}_seconds", seconds, **labels)
+            if not ok:
+                self.increment(f"{name}_errors", **labels)
+
+            event = {
+                'event': 'stage_end',
+                'stage': name,
+                'labels': labels,
+                'seconds': round(seconds, 6),
+                'ok': ok
+            }
+            for field, value in fields.items():
+                event[field] = value
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.increment(f"{name}_{field}", value, **labels)
+                    if seconds > 0:
+                        event[f"{field}_per_second"] = round(value / seconds, 3)
+            self.emit(event)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call listener(event) for every stage start/end event."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """Send an event to the JSON log and listeners."""
+        event = {'timestamp': round(time.time(), 3), **event}
+        for listener in list(self.listeners):
+            listener(event)
+        if self.log_path and event['event'] != 'stage_start':
+            line = json.dumps(event, ensure_ascii=False, default=str)
+            with self._lock:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current values as plain data.
+
+        Returns:
+            Dict with 'counters' {name: [{labels, value}]} and 'histograms'
+            {name: [{labels, count, sum, p50, p95}]}
+        """
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        'labels': dict(key),
+                        'count': h.count,
+                        'sum': round(h.sum, 6),
+                        'p50': h.quantile(0.5),
+                        'p95': h.quantile(0.95)
+                    }
+                    for key, h in series.items()
+                ]
+                for name, series in self.histograms.items()
+            }
+        return {'counters': counters, 'histograms': histograms}
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """Total seconds recorded per stage (all label values combined)."""
+        with self._lock:
+            return {
+                name[:-len('_seconds')]: sum(h.sum for h in series.values())
+                for name, series in self.histograms.items()
+                if name.endswith('_seconds')
+            }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f"{self.namespace}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (math.inf,), h.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == math.inf else f"{bound:g}"
+                        lines.append(f"{metric}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {h.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {h.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write metrics atomically, e.g. for the node_exporter textfile collector."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text(self.to_prometheus(), encoding='utf-8')
+        tmp_path.replace(path)
+
+    def reset(self) -> None:
+        """Drop all recorded values (listeners stay registered)."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+# Process-wide registry used by the pipeline modules
+metrics = Metrics(log_path=Config.METRICS_LOG or None)
+stage = metrics.stage
+timer = metrics.timer
+increment = metrics.increment
+observe = metrics.observe
@@ -0,0 +1,373 @@
+"""
+Local vector index with int8 / binary quantization.
+Keeps compact codes in memory and rescores top candidates in float32.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+
+QUANTIZATION_MODES = ('float32', 'int8', 'binary')
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (cosine similarity becomes a dot product)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization.
+
+    Args:
+        vectors: float32 array of shape (n, d)
+
+    Returns:
+        Tuple of (int8 codes (n, d), float32 scales (n,))
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Reconstruct float32 vectors from int8 codes and scales."""
+    return codes.astype(np.float32) * scales[:, None]
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Sign-bit quantization, 8 dimensions per byte.
+
+    Args:
+        vectors: float32 array of shape (n, d)
+
+    Returns:
+        uint8 array of shape (n, ceil(d / 8))
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+# Number of set bits for every byte value, for Hamming distances
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Hamming distance between each packed code row and a packed query."""
+    return _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1)
+
+
+def matches_filter(metadata: Dict[str, Any], filter_metadata: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter.
+
+    Supports plain equality and the $eq, $ne, $in, $nin, $gt, $gte, $lt,
+    $lte, $and and $or operators.
+
+    Args:
+        metadata: Vector metadata
+        filter_metadata: Filter expression (None matches everything)
+
+    Returns:
+        True if the metadata satisfies the filter
+    """
+    if not filter_metadata:
+        return True
+
+    for key, condition in filter_metadata.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+
+        for op, operand in condition.items():
+            if op == '$eq' and value != operand:
+                return False
+            if op == '$ne' and value == operand:
+                return False
+            if op == '$in' and value not in operand:
+                return False
+            if op == '$nin' and value in operand:
+                return False
+            if op in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                if op == '$gt' and not value > operand:
+                    return False
+                if op == '$gte' and not value >= operand:
+                    return False
+                if op == '$lt' and not value < operand:
+                    return False
+                if op == '$lte' and not value <= operand:
+                    return False
+
+    return True
+
+
+class LocalIndex:
+    """
+    In-process cosine index over quantized vectors.
+
+    Only the quantized codes are held in memory (4x smaller for int8,
+    32x for binary). Full-precision vectors are appended to a float32 file
+    and memory-mapped, so rescoring the top candidates reads a few rows
+    from disk instead of keeping the whole matrix resident.
+    """
+
+    FLOAT_FILE = 'vectors.f32'
+    META_FILE = 'index.json'
+
+    def __init__(
+        self,
+        dimension: int,
+        quantization: str = 'int8',
+        root: Optional[Path] = None,
+        keep_vectors: bool = False
+    ):
+        """
+        Initialize an empty local index.
+
+        Args:
+            dimension: Embedding dimension
+            quantization: 'float32', 'int8' or 'binary'
+            root: Directory for the float32 rescoring file (a temporary
+                  directory, removed by close(), if None)
+            keep_vectors: Keep an existing float32 file instead of truncating
+                          it (load() restores the rows it belongs to)
+        """
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization: {quantization}")
+
+        self.dimension = dimension
+        self.quantization = quantization
+        self._tmpdir = None
+        if root is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix='local-index-')
+            root = self._tmpdir.name
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.float_path = self.root / self.FLOAT_FILE
+        if not keep_vectors:
+            # Row positions start at 0, so stale rows must not stay in front
+            self.float_path.write_bytes(b'')
+
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._codes = self._empty_codes()
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._floats: Optional[np.memmap] = None
+
+    def _empty_codes(self) -> np.ndarray:
+        """Empty code matrix for the configured quantization."""
+        if self.quantization == 'binary':
+            return np.zeros((0, (self.dimension + 7) // 8), dtype=np.uint8)
+        if self.quantization == 'int8':
+            return np.zeros((0, self.dimension), dtype=np.int8)
+        return np.zeros((0, self.dimension), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def memory_bytes(self) -> int:
+        """Bytes held in memory by the vector codes (excluding ids/metadata)."""
+        return self._codes.nbytes + self._scales.nbytes + self._alive.nbytes
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Add or replace vectors.
+
+        Args:
+            ids: Vector IDs
+            vectors: float array of shape (len(ids), dimension)
+            metadata: Optional metadata per vector
+        """
+        vectors = normalize(vectors)
+        if vectors.shape != (len(ids), self.dimension):
+            raise ValueError(
+                f"Expected vectors of shape ({len(ids)}, {self.dimension}), got {vectors.shape}"
+            )
+        metadata = metadata or [{} for _ in ids]
+
+        # Replaced IDs are tombstoned and appended again
+        for vector_id in ids:
+            if vector_id in self._positions:
+                self._alive[self._positions[vector_id]] = False
+
+        start = len(self.ids)
+        with open(self.float_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        self._floats = None
+
+        if self.quantization == 'binary':
+            codes = quantize_binary(vectors)
+        elif self.quantization == 'int8':
+            codes, scales = quantize_int8(vectors)
+            self._scales = np.concatenate([self._scales, scales])
+        else:
+            codes = vectors
+
+        self._codes = np.concatenate([self._codes, codes])
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        for offset, (vector_id, meta) in enumerate(zip(ids, metadata)):
+            self.ids.append(vector_id)
+            self.metadata.append(meta)
+            self._positions[vector_id] = start + offset
+
+    def delete(self, ids: List[str]) -> int:
+        """
+        Delete vectors by ID.
+
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        for vector_id in ids:
+            position = self._positions.pop(vector_id, None)
+            if position is not None:
+                self._alive[position] = False
+                removed += 1
+        return removed
+
+    def _float_rows(self, positions: np.ndarray) -> np.ndarray:
+        """Read full-precision rows from the memory-mapped float file."""
+        if self._floats is None or len(self._floats) < len(self.ids):
+            self._floats = np.memmap(
+                self.float_path, dtype=np.float32, mode='r',
+                shape=(len(self.ids), self.dimension)
+            )
+        return np.asarray(self._floats[positions])
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Scores of all rows against the query in the quantized space."""
+        if self.quantization == 'binary':
+            distances = hamming_distances(self._codes, quantize_binary(query[None, :])[0])
+            return 1.0 - 2.0 * distances.astype(np.float32) / self.dimension
+        if self.quantization == 'int8':
+            return (self._codes @ query) * self._scales
+        return self._codes @ query
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 10,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Cosine search with optional float32 rescoring.
+
+        Args:
+            query: Query vector of shape (dimension,)
+            top_k: Number of results
+            filter_metadata: Pinecone-style metadata filter
+            rescore: Re-rank the top rescore_factor * top_k candidates in float32
+            rescore_factor: Candidate pool multiplier for rescoring
+            include_values: Attach float32 vectors to results
+
+        Returns:
+            List of {'id', 'score', 'metadata'} dicts, best first
+        """
+        if not self.ids:
+            return []
+
+        query = normalize(query).reshape(-1)
+        scores = self._approximate_scores(query).astype(np.float32)
+
+        mask = self._alive.copy()
+        if filter_metadata:
+            mask &= np.fromiter(
+                (matches_filter(m, filter_metadata) for m in self.metadata),
+                dtype=bool, count=len(self.metadata)
+            )
+        scores[~mask] = -np.inf
+
+        pool = top_k * rescore_factor if rescore and self.quantization != 'float32' else top_k
+        pool = min(pool, int(mask.sum()))
+        if pool == 0:
+            return []
+
+        candidates = np.argpartition(-scores, pool - 1)[:pool]
+        vectors = None
+        if rescore and self.quantization != 'float32' or include_values:
+            vectors = self._float_rows(np.sort(candidates))
+            order = np.argsort(np.argsort(candidates))
+            vectors = vectors[order]
+            if rescore and self.quantization != 'float32':
+                scores[candidates] = vectors @ query
+
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')][:top_k]
+
+        results = []
+        for position in ranked:
+            result = {
+                'id': self.ids[position],
+                'score': float(scores[position]),
+                'metadata': self.metadata[position]
+            }
+            if include_values:
+                result['values'] = vectors[np.where(candidates == position)[0][0]]
+            results.append(result)
+
+        return results
+
+    def close(self) -> None:
+        """Release the float32 memory map and remove a temporary root."""
+        self._floats = None
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def save(self) -> None:
+        """Persist ids, metadata and codes next to the float32 file."""
+        np.save(self.root / 'codes.npy', self._codes)
+        np.save(self.root / 'scales.npy', self._scales)
+        np.save(self.root / 'alive.npy', self._alive)
+        with open(self.root / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'dimension': self.dimension,
+                'quantization': self.quantization,
+                'ids': self.ids,
+                'metadata': self.metadata
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, root: Path) -> 'LocalIndex':
+        """Load an index written by save()."""
+        root = Path(root)
+        with open(root / cls.META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        index = cls(meta['dimension'], meta['quantization'], root, keep_vectors=True)
+        index.ids = meta['ids']
+        index.metadata = meta['metadata']
+        index._codes = np.load(root / 'codes.npy')
+        index._scales = np.load(root / 'scales.npy')
+        index._alive = np.load(root / 'alive.npy')
+        index._positions = {
+            vector_id: i for i, vector_id in enumerate(index.ids) if index._alive[i]
+        }
+        return index
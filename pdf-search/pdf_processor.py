@@ -8,7 +8,7 @@ import json
 import re
 import requests
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional
 from datetime import datetime
 
 try:
@@ -16,13 +16,14 @@ try:
 except ImportError:
     PyPDF2 = None
 
-try:
-    import pdfplumber
-except ImportError:
-    pdfplumber = None
-
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from config import Config
+from boilerplate import strip_boilerplate
+from extraction_cache import ExtractionCache, config_key, content_hash
+from extractors import (
+    EXTRACTORS, available_extractors, extractor_config, get_extractor, repair_pages, select_extractor
+)
+from instrumentation import increment, stage
 
 
 class PDFProcessor:
@@ -32,7 +33,10 @@ class PDFProcessor:
         self,
         chunk_size: int = Config.CHUNK_SIZE,
         chunk_overlap: int = Config.CHUNK_OVERLAP,
-        max_chunks: int = Config.MAX_CHUNKS_PER_PDF
+        max_chunks: int = Config.MAX_CHUNKS_PER_PDF,
+        extraction_cache: Optional[ExtractionCache] = None,
+        reuse_downloads: bool = True,
+        remove_boilerplate: bool = Config.STRIP_BOILERPLATE
     ):
         """
         Initialize PDF processor.
@@ -41,11 +45,22 @@ class PDFProcessor:
             chunk_size: Size of each text chunk in characters
             chunk_overlap: Overlap between consecutive chunks
             max_chunks: Maximum chunks per PDF (safety limit)
+            extraction_cache: Cache for extracted pages (defaults to one under
+                              Config.CACHE_DIR if Config.EXTRACTION_CACHE is on)
+            reuse_downloads: Skip downloading sources whose extraction is cached
+                             and whose validator is unchanged
+            remove_boilerplate: Strip running headers and footers before chunking
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.max_chunks = max_chunks
 
+        if extraction_cache is None and Config.EXTRACTION_CACHE:
+            extraction_cache = ExtractionCache()
+        self.extraction_cache = extraction_cache
+        self.reuse_downloads = reuse_downloads
+        self.remove_boilerplate = remove_boilerplate
+
         # Initialize text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
@@ -54,6 +69,11 @@ class PDFProcessor:
             separators=["\n\n", "\n", ". ", " ", ""]
         )
 
+    @staticmethod
+    def google_drive_url(file_id: str) -> str:
+        """Google Drive direct download URL of a file."""
+        return f"https://drive.google.com/uc?export=download&id={file_id}"
+
     def download_from_google_drive(
         self,
         file_id: str,
@@ -69,14 +89,15 @@ class PDFProcessor:
         Returns:
             PDF content as bytes
         """
-        # Google Drive direct download URL
-        url = f"https://drive.google.com/uc?export=download&id={file_id}"
+        url = self.google_drive_url(file_id)
 
         try:
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
+            with stage('download', source='google_drive') as fields:
+                response = requests.get(url, timeout=60)
+                response.raise_for_status()
 
-            pdf_content = response.content
+                pdf_content = response.content
+                fields['bytes'] = len(pdf_content)
 
             # Save to file if requested
             if output_path:
@@ -267,126 +288,265 @@ class PDFProcessor:
 
         return None
 
-    def extract_text_pypdf2(self, pdf_content: bytes) -> str:
+    def _page_records(self, page_texts: List[Optional[str]], pdf_content: bytes) -> List[Dict[str, Any]]:
         """
-        Extract text using PyPDF2.
+        Attach page labels to per-page texts.
 
         Args:
-            pdf_content: PDF file content as bytes
+            page_texts: Text of each PDF page (None or empty pages are skipped)
+            pdf_content: PDF file content as bytes (for page labels)
 
         Returns:
-            Extracted text
+            List of {'pdf_page' (1-based), 'label', 'text'}
         """
-        if PyPDF2 is None:
-            raise ImportError("PyPDF2 is not installed. Run: pip install PyPDF2")
+        # First, try to get page labels from PDF metadata
+        page_labels = self._get_page_labels_from_pdf(pdf_content)
+
+        records = []
+        for page_num, page_text in enumerate(page_texts):
+            if not page_text:
+                continue
+            pdf_page = page_num + 1  # 1-based PDF page number
+
+            # Priority 1: Use page label from PDF metadata
+            if page_num in page_labels:
+                page_label = page_labels[page_num]
+            else:
+                # Priority 2: Try to extract from header/footer
+                # Fallback: Use PDF page number
+                page_label = self._extract_printed_page_number(page_text) or pdf_page
+
+            records.append({'pdf_page': pdf_page, 'label': str(page_label), 'text': page_text})
+
+        return records
+
+    def _clean_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Strip running headers and footers from page records, if enabled."""
+        if not self.remove_boilerplate:
+            return records
+        records, removed = strip_boilerplate(records)
+        if removed:
+            print(f"Stripped {removed} running header/footer lines")
+            increment('boilerplate_lines_stripped', removed)
+        return records
+
+    def _format_pages(self, records: List[Dict[str, Any]]) -> str:
+        """Join page records into text with '--- Page <label> (PDF <n>) ---' markers."""
+        return "\n\n".join(
+            f"--- Page {record['label']} (PDF {record['pdf_page']}) ---\n{record['text']}"
+            for record in records
+        )
 
-        text = []
-        pdf_file = io.BytesIO(pdf_content)
+    def _extract_pages(self, pdf_content: bytes, backend: str) -> List[Optional[str]]:
+        extractor = get_extractor(backend)
+        extractor.require()
 
         try:
-            reader = PyPDF2.PdfReader(pdf_file)
-
-            # First, try to get page labels from PDF metadata
-            page_labels = self._get_page_labels_from_pdf(pdf_content)
-
-            for page_num, page in enumerate(reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        pdf_page = page_num + 1  # 1-based PDF page number
-
-                        # Priority 1: Use page label from PDF metadata
-                        if page_num in page_labels:
-                            page_label = page_labels[page_num]
-                            text.append(f"--- Page {page_label} (PDF {pdf_page}) ---\n{page_text}")
-                        else:
-                            # Priority 2: Try to extract from header/footer
-                            printed_page = self._extract_printed_page_number(page_text)
-                            if printed_page:
-                                text.append(f"--- Page {printed_page} (PDF {pdf_page}) ---\n{page_text}")
-                            else:
-                                # Fallback: Use PDF page number
-                                text.append(f"--- Page {pdf_page} (PDF {pdf_page}) ---\n{page_text}")
-                except Exception as e:
-                    print(f"Warning: Could not extract page {page_num + 1}: {e}")
-
-            return "\n\n".join(text)
-
+            return extractor.extract_pages(pdf_content)
         except Exception as e:
-            raise Exception(f"Failed to extract text with PyPDF2: {e}")
+            raise Exception(f"Failed to extract text with {backend}: {e}")
 
-    def extract_text_pdfplumber(self, pdf_content: bytes) -> str:
+    def extract_text_with(self, pdf_content: bytes, backend: str) -> str:
         """
-        Extract text using pdfplumber (usually better quality).
+        Extract text with one extractor backend (no page repair).
 
         Args:
             pdf_content: PDF file content as bytes
+            backend: Registered extractor name (see extractors.EXTRACTORS)
 
         Returns:
             Extracted text
         """
-        if pdfplumber is None:
-            raise ImportError("pdfplumber is not installed. Run: pip install pdfplumber")
+        return self._format_pages(self._page_records(self._extract_pages(pdf_content, backend), pdf_content))
 
-        text = []
-        pdf_file = io.BytesIO(pdf_content)
+    def extract_text_pypdf2(self, pdf_content: bytes) -> str:
+        """
+        Extract text using PyPDF2.
 
-        try:
-            # First, try to get page labels from PDF metadata
-            page_labels = self._get_page_labels_from_pdf(pdf_content)
+        Args:
+            pdf_content: PDF file content as bytes
 
-            with pdfplumber.open(pdf_file) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            pdf_page = page_num + 1  # 1-based PDF page number
-
-                            # Priority 1: Use page label from PDF metadata
-                            if page_num in page_labels:
-                                page_label = page_labels[page_num]
-                                text.append(f"--- Page {page_label} (PDF {pdf_page}) ---\n{page_text}")
-                            else:
-                                # Priority 2: Try to extract from header/footer
-                                printed_page = self._extract_printed_page_number(page_text)
-                                if printed_page:
-                                    text.append(f"--- Page {printed_page} (PDF {pdf_page}) ---\n{page_text}")
-                                else:
-                                    # Fallback: Use PDF page number
-                                    text.append(f"--- Page {pdf_page} (PDF {pdf_page}) ---\n{page_text}")
-                    except Exception as e:
-                        print(f"Warning: Could not extract page {page_num + 1}: {e}")
+        Returns:
+            Extracted text
+        """
+        return self.extract_text_with(pdf_content, 'pypdf2')
 
-            return "\n\n".join(text)
+    def extract_text_pdfplumber(self, pdf_content: bytes) -> str:
+        """
+        Extract text using pdfplumber (careful layout analysis, slow).
 
-        except Exception as e:
-            raise Exception(f"Failed to extract text with pdfplumber: {e}")
+        Args:
+            pdf_content: PDF file content as bytes
+
+        Returns:
+            Extracted text
+        """
+        return self.extract_text_with(pdf_content, 'pdfplumber')
 
     def extract_text(
         self,
         pdf_content: bytes,
-        method: str = "pdfplumber"
+        method: str = Config.PDF_EXTRACTOR
     ) -> str:
         """
         Extract text from PDF using specified method.
 
         Args:
             pdf_content: PDF file content as bytes
-            method: Extraction method ('pdfplumber' or 'pypdf2')
+            method: Extraction method ('auto' or a name in extractors.EXTRACTORS)
 
         Returns:
-            Extracted text
+            Extracted text with '--- Page <label> (PDF <n>) ---' markers
         """
-        if method == "pdfplumber":
+        return self._format_pages(self._clean_records(self.extract_page_records(pdf_content, method)))
+
+    def extract_page_records(
+        self,
+        pdf_content: bytes,
+        method: str = Config.PDF_EXTRACTOR
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract labeled page records from PDF using specified method.
+
+        'auto' extracts a few sample pages with every installed backend and
+        uses the fastest one whose text quality is close to the best. Pages
+        that come back empty or garbled (see extractors.page_issue) are
+        re-extracted with the other backends. If the chosen backend cannot
+        read the document at all, the other installed backends are tried in
+        turn.
+
+        Args:
+            pdf_content: PDF file content as bytes
+            method: Extraction method ('auto' or a name in extractors.EXTRACTORS:
+                'pypdfium2', 'pdfminer', 'pdfplumber', 'pypdf2')
+
+        Returns:
+            List of {'pdf_page' (1-based), 'label', 'text'} for non-empty pages
+        """
+        if method != 'auto' and method not in EXTRACTORS:
+            raise ValueError(f"Unknown extraction method: {method}")
+
+        if method == 'auto':
+            backend, scores = select_extractor(pdf_content)
+            increment('extract_auto_selected', method=backend)
+            print(f"Auto-selected {backend} extractor "
+                  f"(quality {scores[backend]['quality']:.2f}, "
+                  f"{scores[backend]['seconds_per_page'] * 1000:.1f} ms/page)")
+        else:
+            backend = method
+
+        fallbacks = [name for name in available_extractors() if name != backend]
+        with stage('extract', method=backend) as fields:
+            fields['bytes'] = len(pdf_content)
             try:
-                return self.extract_text_pdfplumber(pdf_content)
-            except (ImportError, Exception) as e:
-                print(f"pdfplumber failed ({e}), falling back to PyPDF2")
-                return self.extract_text_pypdf2(pdf_content)
-        elif method == "pypdf2":
-            return self.extract_text_pypdf2(pdf_content)
+                page_texts = self._extract_pages(pdf_content, backend)
+            except Exception as e:
+                if not fallbacks:
+                    raise
+                last_error = e
+                page_texts = None
+                for fallback in fallbacks:
+                    print(f"{backend} failed ({last_error}), falling back to {fallback}")
+                    increment('extract_fallbacks', method=backend)
+                    try:
+                        page_texts = self._extract_pages(pdf_content, fallback)
+                        break
+                    except Exception as e:
+                        backend, last_error = fallback, e
+                if page_texts is None:
+                    raise last_error
+
+            page_texts, repaired = repair_pages(pdf_content, page_texts, backend)
+            if repaired:
+                print(f"Re-extracted {len(repaired)} pages with other extractors: "
+                      f"{', '.join(f'PDF {index + 1} ({name})' for index, name in sorted(repaired.items()))}")
+                increment('extract_repaired_pages', len(repaired), method=backend)
+
+            records = self._page_records(page_texts, pdf_content)
+            fields['pages'] = len(records)
+            fields['characters'] = sum(len(record['text']) for record in records)
+
+        return records
+
+    @staticmethod
+    def source_validator(url: str) -> Optional[str]:
+        """
+        Cheap fingerprint of a remote file from a HEAD request.
+
+        Args:
+            url: Download URL
+
+        Returns:
+            ETag, Last-Modified and Content-Length joined by '|', or None if
+            the request failed or the server sent none of them
+        """
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=15)
+            response.raise_for_status()
+        except requests.RequestException:
+            return None
+
+        headers = [response.headers.get(name, '') for name in ('ETag', 'Last-Modified', 'Content-Length')]
+        if not any(headers):
+            return None
+        return '|'.join(headers)
+
+    def _extract_cached(
+        self,
+        source: str,
+        download: Callable[[], bytes],
+        method: str = Config.PDF_EXTRACTOR,
+        url: Optional[str] = None
+    ) -> str:
+        """
+        Download and extract a PDF, reusing cached page records when possible.
+
+        With reuse_downloads, a source whose content hash is known, whose
+        validator (see source_validator) is unchanged and whose extraction is
+        cached for this configuration is not downloaded at all. Otherwise the
+        PDF is downloaded and its hash looked up, so unchanged content is
+        still not re-extracted.
+
+        Args:
+            source: Stable source identifier (URL or Drive file ID)
+            download: Function returning the PDF bytes
+            method: Extraction method
+            url: Download URL to validate the cached copy against (without
+                 one the source is always downloaded)
+
+        Returns:
+            Extracted text
+        """
+        cache = self.extraction_cache
+        if cache is None:
+            pdf_content = download()
+            print(f"Extracting text using {method}...")
+            return self.extract_text(pdf_content, method=method)
+
+        key = config_key(extractor_config(method))
+        validator = self.source_validator(url) if url else None
+        if self.reuse_downloads:
+            digest = cache.source_hash(source, validator)
+            records = cache.get(digest, key) if digest else None
+            if records is not None:
+                print(f"Using cached extraction ({len(records)} pages, {digest[:12]})")
+                increment('extraction_cache_hits', reused='download')
+                return self._format_pages(self._clean_records(records))
+
+        pdf_content = download()
+        digest = content_hash(pdf_content)
+        cache.remember_source(source, digest, validator)
+
+        records = cache.get(digest, key)
+        if records is not None:
+            print(f"Using cached extraction ({len(records)} pages, {digest[:12]})")
+            increment('extraction_cache_hits', reused='content')
         else:
-            raise ValueError(f"Unknown extraction method: {method}")
+            print(f"Extracting text using {method}...")
+            records = self.extract_page_records(pdf_content, method=method)
+            cache.put(digest, key, records)
+
+        return self._format_pages(self._clean_records(records))
 
     def _extract_page_numbers(self, text: str) -> Dict[str, Any]:
         """
@@ -468,6 +628,21 @@ class PDFProcessor:
         Returns:
             List of chunk dictionaries
         """
+        with stage('chunking') as fields:
+            fields['document_id'] = document_id
+            chunks = self._chunk_text(text, document_id, metadata)
+            fields['chunks'] = len(chunks)
+            fields['characters'] = len(text)
+
+        return chunks
+
+    def _chunk_text(
+        self,
+        text: str,
+        document_id: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Split text into chunk dicts (see chunk_text)."""
         # Split text into chunks
         text_chunks = self.text_splitter.split_text(text)
 
@@ -479,9 +654,18 @@ class PDFProcessor:
 
         # Create chunk objects
         chunks = []
+        search_from = 0
         for i, chunk_text in enumerate(text_chunks):
             chunk_id = f"{document_id}#chunk_{i+1}"
 
+            # Locate the chunk in the source text (overlap means the next
+            # chunk starts at most chunk_overlap characters before this end)
+            start_index = text.find(chunk_text, search_from)
+            if start_index == -1:
+                start_index = text.find(chunk_text)
+            if start_index != -1:
+                search_from = max(0, start_index + len(chunk_text) - self.chunk_overlap)
+
             chunk_metadata = {
                 'document_id': document_id,
                 'chunk_number': i + 1,
@@ -500,11 +684,15 @@ class PDFProcessor:
             if metadata:
                 chunk_metadata.update(metadata)
 
-            chunks.append({
+            chunk = {
                 'id': chunk_id,
                 'text': chunk_text,  # Full text for embedding
                 'metadata': chunk_metadata
-            })
+            }
+            if start_index != -1:
+                chunk['start_index'] = start_index  # Character offset in document text
+
+            chunks.append(chunk)
 
         return chunks
 
@@ -513,7 +701,7 @@ class PDFProcessor:
         file_id: str,
         document_id: str,
         metadata: Optional[Dict[str, Any]] = None,
-        extraction_method: str = "pdfplumber"
+        extraction_method: str = Config.PDF_EXTRACTOR
     ) -> List[Dict[str, Any]]:
         """
         Complete pipeline: download, extract, chunk.
@@ -527,11 +715,14 @@ class PDFProcessor:
         Returns:
             List of chunks ready for indexing
         """
-        print(f"Downloading PDF from Google Drive (ID: {file_id})...")
-        pdf_content = self.download_from_google_drive(file_id)
+        def download() -> bytes:
+            print(f"Downloading PDF from Google Drive (ID: {file_id})...")
+            return self.download_from_google_drive(file_id)
 
-        print(f"Extracting text using {extraction_method}...")
-        text = self.extract_text(pdf_content, method=extraction_method)
+        text = self._extract_cached(
+            f"gdrive:{file_id}", download, method=extraction_method,
+            url=self.google_drive_url(file_id)
+        )
 
         if not text or len(text.strip()) < 100:
             raise Exception("Failed to extract meaningful text from PDF")
@@ -556,42 +747,88 @@ class PDFProcessor:
             PDF content as bytes
         """
         try:
-            response = requests.get(url, timeout=60)
-            response.raise_for_status()
+            with stage('download', source='url') as fields:
+                response = requests.get(url, timeout=60)
+                response.raise_for_status()
+                fields['bytes'] = len(response.content)
             return response.content
         except requests.RequestException as e:
             raise Exception(f"Failed to download PDF from {url}: {e}")
 
-    def process_pdf_from_manifest(
+    def _load_material(
         self,
         material_id: str,
         manifest_path: Path = Config.MANIFEST_PATH
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
+        """Find a material entry in manifest.json (ValueError if missing)."""
+        # Load manifest
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        # Find material
+        for mat in manifest.get('materials', []):
+            if mat['id'] == material_id:
+                return mat
+
+        raise ValueError(f"Material '{material_id}' not found in manifest")
+
+    def extract_material_text(
+        self,
+        material_id: str,
+        manifest_path: Path = Config.MANIFEST_PATH
+    ) -> str:
         """
-        Process a PDF using information from manifest.json.
+        Download (or load from the extraction cache) and extract a manifest PDF.
 
         Args:
             material_id: Material ID from manifest
             manifest_path: Path to manifest.json
 
         Returns:
-            List of chunks ready for indexing
+            Extracted text with page markers
         """
-        # Load manifest
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+        raw_url = self._load_material(material_id, manifest_path).get('raw_url', '')
 
-        # Find material
-        material = None
-        for mat in manifest.get('materials', []):
-            if mat['id'] == material_id:
-                material = mat
-                break
+        # Determine URL type and download accordingly
+        if 'firebasestorage.googleapis.com' in raw_url:
+            # Firebase Storage URL - download directly
+            def download() -> bytes:
+                print(f"Downloading PDF from Firebase Storage...")
+                return self.download_from_url(raw_url)
+
+            return self._extract_cached(raw_url, download, method=Config.PDF_EXTRACTOR, url=raw_url)
+
+        elif 'drive.google.com' in raw_url or 'id=' in raw_url:
+            # Google Drive URL - extract file ID
+            file_id = raw_url.split('id=')[1].split('&')[0]
+
+            def download() -> bytes:
+                print(f"Downloading PDF from Google Drive (ID: {file_id})...")
+                return self.download_from_google_drive(file_id)
 
-        if not material:
-            raise ValueError(f"Material '{material_id}' not found in manifest")
+            return self._extract_cached(
+                f"gdrive:{file_id}", download, method=Config.PDF_EXTRACTOR,
+                url=self.google_drive_url(file_id)
+            )
+        else:
+            raise ValueError(f"Unsupported URL type: {raw_url}")
+
+    def material_metadata(
+        self,
+        material_id: str,
+        manifest_path: Path = Config.MANIFEST_PATH
+    ) -> Dict[str, Any]:
+        """
+        Chunk metadata for a manifest material.
+
+        Args:
+            material_id: Material ID from manifest
+            manifest_path: Path to manifest.json
 
-        raw_url = material.get('raw_url', '')
+        Returns:
+            Document-level metadata added to every chunk
+        """
+        material = self._load_material(material_id, manifest_path)
 
         # Prepare metadata
         metadata = {
@@ -608,37 +845,37 @@ class PDFProcessor:
         if 'sections' in material:
             metadata['sections'] = json.dumps(material['sections'])
 
-        # Determine URL type and download accordingly
-        if 'firebasestorage.googleapis.com' in raw_url:
-            # Firebase Storage URL - download directly
-            print(f"Downloading PDF from Firebase Storage...")
-            pdf_content = self.download_from_url(raw_url)
+        return metadata
 
-            print(f"Extracting text using pdfplumber...")
-            text = self.extract_text(pdf_content, method="pdfplumber")
+    def process_pdf_from_manifest(
+        self,
+        material_id: str,
+        manifest_path: Path = Config.MANIFEST_PATH
+    ) -> List[Dict[str, Any]]:
+        """
+        Process a PDF using information from manifest.json.
 
-            if not text or len(text.strip()) < 100:
-                raise Exception("Failed to extract meaningful text from PDF")
+        Args:
+            material_id: Material ID from manifest
+            manifest_path: Path to manifest.json
 
-            print(f"Extracted {len(text)} characters")
+        Returns:
+            List of chunks ready for indexing
+        """
+        metadata = self.material_metadata(material_id, manifest_path)
+        text = self.extract_material_text(material_id, manifest_path)
 
-            print("Chunking text...")
-            chunks = self.chunk_text(text, material_id, metadata)
+        if not text or len(text.strip()) < 100:
+            raise Exception("Failed to extract meaningful text from PDF")
 
-            print(f"Created {len(chunks)} chunks")
+        print(f"Extracted {len(text)} characters")
 
-            return chunks
+        print("Chunking text...")
+        chunks = self.chunk_text(text, material_id, metadata)
 
-        elif 'drive.google.com' in raw_url or 'id=' in raw_url:
-            # Google Drive URL - extract file ID
-            file_id = raw_url.split('id=')[1].split('&')[0]
-            return self.process_pdf_from_drive(
-                file_id=file_id,
-                document_id=material_id,
-                metadata=metadata
-            )
-        else:
-            raise ValueError(f"Unsupported URL type: {raw_url}")
+        print(f"Created {len(chunks)} chunks")
+
+        return chunks
 
 
 if __name__ == "__main__":
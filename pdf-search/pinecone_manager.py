@@ -3,22 +3,63 @@ Pinecone Manager for vector operations.
 Handles index creation, upsert, search, and deletion.
 """
 
+import re
 import time
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import numpy as np
 from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
 from config import Config
+from boilerplate import embedding_text
+from chunk_store import ChunkStore
+from dedup import DuplicateIndex
+from diversify import candidate_count, collapse_adjacent, mmr
+from embedding_cache import EmbeddingCache
+from embeddings import EmbeddingEngine, load_embedding_model
+from hierarchy import build_summaries, section_filter
+from instrumentation import increment, observe, stage
+from reranker import Reranker
+from upsert_batching import (
+    MAX_REQUEST_VECTORS, PartialUpsertError, backoff_delay, batch_end,
+    call_with_retries, estimate_vector_bytes, is_size_error, is_transient_error
+)
+
+# Pinecone limits: IDs per list page and per delete request
+LIST_PAGE_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+# Metadata fields vectors can be sharded by, and the namespace separator:
+# chunks of course 'Politik 1' go to '<namespace>__politik-1'
+SHARD_FIELDS = ('course', 'learning_unit')
+SHARD_SEPARATOR = '__'
+
+# Concurrent shard queries per search
+MAX_FANOUT = 8
+
+# Section and document summary vectors of '<namespace>' live in 'summary__<namespace>'
+SUMMARY_PREFIX = 'summary__'
 
 
 class PineconeManager:
     """Manages all Pinecone vector database operations."""
 
+    # Seconds to wait after writes for eventual consistency
+    CONSISTENCY_WAIT = 1.0
+
+    # Seconds between readiness checks after creating an index
+    READY_POLL_INTERVAL = 1.0
+
     def __init__(
         self,
         api_key: Optional[str] = None,
         index_name: Optional[str] = None,
         namespace: Optional[str] = None,
-        embedding_model: Optional[str] = None
+        embedding_model: Optional[str] = None,
+        chunk_store: Optional[ChunkStore] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        client: Optional[Any] = None,
+        dedup_index: Optional[DuplicateIndex] = None,
+        reranker: Optional[Reranker] = None
     ):
         """
         Initialize Pinecone manager.
@@ -28,24 +69,60 @@ class PineconeManager:
             index_name: Index name (defaults to Config.PINECONE_INDEX_NAME)
             namespace: Namespace (defaults to Config.PINECONE_NAMESPACE)
             embedding_model: Model name for embeddings (defaults to Config.EMBEDDING_MODEL)
+            chunk_store: Local store for document text and metadata
+                         (defaults to ChunkStore at Config.CHUNK_STORE_DIR)
+            embedding_cache: Cache for chunk embeddings (defaults to one
+                             configured by Config.EMBEDDING_CACHE, or none)
+            client: Pinecone-compatible client to use instead of connecting
+                    with the API key (e.g. fake_pinecone.FakePinecone)
+            dedup_index: Near-duplicate chunk index (defaults to one per index
+                         and namespace when Config.DEDUP is not 'off')
+            reranker: Cross-encoder re-ranker for search (defaults to one for
+                      Config.RERANK_MODEL, loaded on first use)
         """
         self.api_key = api_key or Config.PINECONE_API_KEY
         self.index_name = index_name or Config.PINECONE_INDEX_NAME
         self.namespace = namespace or Config.PINECONE_NAMESPACE
         self.embedding_model_name = embedding_model or Config.EMBEDDING_MODEL
 
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("Pinecone API key is required")
 
         # Initialize Pinecone client
-        self.pc = Pinecone(api_key=self.api_key)
+        self.pc = client or Pinecone(api_key=self.api_key)
         self.index = None
 
+        # Local store keeps full text and document metadata out of Pinecone
+        self.chunk_store = chunk_store or ChunkStore()
+
         # Initialize embedding model
-        print(f"Loading embedding model: {self.embedding_model_name}...")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        print(f"Loading embedding model: {self.embedding_model_name} ({Config.EMBEDDING_BACKEND})...")
+        self.embedding_model = load_embedding_model(self.embedding_model_name)
+        self.embedder = EmbeddingEngine(self.embedding_model)
         print("✓ Embedding model loaded")
 
+        if embedding_cache is None and Config.EMBEDDING_CACHE != 'off':
+            backend = Config.EMBEDDING_BACKEND
+            if backend == 'onnx' and Config.ONNX_QUANTIZE:
+                backend += '-int8'
+            embedding_cache = EmbeddingCache(
+                f"{self.embedding_model_name}.{backend}", quantization=Config.EMBEDDING_CACHE
+            )
+        self.embedding_cache = embedding_cache
+
+        if dedup_index is None and Config.DEDUP != 'off':
+            dedup_index = DuplicateIndex(f"{self.index_name}.{self.namespace}")
+        self.dedup_index = dedup_index
+
+        self.reranker = reranker
+
+        # Byte budget per upsert request; halved when the server rejects a size
+        self.upsert_max_bytes = Config.UPSERT_MAX_BYTES
+
+        # Shard namespaces of self.namespace, loaded from index stats on first use
+        self._shards: Optional[set] = None
+        self.summary_namespace = f"{SUMMARY_PREFIX}{self.namespace}"
+
     def create_index(
         self,
         dimension: int = Config.EMBEDDING_DIMENSION,
@@ -81,10 +158,16 @@ class PineconeManager:
         # Wait for index to be ready
         while not self.pc.describe_index(self.index_name).status['ready']:
             print("Waiting for index to be ready...")
-            time.sleep(1)
+            time.sleep(self.READY_POLL_INTERVAL)
 
         print(f"✓ Index '{self.index_name}' created successfully")
 
+    def get_reranker(self) -> Reranker:
+        """Get or load the cross-encoder re-ranker."""
+        if self.reranker is None:
+            self.reranker = Reranker()
+        return self.reranker
+
     def get_index(self):
         """Get or connect to the index."""
         if self.index is None:
@@ -97,45 +180,174 @@ class PineconeManager:
 
         return self.index
 
-    def embed_texts(self, texts: List[str], show_progress: bool = False) -> List[List[float]]:
+    def embed_texts(
+        self,
+        texts: List[str],
+        show_progress: bool = False,
+        use_cache: bool = True
+    ) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
 
         Args:
             texts: List of text strings to embed
             show_progress: Show progress bar
+            use_cache: Read and write the embedding cache, if configured
 
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), dimension)
         """
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=show_progress,
-            convert_to_numpy=True
-        )
-        return embeddings.tolist()
+        self.embedder.last_stats = {}
+        cache = self.embedding_cache if use_cache else None
+        embeddings, misses = (None, list(range(len(texts))))
+        if cache is not None:
+            embeddings, misses = cache.lookup(texts)
+
+        if misses:
+            computed = self.embedder.encode(
+                [texts[i] for i in misses],
+                show_progress=show_progress
+            )
+
+            if embeddings is None:
+                embeddings = computed
+            else:
+                embeddings[misses] = computed
+
+            if cache is not None:
+                cache.store([texts[i] for i in misses], computed)
+
+        if embeddings is None:
+            dimension = self.embedding_model.get_sentence_embedding_dimension() or Config.EMBEDDING_DIMENSION
+            embeddings = np.zeros((0, dimension), dtype=np.float32)
+        return embeddings
+
+    def embed_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        show_progress: bool = True,
+        skip_ids: Optional[set] = None
+    ) -> np.ndarray:
+        """
+        Embed chunk texts into one contiguous float32 matrix.
+
+        Page markers are left out of the embedded text; they only carry
+        page attribution, which is already in the chunk metadata.
+
+        Args:
+            chunks: List of chunk dicts with 'text'
+            show_progress: Show progress bar
+            skip_ids: Chunk IDs not to embed (e.g. near-duplicates); their
+                      rows are left zero so the matrix stays aligned with chunks
+
+        Returns:
+            float32 array of shape (len(chunks), dimension)
+        """
+        print("Generating embeddings...")
+        todo = [i for i, chunk in enumerate(chunks) if not skip_ids or chunk['id'] not in skip_ids]
+        texts = [embedding_text(chunks[i]['text']) for i in todo]
+        with stage('embed', backend=Config.EMBEDDING_BACKEND) as fields:
+            embedded = self.embed_texts(texts, show_progress=show_progress)
+            if len(todo) == len(chunks):
+                embeddings = np.ascontiguousarray(embedded, dtype=np.float32)
+            else:
+                dimension = self.embedding_model.get_sentence_embedding_dimension() or Config.EMBEDDING_DIMENSION
+                embeddings = np.zeros((len(chunks), dimension), dtype=np.float32)
+                if todo:
+                    embeddings[todo] = embedded
+            embed_stats = self.embedder.last_stats
+            fields['chunks'] = len(texts)
+            fields['cache_hits'] = len(texts) - embed_stats.get('chunks', 0)
+            fields['tokens'] = embed_stats.get('tokens', 0)
+        if embed_stats.get('chunks'):
+            print(f"Embedded {embed_stats['chunks']} chunks in {embed_stats['seconds']:.1f}s "
+                  f"({embed_stats['chunks_per_second']:.1f} chunks/s)")
+
+        return embeddings
+
+    def find_duplicates(
+        self,
+        chunks: List[Dict[str, Any]],
+        shard_by: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Find chunks whose text is already indexed, before embedding them.
+
+        Chunks are compared by MinHash signature against the duplicate index
+        (chunks upserted in earlier runs) and against earlier chunks of the
+        same call. Only chunks routed to the same namespace match, so every
+        shard keeps its own copy of shared text.
+
+        Args:
+            chunks: List of chunk dicts with 'id', 'text' and 'metadata'
+            shard_by: Shard field, '' for none (defaults to Config.SHARD_BY)
+
+        Returns:
+            {duplicate chunk ID: original chunk ID}; empty when
+            deduplication is off
+        """
+        if self.dedup_index is None:
+            return {}
+
+        shard_by = Config.SHARD_BY if shard_by is None else shard_by
+        with stage('dedup') as fields:
+            duplicates = self.dedup_index.match(
+                [chunk['id'] for chunk in chunks],
+                [embedding_text(chunk['text']) for chunk in chunks],
+                [self.shard_namespace(chunk['metadata'], shard_by) for chunk in chunks]
+            )
+            fields['chunks'] = len(chunks)
+            fields['duplicates'] = len(duplicates)
+        if duplicates:
+            print(f"Found {len(duplicates)} near-duplicate chunks of already indexed text")
+        return duplicates
 
     def upsert_chunks(
         self,
         chunks: List[Dict[str, Any]],
-        batch_size: int = 100,
-        show_progress: bool = True
-    ) -> Dict[str, int]:
+        batch_size: Optional[int] = None,
+        show_progress: bool = True,
+        embeddings: Optional[np.ndarray] = None,
+        skip_ids: Optional[set] = None,
+        on_batch: Optional[Callable[[List[str], Optional[Exception]], None]] = None,
+        shard_by: Optional[str] = None,
+        summaries: Optional[bool] = None,
+        duplicates: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
         """
         Upsert document chunks to Pinecone.
 
+        Batches are sized by estimated request bytes (Config.UPSERT_MAX_BYTES)
+        up to batch_size vectors. A batch rejected as too large is split in
+        half and the byte budget lowered; throttling, 5xx and connection
+        errors are retried with jittered exponential backoff. Every chunk
+        ends up either upserted or in 'failed_ids'.
+
         Args:
             chunks: List of chunk dicts with 'id', 'text', and 'metadata'
-            batch_size: Number of chunks to upsert per batch
+            batch_size: Maximum vectors per request (defaults to Config.UPSERT_MAX_BATCH)
             show_progress: Show progress bar
+            embeddings: Precomputed embeddings aligned with chunks
+                        (computed with embed_chunks if None)
+            skip_ids: Chunk IDs already in the index; only the rest are upserted
+            on_batch: Called after every request outcome with (chunk IDs, error or None)
+            shard_by: Metadata field ('course' or 'learning_unit') whose value picks
+                      each chunk's namespace, '' for none (defaults to Config.SHARD_BY)
+            summaries: Also upsert section and document summary vectors for
+                       hierarchical search (defaults to Config.SUMMARY_VECTORS)
+            duplicates: Near-duplicate chunks from find_duplicates(), which are
+                        not embedded or upserted (computed here if None)
 
         Returns:
-            Dict with upsert statistics
+            Dict with upsert statistics, including 'failed_ids', request,
+            retry and split counts, 'duplicates', and 'vectors_per_second'
+            measured over the upsert requests only
 
         Expected chunk format:
         {
             'id': 'doc_id#chunk_1',
             'text': 'chunk text content',
+            'start_index': 0,  # optional character offset in document text
             'metadata': {
                 'document_id': 'doc_id',
                 'document_title': 'Title',
@@ -144,60 +356,361 @@ class PineconeManager:
                 ...
             }
         }
+
+        Full document text and document-level metadata are written to the
+        local chunk store. With Config.SLIM_METADATA, only
+        Config.VECTOR_METADATA_FIELDS are sent to Pinecone.
         """
         index = self.get_index()
 
-        # Generate embeddings for all chunks
-        print("Generating embeddings...")
-        texts = [chunk['text'] for chunk in chunks]
-        embeddings = self.embed_texts(texts, show_progress=show_progress)
-
-        # Prepare vectors for upsert
-        vectors = []
-        for chunk, embedding in zip(chunks, embeddings):
-            vectors.append({
+        shard_by = Config.SHARD_BY if shard_by is None else shard_by
+        if duplicates is None:
+            duplicates = self.find_duplicates(chunks, shard_by)
+
+        # The chunk store always gets the whole document, even when resuming
+        # or when chunks are duplicates (search results show their text)
+        full_chunks = chunks
+        chunks = self.chunk_store.put_chunks(chunks)
+
+        if embeddings is None:
+            embeddings = self.embed_chunks(chunks, show_progress=show_progress, skip_ids=set(duplicates))
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        total = len(chunks)
+        all_embeddings = embeddings
+
+        if skip_ids or duplicates:
+            todo = [
+                i for i, chunk in enumerate(chunks)
+                if chunk['id'] not in duplicates and not (skip_ids and chunk['id'] in skip_ids)
+            ]
+            chunks = [chunks[i] for i in todo]
+            embeddings = embeddings[todo]
+        skipped = total - len(chunks) - len(duplicates)
+
+        groups: Dict[str, List[int]] = {}
+        for i, chunk in enumerate(chunks):
+            groups.setdefault(self.shard_namespace(chunk['metadata'], shard_by), []).append(i)
+
+        max_vectors = min(batch_size or Config.UPSERT_MAX_BATCH, MAX_REQUEST_VECTORS)
+        sizes = [
+            estimate_vector_bytes({
                 'id': chunk['id'],
-                'values': embedding,
+                'values': embeddings[i],
                 'metadata': chunk['metadata']
             })
-
-        # Upsert in batches
+            for i, chunk in enumerate(chunks)
+        ]
+        report = {'requests': 0, 'retries': 0, 'splits': 0, 'bytes': 0}
         total_upserted = 0
-        failed = 0
+        failed_ids: List[str] = []
 
+        progress = None
         if show_progress:
             try:
                 from tqdm import tqdm
-                iterator = tqdm(
-                    range(0, len(vectors), batch_size),
-                    desc="Upserting chunks"
-                )
+                progress = tqdm(total=len(chunks), desc="Upserting chunks", unit='chunk')
             except ImportError:
-                iterator = range(0, len(vectors), batch_size)
-                print(f"Upserting {len(vectors)} chunks in batches of {batch_size}...")
-        else:
-            iterator = range(0, len(vectors), batch_size)
+                print(f"Upserting {len(chunks)} chunks "
+                      f"(up to {max_vectors} per request, {self.upsert_max_bytes // 1024} KiB)...")
+
+        start_time = time.perf_counter()
+        with stage('upsert') as fields:
+            for namespace, positions in groups.items():
+                # Requests never mix namespaces
+                if len(groups) == 1:
+                    group_chunks, group_embeddings, group_sizes = chunks, embeddings, sizes
+                else:
+                    group_chunks = [chunks[i] for i in positions]
+                    group_embeddings = embeddings[positions]
+                    group_sizes = [sizes[i] for i in positions]
+                if self._shards is not None:
+                    self._shards.add(namespace)
+
+                start = 0
+                while start < len(group_chunks):
+                    end = batch_end(group_sizes, start, self.upsert_max_bytes, max_vectors)
+                    for batch_ids, error in self._send_batch(
+                        index, namespace, group_chunks, group_embeddings, group_sizes,
+                        start, end, report
+                    ):
+                        if error is None:
+                            total_upserted += len(batch_ids)
+                        else:
+                            print(f"Error upserting {len(batch_ids)} chunks "
+                                  f"({batch_ids[0]} ... {batch_ids[-1]}): {error}")
+                            increment('upsert_batch_errors')
+                            failed_ids.extend(batch_ids)
+                        if on_batch is not None:
+                            on_batch(batch_ids, error)
+                    if progress is not None:
+                        progress.update(end - start)
+                    start = end
+
+            fields['vectors'] = total_upserted
+            fields['shards'] = len(groups)
+
+            # Summaries cover whole documents, so they are rebuilt from all chunks
+            summary_count = 0
+            summaries = Config.SUMMARY_VECTORS if summaries is None else summaries
+            if duplicates:
+                # Duplicates have no embedding of their own
+                kept = [i for i, chunk in enumerate(full_chunks) if chunk['id'] not in duplicates]
+                full_chunks = [full_chunks[i] for i in kept]
+                all_embeddings = all_embeddings[kept]
+            if summaries and full_chunks:
+                summary_vectors = build_summaries(
+                    full_chunks, all_embeddings,
+                    [self.shard_namespace(chunk['metadata'], shard_by) for chunk in full_chunks]
+                )
+                summary_count = self._upsert_summaries(index, summary_vectors, report)
+            fields['summaries'] = summary_count
+            fields['failed'] = len(failed_ids)
+            fields.update(report)
+        seconds = time.perf_counter() - start_time
+
+        if progress is not None:
+            progress.close()
+
+        if self.dedup_index is not None:
+            failed = set(failed_ids)
+            # Skipped chunks were upserted in an earlier run
+            self.dedup_index.add([chunk['id'] for chunk in full_chunks if chunk['id'] not in failed])
+            self.dedup_index.add_aliases(duplicates)
+            self.dedup_index.save()
+
+        if failed_ids:
+            print(f"✗ {len(failed_ids)} of {len(chunks)} chunks failed to upsert")
+        if duplicates:
+            print(f"Skipped {len(duplicates)} near-duplicate chunks")
+        if chunks:
+            print(f"Upserted {total_upserted} chunks in {seconds:.1f}s "
+                  f"({total_upserted / seconds if seconds > 0 else 0:.1f} chunks/s, "
+                  f"{report['requests']} requests, {report['retries']} retries, "
+                  f"{report['splits']} splits)")
+
+        # Wait for eventual consistency (not counted in the throughput)
+        time.sleep(self.CONSISTENCY_WAIT)
+
+        return {
+            'total': total,
+            'skipped': skipped,
+            'duplicates': len(duplicates),
+            'upserted': total_upserted,
+            'failed': len(failed_ids),
+            'failed_ids': failed_ids,
+            'namespaces': {namespace: len(positions) for namespace, positions in groups.items()},
+            'summaries': summary_count,
+            'seconds': seconds,
+            'vectors_per_second': total_upserted / seconds if seconds > 0 else 0.0,
+            **report
+        }
+
+    def _upsert_summaries(
+        self,
+        index,
+        vectors: List[Dict[str, Any]],
+        report: Dict[str, int]
+    ) -> int:
+        """
+        Upsert summary vectors to the summary namespace.
+
+        Failures are reported but do not fail the chunk upsert; hierarchical
+        search falls back to a flat search for documents without summaries.
 
-        for i in iterator:
-            batch = vectors[i:i + batch_size]
+        Returns:
+            Number of summary vectors upserted
+        """
+        summary_chunks = [{'id': v['id'], 'metadata': v['metadata']} for v in vectors]
+        embeddings = np.stack([v['values'] for v in vectors])
+        sizes = [estimate_vector_bytes(v) for v in vectors]
+
+        upserted = 0
+        start = 0
+        while start < len(vectors):
+            end = batch_end(sizes, start, self.upsert_max_bytes, MAX_REQUEST_VECTORS)
+            for batch_ids, error in self._send_batch(
+                index, self.summary_namespace, summary_chunks, embeddings, sizes, start, end, report
+            ):
+                if error is None:
+                    upserted += len(batch_ids)
+                else:
+                    print(f"Warning: could not upsert {len(batch_ids)} summary vectors: {error}")
+            start = end
+        return upserted
+
+    def _send_batch(
+        self,
+        index,
+        namespace: str,
+        chunks: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        sizes: List[int],
+        start: int,
+        end: int,
+        report: Dict[str, int]
+    ) -> List[tuple]:
+        """
+        Upsert chunks[start:end] as one request, splitting and retrying as needed.
+
+        Args:
+            index: Pinecone index
+            namespace: Target namespace
+            chunks: Chunks to upsert
+            embeddings: float32 matrix aligned with chunks
+            sizes: Estimated request bytes per chunk
+            start: First chunk index of the batch
+            end: End index (exclusive)
+            report: Running request/retry/split/bytes counts, updated in place
+
+        Returns:
+            List of (chunk IDs, error or None), one per request that finished
+        """
+        batch = self._build_batch(chunks, embeddings, start, end)
+        batch_ids = [vector['id'] for vector in batch]
+        batch_bytes = sum(sizes[start:end])
+
+        for attempt in range(Config.UPSERT_MAX_RETRIES + 1):
+            report['requests'] += 1
+            request_start = time.perf_counter()
             try:
-                index.upsert(
-                    vectors=batch,
-                    namespace=self.namespace
+                response = index.upsert(vectors=batch, namespace=namespace)
+                confirmed = (
+                    response.get('upserted_count') if isinstance(response, dict)
+                    else getattr(response, 'upserted_count', None)
                 )
-                total_upserted += len(batch)
+                if confirmed is not None and confirmed != len(batch):
+                    raise PartialUpsertError(
+                        f"index confirmed {confirmed} of {len(batch)} vectors"
+                    )
+                report['bytes'] += batch_bytes
+                return [(batch_ids, None)]
             except Exception as e:
-                print(f"Error upserting batch {i//batch_size}: {e}")
-                failed += len(batch)
+                error = e
+            finally:
+                observe('upsert_batch_seconds', time.perf_counter() - request_start)
+
+            if is_size_error(error) and end - start > 1:
+                # Smaller requests from here on; this batch is sent in halves
+                self.upsert_max_bytes = max(1024, min(self.upsert_max_bytes, batch_bytes // 2))
+                report['splits'] += 1
+                middle = (start + end) // 2
+                return (
+                    self._send_batch(index, namespace, chunks, embeddings, sizes, start, middle, report)
+                    + self._send_batch(index, namespace, chunks, embeddings, sizes, middle, end, report)
+                )
 
-        # Wait for eventual consistency
-        time.sleep(1)
+            if not is_transient_error(error) or attempt == Config.UPSERT_MAX_RETRIES:
+                break
 
-        return {
-            'total': len(chunks),
-            'upserted': total_upserted,
-            'failed': failed
-        }
+            delay = backoff_delay(attempt, Config.UPSERT_BACKOFF_BASE, Config.UPSERT_BACKOFF_MAX)
+            report['retries'] += 1
+            time.sleep(delay)
+
+        return [(batch_ids, error)]
+
+    def shard_namespace(
+        self,
+        metadata: Dict[str, Any],
+        shard_by: Optional[str] = None
+    ) -> str:
+        """
+        Namespace for a chunk under a sharding scheme.
+
+        Args:
+            metadata: Chunk metadata
+            shard_by: Shard field, '' for none (defaults to Config.SHARD_BY)
+
+        Returns:
+            '<namespace>__<value slug>', or the base namespace when sharding
+            is off or the chunk has no value for the field
+        """
+        shard_by = Config.SHARD_BY if shard_by is None else shard_by
+        if not shard_by:
+            return self.namespace
+        if shard_by not in SHARD_FIELDS:
+            raise ValueError(f"Cannot shard by '{shard_by}' (use one of {', '.join(SHARD_FIELDS)})")
+
+        value = str(metadata.get(shard_by) or '')
+        slug = re.sub(r'[^a-z0-9_-]+', '-', value.lower()).strip('-')
+        return f"{self.namespace}{SHARD_SEPARATOR}{slug}" if slug else self.namespace
+
+    def shard_namespaces(self, refresh: bool = False) -> List[str]:
+        """
+        The base namespace and all its shards present in the index.
+
+        Args:
+            refresh: Reload the namespace list from index stats
+
+        Returns:
+            Sorted namespace names
+        """
+        if self._shards is None or refresh:
+            stats = self._with_retries(lambda: self.get_index().describe_index_stats())
+            self._shards = {
+                namespace for namespace in stats.get('namespaces', {})
+                if namespace.startswith(self.namespace + SHARD_SEPARATOR)
+            }
+        return [self.namespace] + sorted(self._shards - {self.namespace})
+
+    def _route(
+        self,
+        filter_metadata: Optional[Dict[str, Any]],
+        shard_by: str
+    ) -> List[str]:
+        """
+        Namespaces a search has to query.
+
+        A filter on the shard field ({field: value}, {'$eq': value} or
+        {'$in': [...]}) selects those shards only; anything else fans out
+        to every shard.
+        """
+        if not shard_by:
+            return [self.namespace]
+
+        condition = (filter_metadata or {}).get(shard_by)
+        values = None
+        if isinstance(condition, (str, int)):
+            values = [condition]
+        elif isinstance(condition, dict) and set(condition) == {'$eq'}:
+            values = [condition['$eq']]
+        elif isinstance(condition, dict) and set(condition) == {'$in'}:
+            values = list(condition['$in'])
+
+        if values is None:
+            return self.shard_namespaces()
+        return sorted({self.shard_namespace({shard_by: value}, shard_by) for value in values})
+
+    @staticmethod
+    def _build_batch(
+        chunks: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        start: int,
+        end: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Build one upsert batch whose values are row views of the embedding matrix.
+
+        No per-float Python objects are created here; the Pinecone client
+        unboxes each row with ndarray.tolist() while serializing, so only
+        the batch being sent is ever materialized as Python floats.
+
+        Args:
+            chunks: Chunks to upsert
+            embeddings: float32 matrix aligned with chunks
+            start: First chunk index of the batch
+            end: End index (exclusive)
+
+        Returns:
+            List of vector dicts for index.upsert
+        """
+        return [
+            {
+                'id': chunk['id'],
+                'values': embeddings[start + offset],
+                'metadata': chunk['metadata']
+            }
+            for offset, chunk in enumerate(chunks[start:end])
+        ]
 
     def search(
         self,
@@ -205,52 +718,294 @@ class PineconeManager:
         top_k: int = Config.DEFAULT_TOP_K,
         filter_metadata: Optional[Dict[str, Any]] = None,
         include_metadata: bool = True,
-        include_values: bool = False
+        include_values: bool = False,
+        expand: int = 0,
+        diversify: Optional[str] = None,
+        mmr_lambda: float = 0.5,
+        shard_by: Optional[str] = None,
+        hierarchical: Optional[bool] = None,
+        sections: int = Config.HIERARCHICAL_SECTIONS,
+        rerank: Optional[bool] = None,
+        rerank_candidates: int = Config.RERANK_CANDIDATES,
+        rerank_budget: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Semantic search across indexed chunks.
 
+        With sharding, a filter on the shard field routes the query to the
+        matching namespaces; otherwise all shards are queried concurrently
+        and the hits merged by score.
+
+        Hierarchical search first ranks section summary vectors, then
+        searches only the chunks of the best sections (and only their
+        namespaces). It falls back to a flat search when no section matches.
+
+        Re-ranking fetches rerank_candidates hits and orders them by a
+        cross-encoder score ('rerank_score') before diversification and the
+        top_k cut; 'score' stays the vector similarity.
+
         Args:
             query: Search query text
             top_k: Number of results to return
             filter_metadata: Metadata filters (e.g., {'document_id': 'doc_001'})
             include_metadata: Include metadata in results
             include_values: Include vector values in results
+            expand: Number of neighbouring chunks on each side to attach as
+                    'context' (read from the local chunk store, no extra queries)
+            diversify: Drop near-duplicate passages before returning top_k:
+                       'collapse' folds hits on adjacent chunks together,
+                       'mmr' applies Maximal Marginal Relevance to the vectors
+            mmr_lambda: Relevance/diversity trade-off for 'mmr'
+            shard_by: Shard field the vectors were upserted with, '' for none
+                      (defaults to Config.SHARD_BY)
+            hierarchical: Two-stage section → chunk search
+                          (defaults to Config.HIERARCHICAL_SEARCH)
+            sections: Sections to search in for hierarchical search
+            rerank: Re-rank candidates with the cross-encoder
+                    (defaults to Config.RERANK)
+            rerank_candidates: Candidate pool to re-rank (at least top_k)
+            rerank_budget: Seconds for re-ranking; candidates not scored in
+                           time keep their vector order after the scored ones
+                           (defaults to Config.RERANK_BUDGET_MS, 0 = no limit)
 
         Returns:
             List of search results with scores and metadata
         """
+        shard_by = Config.SHARD_BY if shard_by is None else shard_by
+        hierarchical = Config.HIERARCHICAL_SEARCH if hierarchical is None else hierarchical
+        rerank = Config.RERANK if rerank is None else rerank
+        if rerank_budget is None and Config.RERANK_BUDGET_MS > 0:
+            rerank_budget = Config.RERANK_BUDGET_MS / 1000
+        with stage('search', diversify=diversify or 'none',
+                   mode='hierarchical' if hierarchical else 'flat') as fields:
+            query_embedding = self.embed_texts([query], use_cache=False)[0]
+            namespaces = self._route(filter_metadata, shard_by)
+
+            if hierarchical:
+                selected = self.search_sections(query_embedding, sections, filter_metadata)
+                if selected:
+                    restriction = section_filter(selected)
+                    filter_metadata = (
+                        {'$and': [filter_metadata, restriction]} if filter_metadata else restriction
+                    )
+                    namespaces = sorted({section.get('namespace') or self.namespace for section in selected})
+                fields['sections'] = len(selected)
+
+            results = self._search(
+                query, top_k, filter_metadata, include_metadata, include_values,
+                expand, diversify, mmr_lambda, namespaces, query_embedding,
+                rerank_candidates if rerank else 0, rerank_budget
+            )
+            fields['results'] = len(results)
+            fields['shards'] = len(namespaces)
+        return results
+
+    def _search(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        include_metadata: bool,
+        include_values: bool,
+        expand: int,
+        diversify: Optional[str],
+        mmr_lambda: float,
+        namespaces: List[str],
+        query_embedding: np.ndarray,
+        rerank_candidates: int = 0,
+        rerank_budget: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a search over the given namespaces (see search; rerank_candidates=0 skips re-ranking)."""
         index = self.get_index()
 
-        # Generate embedding for query
-        query_embedding = self.embed_texts([query])[0]
+        # Diversification and re-ranking need a larger candidate pool
+        fetch_k = candidate_count(diversify, top_k) if diversify else top_k
+        fetch_k = max(fetch_k, rerank_candidates)
+        need_metadata = include_metadata or expand > 0 or diversify is not None
+        need_values = include_values or diversify == 'mmr'
 
         # Search
-        results = index.query(
-            vector=query_embedding,
-            top_k=top_k,
-            filter=filter_metadata,
-            include_metadata=include_metadata,
-            include_values=include_values,
-            namespace=self.namespace
-        )
+        vector = query_embedding.tolist()
+
+        def query_namespace(namespace: str) -> List[Any]:
+            results = index.query(
+                vector=vector,
+                top_k=fetch_k,
+                filter=filter_metadata,
+                include_metadata=need_metadata,
+                include_values=need_values,
+                namespace=namespace
+            )
+            return list(results.get('matches', []))
+
+        if len(namespaces) == 1:
+            matches = query_namespace(namespaces[0])
+        else:
+            # Fan out to the shards and merge their top hits
+            with ThreadPoolExecutor(max_workers=min(len(namespaces), MAX_FANOUT)) as pool:
+                matches = [match for shard in pool.map(query_namespace, namespaces) for match in shard]
+            matches.sort(key=lambda match: match['score'], reverse=True)
+            matches = matches[:fetch_k]
 
         # Format results
         formatted_results = []
-        for match in results.get('matches', []):
+        for match in matches:
             result = {
                 'id': match['id'],
                 'score': match['score'],
             }
-            if include_metadata and 'metadata' in match:
+            if need_metadata and 'metadata' in match:
                 result['metadata'] = match['metadata']
-            if include_values and 'values' in match:
+            if need_values and 'values' in match:
                 result['values'] = match['values']
 
             formatted_results.append(result)
 
+        if rerank_candidates:
+            texts = self.chunk_store.get_texts([result['id'] for result in formatted_results])
+            for result in formatted_results:
+                if result['id'] not in texts and result.get('metadata', {}).get('chunk_text'):
+                    texts[result['id']] = result['metadata']['chunk_text']
+            formatted_results = self.get_reranker().rerank(
+                query, formatted_results, texts, rerank_budget
+            )
+
+        if diversify == 'collapse':
+            formatted_results = collapse_adjacent(formatted_results, top_k)
+        elif diversify == 'mmr':
+            formatted_results = mmr(query_embedding, formatted_results, top_k, mmr_lambda)
+        else:
+            formatted_results = formatted_results[:top_k]
+
+        # Restore full chunk text and document metadata from the local store
+        if include_metadata:
+            self.chunk_store.hydrate(formatted_results)
+
+        # Chunks that were not upserted because they repeat this one
+        if Config.DEDUP == 'alias' and self.dedup_index is not None and self.dedup_index.aliases:
+            for result in formatted_results:
+                aliases = self.dedup_index.aliases_of(result['id'])
+                if aliases:
+                    result['duplicates'] = aliases
+
+        if expand > 0:
+            formatted_results = self._expand_results(formatted_results, expand)
+
+        # Drop fields that were only fetched for post-processing
+        for result in formatted_results:
+            if not include_metadata:
+                result.pop('metadata', None)
+            if not include_values:
+                result.pop('values', None)
+
         return formatted_results
 
+    def search_sections(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        level: str = 'section'
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank summary vectors (coarse stage of hierarchical search).
+
+        Args:
+            query_embedding: Query vector
+            top_k: Number of summaries to return
+            filter_metadata: Chunk filter; summaries carry document_id, course,
+                             learning_unit, material_type and document_type
+            level: 'section' or 'document'
+
+        Returns:
+            Summary metadata with 'id' and 'score' added, best first
+        """
+        level_filter = {'level': level}
+        if filter_metadata:
+            level_filter = {'$and': [filter_metadata, level_filter]}
+
+        results = self.get_index().query(
+            vector=np.asarray(query_embedding).tolist(),
+            top_k=top_k,
+            filter=level_filter,
+            include_metadata=True,
+            namespace=self.summary_namespace
+        )
+        return [
+            {**dict(match['metadata']), 'id': match['id'], 'score': match['score']}
+            for match in results.get('matches', [])
+        ]
+
+    def _expand_results(
+        self,
+        results: List[Dict[str, Any]],
+        expand: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Attach neighbouring chunks to each result and merge overlapping windows.
+
+        A hit whose own window overlaps or touches the own window of a
+        higher-ranked hit in the same document is folded into that hit
+        instead of being returned separately. Hits are tested against the
+        window of the hit that opened it, not the merged one, so merged
+        windows cannot chain: they stay within chunk_number +- (3 * expand + 1)
+        of the opening hit.
+
+        Args:
+            results: Search results with metadata, best first
+            expand: Number of neighbouring chunks on each side
+
+        Returns:
+            Results with a 'context' dict: chunk_start, chunk_end, text, merged_ids
+        """
+        kept = []
+        # Per document: (opening hit's own window, merged context)
+        windows: Dict[str, List[Tuple[Tuple[int, int], Dict[str, Any]]]] = {}
+
+        for result in results:
+            metadata = result.get('metadata', {})
+            document_id = metadata.get('document_id')
+            chunk_number = metadata.get('chunk_number')
+            if document_id is None or chunk_number is None:
+                kept.append(result)
+                continue
+
+            chunk_number = int(chunk_number)
+            first = max(1, chunk_number - expand)
+            last = chunk_number + expand
+            if metadata.get('total_chunks'):
+                last = min(int(metadata['total_chunks']), last)
+
+            absorbed = False
+            for origin, context in windows.get(document_id, []):
+                if first <= origin[1] + 1 and last >= origin[0] - 1:
+                    context['chunk_start'] = min(first, context['chunk_start'])
+                    context['chunk_end'] = max(last, context['chunk_end'])
+                    context['merged_ids'].append(result['id'])
+                    absorbed = True
+                    break
+
+            if absorbed:
+                continue
+
+            result['context'] = {
+                'document_id': document_id,
+                'chunk_start': first,
+                'chunk_end': last,
+                'merged_ids': [result['id']]
+            }
+            windows.setdefault(document_id, []).append(((first, last), result['context']))
+            kept.append(result)
+
+        for result in kept:
+            context = result.get('context')
+            if context is not None:
+                context['text'] = self.chunk_store.get_context(
+                    context['document_id'], context['chunk_start'], context['chunk_end']
+                )
+
+        return kept
+
     def delete_by_document_id(
         self,
         document_id: str
@@ -258,28 +1013,80 @@ class PineconeManager:
         """
         Delete all chunks for a specific document.
 
+        Chunk IDs are enumerated by their '<document_id>#' prefix in the base
+        namespace and every shard, and deleted in batches. Indexes that
+        cannot list IDs (pod-based) fall back to a metadata-filter delete.
+
         Args:
             document_id: Document identifier
 
         Returns:
-            Deletion statistics
+            Deletion statistics: 'deleted_count' (chunk vectors) and
+            'summaries_deleted' (summary vectors), None when deleted by filter
         """
         index = self.get_index()
 
         try:
-            # Delete by metadata filter
-            index.delete(
-                filter={'document_id': document_id},
-                namespace=self.namespace
+            deleted = 0
+            summaries_deleted = 0
+            for namespace in self.shard_namespaces(refresh=True) + [self.summary_namespace]:
+                try:
+                    chunk_ids = self.list_by_prefix(f"{document_id}#", namespace=namespace)
+                except Exception as e:
+                    if is_transient_error(e):
+                        raise
+                    print(f"Listing IDs is not available ({e}), deleting by metadata filter")
+                    chunk_ids = None
+
+                if chunk_ids is None:
+                    self._with_retries(lambda: index.delete(
+                        filter={'document_id': document_id},
+                        namespace=namespace
+                    ))
+                    time.sleep(self.CONSISTENCY_WAIT)
+                    if namespace == self.summary_namespace:
+                        summaries_deleted = None
+                    else:
+                        deleted = None
+                    continue
+
+                result = self.delete_by_ids(chunk_ids, namespace=namespace)
+                if not result['success']:
+                    return {
+                        'success': False,
+                        'document_id': document_id,
+                        'deleted_count': (deleted or 0) + (
+                            0 if namespace == self.summary_namespace else result['deleted_count']
+                        ),
+                        'failed_ids': result['failed_ids'],
+                        'error': result['error']
+                    }
+                if namespace == self.summary_namespace:
+                    summaries_deleted = result['deleted_count']
+                elif deleted is not None:
+                    deleted += result['deleted_count']
+
+            self.chunk_store.delete_document(document_id)
+
+            if self.dedup_index is not None:
+                orphaned = self.dedup_index.remove_document(document_id)
+                self.dedup_index.save()
+                if orphaned:
+                    documents = sorted({dup.split('#chunk_')[0] for dup in orphaned})
+                    print(f"Warning: {len(orphaned)} near-duplicate chunks of {', '.join(documents)} "
+                          f"were only indexed through '{document_id}'; reindex them to make that text searchable")
+
+            chunk_part = 'all chunk vectors' if deleted is None else f"{deleted} chunk vectors"
+            summary_part = (
+                'all summary vectors' if summaries_deleted is None else f"{summaries_deleted} summary vectors"
             )
-
-            # Wait for deletion to complete
-            time.sleep(1)
-
+            message = f"Deleted {chunk_part} and {summary_part} for document '{document_id}'"
             return {
                 'success': True,
                 'document_id': document_id,
-                'message': f"Deleted all chunks for document '{document_id}'"
+                'deleted_count': deleted,
+                'summaries_deleted': summaries_deleted,
+                'message': message
             }
         except Exception as e:
             return {
@@ -290,70 +1097,123 @@ class PineconeManager:
 
     def delete_by_ids(
         self,
-        chunk_ids: List[str]
+        chunk_ids: List[str],
+        batch_size: int = DELETE_BATCH_SIZE,
+        max_workers: int = 4,
+        namespace: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Delete specific chunks by their IDs.
 
+        IDs are sent in batches of up to batch_size (Pinecone accepts 1000
+        per request) from a small thread pool. Throttled and transient
+        failures are retried with backoff; batches that still fail are
+        reported in 'failed_ids'.
+
         Args:
             chunk_ids: List of chunk IDs to delete
+            batch_size: IDs per delete request
+            max_workers: Concurrent delete requests
+            namespace: Namespace or shard to delete from (defaults to self.namespace)
 
         Returns:
             Deletion statistics
         """
         index = self.get_index()
+        namespace = namespace or self.namespace
+        batches = [chunk_ids[i:i + batch_size] for i in range(0, len(chunk_ids), batch_size)]
 
-        try:
-            index.delete(
-                ids=chunk_ids,
-                namespace=self.namespace
-            )
-
-            time.sleep(1)
-
-            return {
-                'success': True,
-                'deleted_count': len(chunk_ids),
-                'message': f"Deleted {len(chunk_ids)} chunks"
-            }
-        except Exception as e:
+        def delete_batch(batch: List[str]) -> Optional[Exception]:
+            try:
+                self._with_retries(lambda: index.delete(ids=batch, namespace=namespace))
+                return None
+            except Exception as e:
+                return e
+
+        with stage('delete') as fields:
+            if len(batches) > 1 and max_workers > 1:
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                    errors = list(pool.map(delete_batch, batches))
+            else:
+                errors = [delete_batch(batch) for batch in batches]
+
+            failed_ids = [
+                chunk_id for batch, error in zip(batches, errors) if error is not None
+                for chunk_id in batch
+            ]
+            deleted = len(chunk_ids) - len(failed_ids)
+            fields['vectors'] = deleted
+            fields['failed'] = len(failed_ids)
+
+        if deleted:
+            time.sleep(self.CONSISTENCY_WAIT)
+
+        first_error = next((error for error in errors if error is not None), None)
+        if first_error is not None:
             return {
                 'success': False,
-                'error': str(e)
+                'deleted_count': deleted,
+                'failed_ids': failed_ids,
+                'error': str(first_error)
             }
+        return {
+            'success': True,
+            'deleted_count': deleted,
+            'failed_ids': [],
+            'message': f"Deleted {deleted} chunks"
+        }
+
+    @staticmethod
+    def _with_retries(call: Callable[[], Any]) -> Any:
+        """Run one index request, retrying transient errors with backoff."""
+        return call_with_retries(
+            call, Config.UPSERT_MAX_RETRIES, Config.UPSERT_BACKOFF_BASE, Config.UPSERT_BACKOFF_MAX
+        )
 
     def list_by_prefix(
         self,
         prefix: str,
-        limit: int = 100
+        limit: Optional[int] = None,
+        namespace: Optional[str] = None
     ) -> List[str]:
         """
         List chunk IDs with a given prefix.
 
+        Pages through the index's ID listing, so every matching ID is
+        returned; transient errors on a page are retried. Chunk IDs have
+        the form '<document_id>#chunk_<n>'; include the '#' to keep 'doc_1#'
+        from also matching 'doc_10#...'.
+
         Args:
             prefix: ID prefix (e.g., 'doc_001#' for all chunks of doc_001)
-            limit: Maximum number of IDs to return
+            limit: Maximum number of IDs to return (None for all)
+            namespace: Namespace or shard to list (defaults to self.namespace)
 
         Returns:
             List of matching chunk IDs
+
+        Raises:
+            Exception: If the index does not support listing (pod-based indexes)
         """
         index = self.get_index()
-
-        # Note: This uses a query with metadata filter
-        # Adjust based on your ID structure
-        try:
-            results = index.query(
-                vector=[0] * Config.EMBEDDING_DIMENSION,  # Dummy vector
-                top_k=limit,
-                filter={'document_id': prefix.rstrip('#')},
-                include_metadata=False,
-                namespace=self.namespace
-            )
-
-            return [match['id'] for match in results.get('matches', [])]
-        except Exception as e:
-            print(f"Error listing by prefix: {e}")
-            return []
+        namespace = namespace or self.namespace
+
+        ids: List[str] = []
+        token = None
+        while limit is None or len(ids) < limit:
+            page_size = LIST_PAGE_SIZE if limit is None else min(LIST_PAGE_SIZE, limit - len(ids))
+            page = self._with_retries(lambda: index.list_paginated(
+                prefix=prefix,
+                limit=page_size,
+                pagination_token=token,
+                namespace=namespace
+            ))
+            ids.extend(vector.id for vector in page.vectors)
+            token = page.pagination.next if page.pagination else None
+            if not token:
+                break
+
+        return ids
 
     def get_index_stats(self) -> Dict[str, Any]:
         """
@@ -0,0 +1,340 @@
+"""
+Profiling mode for the CLI scripts.
+cProfile or a sampling profiler for the whole run, plus tracemalloc
+allocation snapshots around the hot pipeline stages.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+from instrumentation import metrics
+
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Stages whose allocations are snapshotted (instrumentation stage names)
+HOT_STAGES = ('download', 'extract', 'chunking', 'embed', 'upsert', 'search')
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add --profile, --profile-mode and --profile-dir to a script's argument parser."""
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile the run and write a report'
+    )
+    parser.add_argument(
+        '--profile-mode',
+        choices=PROFILE_MODES,
+        default='cprofile',
+        help='Profiler used with --profile (default: cprofile)'
+    )
+    parser.add_argument(
+        '--profile-dir',
+        help='Directory for profile reports (default: <cache dir>/profiles)'
+    )
+    parser.add_argument(
+        '--profile-top',
+        type=int,
+        default=25,
+        help='Functions and allocation sites listed in the report (default: 25)'
+    )
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler over all Python threads.
+
+    A background thread reads sys._current_frames() every interval
+    seconds and counts, per function, the samples where it was running
+    (self) or anywhere on the stack (cumulative).
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.ticks = 0
+        self.elapsed = 0.0
+        self.self_counts: Counter = Counter()
+        self.cumulative_counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        start = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                seen = set()
+                top = True
+                while frame is not None:
+                    code = frame.f_code
+                    key = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                    if top:
+                        self.self_counts[key] += 1
+                        top = False
+                    if key not in seen:
+                        self.cumulative_counts[key] += 1
+                        seen.add(key)
+                    frame = frame.f_back
+        self.elapsed = time.perf_counter() - start
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        """Functions with the most cumulative samples."""
+        # Ticks run slower than the interval under load, so scale by wall time
+        seconds_per_sample = self.elapsed / self.ticks if self.ticks else self.interval
+        return [
+            {
+                'function': key,
+                'cumulative_samples': count,
+                'self_samples': self.self_counts.get(key, 0),
+                'cumulative_seconds': round(count * seconds_per_sample, 3)
+            }
+            for key, count in self.cumulative_counts.most_common(limit)
+        ]
+
+
+class Profiler:
+    """
+    Profile a script run and write a summary report.
+
+    CPU time comes from cProfile (deterministic, higher overhead) or the
+    sampling profiler. Memory comes from tracemalloc, which runs only while
+    a hot instrumentation stage is open; the snapshot at the end of the
+    stage gives its peak and the top allocation sites still held.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        mode: str = 'cprofile',
+        output_dir: Optional[Path] = None,
+        top: int = 25
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            name: Run name (script name), used for the report directory
+            mode: 'cprofile' or 'sampling'
+            output_dir: Report directory (defaults to Config.CACHE_DIR / 'profiles')
+            top: Entries per report section
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+
+        self.name = name
+        self.mode = mode
+        self.top = top
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.output_dir = Path(output_dir or Config.CACHE_DIR / 'profiles') / f"{name}-{stamp}"
+
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+        self._open_snapshots: Dict[str, List[tracemalloc.Snapshot]] = {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._depth = 0
+        self._started = 0.0
+
+    def _on_event(self, event: Dict[str, Any]) -> None:
+        """Instrumentation listener: trace allocations inside hot stages."""
+        stage = event.get('stage')
+        if stage not in HOT_STAGES:
+            return
+
+        # Tracing only runs inside hot stages; tracing the whole run (model
+        # imports included) makes snapshots slow and memory-hungry.
+        if event['event'] == 'stage_start':
+            if self._depth == 0:
+                tracemalloc.start(1)
+                before = None
+            else:
+                before = tracemalloc.take_snapshot()
+            self._depth += 1
+            self._open_snapshots.setdefault(stage, []).append(before)
+            return
+
+        if not self._open_snapshots.get(stage):
+            return
+        before = self._open_snapshots[stage].pop()
+        after = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, __file__)])
+        _, peak = tracemalloc.get_traced_memory()
+        self._depth -= 1
+        if self._depth == 0:
+            tracemalloc.stop()
+
+        summary = self.stages.setdefault(stage, {
+            'calls': 0, 'seconds': 0.0, 'peak_bytes': 0, 'sites': Counter(), 'counts': Counter()
+        })
+        summary['calls'] += 1
+        summary['seconds'] += event.get('seconds', 0.0)
+        summary['peak_bytes'] = max(summary['peak_bytes'], peak)
+
+        if before is None:
+            diffs = [(stat.traceback[0], stat.size, stat.count) for stat in after.statistics('lineno')]
+        else:
+            diffs = [
+                (diff.traceback[0], diff.size_diff, diff.count_diff)
+                for diff in after.compare_to(before, 'lineno') if diff.size_diff > 0
+            ]
+        for frame, size, count in diffs:
+            site = f"{frame.filename}:{frame.lineno}"
+            summary['sites'][site] += size
+            summary['counts'][site] += count
+
+    def start(self) -> None:
+        """Start CPU profiling and allocation tracing."""
+        self._started = time.perf_counter()
+        metrics.add_listener(self._on_event)
+        if self.mode == 'cprofile':
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        else:
+            self._sampler = SamplingProfiler()
+            self._sampler.start()
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        Stop profiling and write the report.
+
+        Writes report.txt and report.json (plus profile.pstats for cProfile)
+        to the output directory.
+
+        Returns:
+            The report as a dict
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        metrics.remove_listener(self._on_event)
+        if self._depth:
+            tracemalloc.stop()
+            self._depth = 0
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        report = {
+            'name': self.name,
+            'mode': self.mode,
+            'seconds': round(time.perf_counter() - self._started, 3),
+            'peak_traced_bytes': max((s['peak_bytes'] for s in self.stages.values()), default=0),
+            'functions': self._top_functions(),
+            'stages': {
+                stage: {
+                    'calls': summary['calls'],
+                    'seconds': round(summary['seconds'], 3),
+                    'peak_traced_bytes': summary['peak_bytes'],
+                    'allocation_sites': [
+                        {'site': site, 'bytes': size, 'blocks': summary['counts'][site]}
+                        for site, size in summary['sites'].most_common(self.top)
+                    ]
+                }
+                for stage, summary in self.stages.items()
+            }
+        }
+
+        with open(self.output_dir / 'report.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        (self.output_dir / 'report.txt').write_text(self.format_report(report), encoding='utf-8')
+
+        return report
+
+    def _top_functions(self) -> List[Dict[str, Any]]:
+        """Top functions by cumulative time."""
+        if self._sampler is not None:
+            return self._sampler.top(self.top)
+
+        self._cprofile.dump_stats(str(self.output_dir / 'profile.pstats'))
+        stats = pstats.Stats(self._cprofile, stream=io.StringIO())
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({function})",
+                'calls': calls,
+                'total_seconds': round(total, 4),
+                'cumulative_seconds': round(cumulative, 4)
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:self.top]
+
+    @staticmethod
+    def format_report(report: Dict[str, Any]) -> str:
+        """Render a report as text."""
+        lines = [
+            f"Profile: {report['name']} ({report['mode']})",
+            f"Wall time: {report['seconds']:.2f}s, peak traced memory in hot stages: "
+            f"{report['peak_traced_bytes'] / 2**20:.1f} MiB",
+            "",
+            "Top functions by cumulative time:"
+        ]
+        for row in report['functions']:
+            if 'calls' in row:
+                lines.append(f"  {row['cumulative_seconds']:>9.3f}s {row['total_seconds']:>9.3f}s "
+                             f"{row['calls']:>9}  {row['function']}")
+            else:
+                lines.append(f"  {row['cumulative_seconds']:>9.3f}s {row['self_samples']:>9} self  "
+                             f"{row['function']}")
+
+        for stage, summary in report['stages'].items():
+            lines.append("")
+            lines.append(f"Stage '{stage}': {summary['calls']} call(s), {summary['seconds']:.2f}s, "
+                         f"peak traced {summary['peak_traced_bytes'] / 2**20:.1f} MiB")
+            lines.append("  Top allocation sites (net bytes):")
+            for site in summary['allocation_sites']:
+                lines.append(f"  {site['bytes'] / 1024:>10.1f} KiB {site['blocks']:>8} blocks  {site['site']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def run(main: Callable[[], int], name: str) -> int:
+    """
+    Run a script's main(), profiled when --profile is on the command line.
+
+    The flags are also registered on the script's own parser with
+    add_arguments() so they show up in --help; here they are read
+    independently so main() does not have to change shape.
+
+    Args:
+        main: Script entry point returning an exit code
+        name: Run name for the report directory
+
+    Returns:
+        main()'s exit code
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    add_arguments(parser)
+    args, _ = parser.parse_known_args()
+
+    if not args.profile:
+        return main()
+
+    profiler = Profiler(name, args.profile_mode, args.profile_dir, args.profile_top)
+    profiler.start()
+    try:
+        return main()
+    finally:
+        report = profiler.stop()
+        # stderr, so --json output on stdout stays parseable
+        print(f"\n{Profiler.format_report(report)}", file=sys.stderr)
+        print(f"✓ Profile written to {profiler.output_dir}", file=sys.stderr)
@@ -0,0 +1,233 @@
+"""
+Cross-encoder re-ranking of search candidates.
+Scores (query, chunk) pairs in batches, with a pair score cache and a time budget.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from config import Config
+from boilerplate import embedding_text
+from instrumentation import stage
+
+
+class PairScoreCache:
+    """
+    Cross-encoder scores of (query, passage) pairs.
+
+    Kept per model in <root>/<model>.jsonl, one [pair hash, score] line per
+    scored pair. New pairs are appended after each query; on load the file
+    is compacted to the max_entries most recent pairs when it has grown
+    past twice that.
+    """
+
+    def __init__(self, model_name: str, root: Optional[Path] = None, max_entries: int = 100000):
+        """
+        Initialize pair score cache.
+
+        Args:
+            model_name: Cross-encoder model name (part of the file name)
+            root: Cache directory (defaults to Config.CACHE_DIR / 'rerank')
+            max_entries: Pairs kept when compacting
+        """
+        self.root = Path(root or Config.CACHE_DIR / 'rerank')
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)}.jsonl"
+        self.max_entries = max_entries
+        self._scores: OrderedDict = OrderedDict()
+        self._new: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            lines = 0
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        key, score = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted append
+                    self._scores[key] = score
+                    self._scores.move_to_end(key)
+                    lines += 1
+            if lines > 2 * max_entries:
+                self._compact()
+
+    def _compact(self) -> None:
+        while len(self._scores) > self.max_entries:
+            self._scores.popitem(last=False)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, score in self._scores.items():
+                f.write(json.dumps([key, score]) + '\n')
+        tmp_path.replace(self.path)
+
+    @staticmethod
+    def key(query: str, passage: str) -> str:
+        """Hash of a (query, passage) pair."""
+        return hashlib.sha1(f"{query}\0{passage}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[float]:
+        """Cached score of a pair, if any."""
+        with self._lock:
+            return self._scores.get(key)
+
+    def put(self, scores: Dict[str, float]) -> None:
+        """Add pair scores ({pair hash: score})."""
+        with self._lock:
+            self._scores.update(scores)
+            self._new.update(scores)
+
+    def save(self) -> None:
+        """Append the pairs added since the last save."""
+        with self._lock:
+            if not self._new:
+                return
+            lines = ''.join(json.dumps([key, score]) + '\n' for key, score in self._new.items())
+            self._new = {}
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class Reranker:
+    """
+    Re-ranks ANN candidates with a local cross-encoder.
+
+    The cross-encoder reads query and chunk together, which separates
+    relevant passages from merely similar ones far better than cosine
+    scores, but costs a model pass per pair. Candidates are therefore
+    scored best-ANN-first in batches; when a time budget is set, scoring
+    stops before a batch that would not finish in time, and unscored
+    candidates follow the scored ones in their ANN order.
+    """
+
+    def __init__(
+        self,
+        model_name: str = Config.RERANK_MODEL,
+        batch_size: int = Config.RERANK_BATCH_SIZE,
+        max_length: Optional[int] = None,
+        cache: Optional[PairScoreCache] = None,
+        model: Optional[Any] = None
+    ):
+        """
+        Initialize re-ranker.
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model name or path
+            batch_size: Pairs per model call
+            max_length: Token limit per pair, longer chunks are truncated
+                        (defaults to the model's limit)
+            cache: Pair score cache (defaults to one for model_name)
+            model: Model with a CrossEncoder-compatible predict() to use instead
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            print(f"Loading re-ranking model: {model_name}...")
+            model = CrossEncoder(model_name, max_length=max_length)
+            print("✓ Re-ranking model loaded")
+        self.model = model
+        self.cache = cache if cache is not None else PairScoreCache(model_name)
+        self.last_stats: Dict[str, Any] = {}
+
+    def score(
+        self,
+        query: str,
+        passages: List[str],
+        budget: Optional[float] = None
+    ) -> List[Optional[float]]:
+        """
+        Cross-encoder scores of (query, passage) pairs.
+
+        Cached pairs are free; the rest are scored in order, batch by batch.
+
+        Args:
+            query: Search query
+            passages: Passages, most promising first
+            budget: Seconds available for model calls (None = no limit)
+
+        Returns:
+            Score per passage, None for passages not scored within the budget
+        """
+        start = time.perf_counter()
+        keys = [PairScoreCache.key(query, passage) for passage in passages]
+        scores = [self.cache.get(key) for key in keys]
+        misses = [i for i, score in enumerate(scores) if score is None]
+
+        computed = {}
+        batch_seconds = 0.0
+        model_start = time.perf_counter()
+        for offset in range(0, len(misses), self.batch_size):
+            elapsed = time.perf_counter() - model_start
+            # Skip the next batch if it would likely overrun the budget
+            if budget is not None and elapsed + batch_seconds > budget:
+                break
+            batch = misses[offset:offset + self.batch_size]
+            batch_start = time.perf_counter()
+            values = self.model.predict(
+                [(query, passages[i]) for i in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            batch_seconds = time.perf_counter() - batch_start
+            for i, value in zip(batch, values):
+                scores[i] = float(value)
+                computed[keys[i]] = scores[i]
+
+        if computed:
+            self.cache.put(computed)
+            self.cache.save()
+
+        self.last_stats = {
+            'pairs': len(passages),
+            'cache_hits': len(passages) - len(misses),
+            'scored': len(computed),
+            'unscored': sum(1 for score in scores if score is None),
+            'seconds': time.perf_counter() - start
+        }
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        texts: Dict[str, str],
+        budget: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Order search results by cross-encoder score.
+
+        Args:
+            query: Search query
+            results: Search results, best ANN score first
+            texts: Chunk text by result ID (results without text keep their rank
+                   among the unscored)
+            budget: Seconds available for scoring (None = no limit)
+
+        Returns:
+            The results with 'rerank_score' set where scored: scored results
+            by descending score, then unscored ones in their original order
+        """
+        with stage('rerank') as fields:
+            scorable = [result for result in results if texts.get(result['id'])]
+            scores = self.score(
+                query, [embedding_text(texts[result['id']]) for result in scorable], budget
+            )
+            for result, score in zip(scorable, scores):
+                if score is not None:
+                    result['rerank_score'] = score
+
+            scored = [result for result in results if 'rerank_score' in result]
+            scored.sort(key=lambda result: result['rerank_score'], reverse=True)
+            unscored = [result for result in results if 'rerank_score' not in result]
+            for field in ('pairs', 'cache_hits', 'scored', 'unscored'):
+                fields[field] = self.last_stats[field]
+        return scored + unscored
@@ -4,6 +4,7 @@ Create Pinecone index for PDF search.
 
 Usage:
     python scripts/create_index.py
+    python scripts/create_index.py --profile
 """
 
 import sys
@@ -14,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from pinecone_manager import PineconeManager
 from config import Config
+import profiling
 
 
 def main():
@@ -66,5 +68,5 @@ def main():
 
 
 if __name__ == "__main__":
-    exit_code = main()
+    exit_code = profiling.run(main, 'create_index')
     sys.exit(exit_code)
@@ -6,12 +6,17 @@ Usage:
     python scripts/index_pdfs.py                    # Index all PDFs
     python scripts/index_pdfs.py <material_id>      # Index specific PDF
     python scripts/index_pdfs.py --reindex <id>     # Reindex (delete + index)
+    python scripts/index_pdfs.py --reindex --redownload <id>  # Reindex a replaced PDF
+    python scripts/index_pdfs.py --all --resume     # Continue an interrupted run
+    python scripts/index_pdfs.py --metrics-file metrics.prom  # Export stage metrics
+    python scripts/index_pdfs.py <id> --profile     # Write a profile report
 """
 
 import sys
 import json
 import argparse
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -19,33 +24,51 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from pinecone_manager import PineconeManager
 from pdf_processor import PDFProcessor
 from config import Config
+from checkpoint import CheckpointJournal
+from instrumentation import metrics, stage
+import profiling
 
 
 def index_material(
     material_id: str,
     manager: PineconeManager,
     processor: PDFProcessor,
-    reindex: bool = False
+    reindex: bool = False,
+    journal: Optional[CheckpointJournal] = None,
+    retries: int = 2
 ) -> bool:
     """
     Index a single material from manifest.
 
+    With a checkpoint journal, chunks and embeddings are saved as soon as
+    they exist and every upsert batch is journaled, so a resumed run picks
+    up at the first chunk not yet in the index. Failed batches are retried
+    up to `retries` more times before the material counts as failed.
+
     Args:
         material_id: Material ID from manifest
         manager: Pinecone manager instance
         processor: PDF processor instance
         reindex: If True, delete existing chunks first
+        journal: Checkpoint journal for resumable runs
+        retries: Extra passes over failed batches
 
     Returns:
         True if successful, False otherwise
     """
+    progress = journal.progress(material_id) if journal else None
+
     try:
         print(f"\n{'='*60}")
         print(f"Processing: {material_id}")
         print(f"{'='*60}\n")
 
-        # Reindex: delete existing chunks first
-        if reindex:
+        if progress is not None and progress.done:
+            print(f"✓ Already indexed in the interrupted run, skipping")
+            return True
+
+        # Reindex: delete existing chunks first (not when resuming a started document)
+        if reindex and not (progress is not None and progress.started):
             print("Reindexing: Deleting existing chunks...")
             result = manager.delete_by_document_id(material_id)
             if result['success']:
@@ -54,24 +77,81 @@ def index_material(
                 print(f"Warning: {result.get('error', 'Unknown error')}")
             print()
 
-        # Process PDF
-        chunks = processor.process_pdf_from_manifest(material_id)
+        with stage('index_document') as fields:
+            fields['document_id'] = material_id
 
-        if not chunks:
-            print(f"✗ No chunks created for {material_id}")
-            return False
-
-        print(f"\nIndexing {len(chunks)} chunks...")
-
-        # Upsert to Pinecone
-        stats = manager.upsert_chunks(chunks, show_progress=True)
+            chunks = journal.load_chunks(material_id) if journal else None
+            if chunks is not None:
+                print(f"Resuming with {len(chunks)} checkpointed chunks")
+            else:
+                # Process PDF
+                chunks = processor.process_pdf_from_manifest(material_id)
+                if chunks and journal:
+                    journal.save_chunks(material_id, chunks)
+
+            if not chunks:
+                print(f"✗ No chunks created for {material_id}")
+                return False
+
+            # Near-duplicates of already indexed text are neither embedded nor upserted
+            duplicates = manager.find_duplicates(chunks)
+
+            embeddings = journal.load_embeddings(material_id) if journal else None
+            if embeddings is not None and any(
+                chunk['id'] not in duplicates and not row.any() for chunk, row in zip(chunks, embeddings)
+            ):
+                # Checkpointed as a duplicate, but its original is gone
+                embeddings = None
+            if embeddings is None:
+                embeddings = manager.embed_chunks(chunks, show_progress=True, skip_ids=set(duplicates))
+                if journal:
+                    journal.save_embeddings(material_id, embeddings)
+
+            done_ids = set(progress.upserted_ids) if progress is not None else set()
+            if done_ids:
+                print(f"Resuming: {len(done_ids)} of {len(chunks)} chunks already upserted")
+            print(f"\nIndexing {len(chunks) - len(done_ids)} chunks...")
+
+            on_batch = None
+            if journal:
+                on_batch = lambda ids, error: journal.record_batch(material_id, ids, error)
+
+            # Upsert to Pinecone; failed batches are retried from the queue
+            stats = manager.upsert_chunks(
+                chunks, show_progress=True, embeddings=embeddings,
+                skip_ids=done_ids, on_batch=on_batch, duplicates=duplicates
+            )
+            upserted = stats['skipped'] + stats['upserted']
+            failed_ids = set(stats['failed_ids'])
+
+            for attempt in range(1, retries + 1):
+                if not failed_ids:
+                    break
+                print(f"Retrying {len(failed_ids)} failed chunks (attempt {attempt}/{retries})...")
+                skip_ids = {chunk['id'] for chunk in chunks} - failed_ids
+                retry = manager.upsert_chunks(
+                    chunks, show_progress=False, embeddings=embeddings,
+                    skip_ids=skip_ids, on_batch=on_batch, summaries=False,
+                    duplicates=duplicates
+                )
+                upserted += retry['upserted']
+                failed_ids = set(retry['failed_ids'])
+
+            if journal:
+                journal.finish_document(material_id, upserted, len(failed_ids))
+            fields['chunks'] = stats['total']
+            fields['failed'] = len(failed_ids)
 
         print(f"\n✓ Indexing complete!")
         print(f"  Total chunks: {stats['total']}")
-        print(f"  Upserted: {stats['upserted']}")
-        print(f"  Failed: {stats['failed']}")
+        print(f"  Upserted: {upserted}")
+        if duplicates:
+            print(f"  Near-duplicates skipped: {len(duplicates)}")
+        print(f"  Failed: {len(failed_ids)}")
+        if failed_ids and journal:
+            print(f"  Failed chunks stay queued; rerun with --resume to retry them")
 
-        return stats['failed'] == 0
+        return not failed_ids
 
     except Exception as e:
         print(f"\n✗ Error indexing {material_id}: {e}")
@@ -100,6 +180,34 @@ def main():
         action='store_true',
         help='Index all materials in manifest'
     )
+    parser.add_argument(
+        '--redownload',
+        action='store_true',
+        help='Download PDFs even if their cached extraction looks current'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue the last run from its checkpoint journal'
+    )
+    parser.add_argument(
+        '--checkpoint-dir',
+        help='Checkpoint directory (default: <cache dir>/checkpoints/index_pdfs)'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=2,
+        help='Extra passes over failed upsert batches per document (default: 2)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        default=Config.METRICS_PROM_FILE,
+        help='Write stage metrics in Prometheus text format to this file '
+             '(default: METRICS_PROM_FILE)'
+    )
+
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
@@ -127,7 +235,7 @@ def main():
     # Initialize managers
     try:
         manager = PineconeManager()
-        processor = PDFProcessor()
+        processor = PDFProcessor(reuse_downloads=not args.redownload)
         print("✓ Managers initialized\n")
     except Exception as e:
         print(f"✗ Initialization failed: {e}")
@@ -154,6 +262,13 @@ def main():
             print(f"  - {mat['id']}: {mat['title']}")
         return 1
 
+    # Checkpoint journal (a fresh run replaces the previous one)
+    journal = CheckpointJournal(args.checkpoint_dir, resume=args.resume)
+    if args.resume:
+        done = [mid for mid in material_ids if journal.progress(mid).done]
+        print(f"Resuming: {len(done)} of {len(material_ids)} materials already complete\n")
+    journal.start_run(material_ids)
+
     # Index materials
     results = {
         'success': [],
@@ -165,7 +280,9 @@ def main():
             material_id=material_id,
             manager=manager,
             processor=processor,
-            reindex=args.reindex
+            reindex=args.reindex,
+            journal=journal,
+            retries=args.retries
         )
 
         if success:
@@ -185,6 +302,22 @@ def main():
         print(f"\nFailed materials:")
         for mat_id in results['failed']:
             print(f"  - {mat_id}")
+        print(f"\nRun again with --resume to continue from the checkpoint")
+
+    journal.end_run()
+    journal.close()
+
+    # Where the time went
+    stage_seconds = metrics.stage_seconds()
+    if stage_seconds:
+        print(f"\nTime by stage:")
+        for name in ('download', 'extract', 'chunking', 'embed', 'upsert', 'index_document'):
+            if name in stage_seconds:
+                print(f"  {name:<16}{stage_seconds[name]:>9.1f}s")
+
+    if args.metrics_file:
+        metrics.write_prometheus(Path(args.metrics_file))
+        print(f"\n✓ Metrics written to {args.metrics_file}")
 
     # Show index stats
     try:
@@ -199,5 +332,5 @@ def main():
 
 
 if __name__ == "__main__":
-    exit_code = main()
+    exit_code = profiling.run(main, 'index_pdfs')
     sys.exit(exit_code)
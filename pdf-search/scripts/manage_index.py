@@ -7,6 +7,7 @@ Usage:
     python scripts/manage_index.py delete <document_id>
     python scripts/manage_index.py list
     python scripts/manage_index.py reset --confirm
+    python scripts/manage_index.py --profile stats
 """
 
 import sys
@@ -19,6 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from pinecone_manager import PineconeManager
 from config import Config
+import profiling
 
 
 def show_stats(manager: PineconeManager):
@@ -147,6 +149,8 @@ def main():
     reset_parser = subparsers.add_parser('reset', help='Reset index (delete all data)')
     reset_parser.add_argument('--confirm', action='store_true', help='Confirm reset')
 
+    profiling.add_arguments(parser)
+
     args = parser.parse_args()
 
     if not args.command:
@@ -175,5 +179,5 @@ def main():
 
 
 if __name__ == "__main__":
-    exit_code = main()
+    exit_code = profiling.run(main, 'manage_index')
     sys.exit(exit_code)
@@ -6,6 +6,10 @@ Usage:
     python scripts/search_pdfs.py "your search query"
     python scripts/search_pdfs.py "query" --top-k 10
     python scripts/search_pdfs.py "query" --filter document_id=material-001
+    python scripts/search_pdfs.py "query" --expand 1
+    python scripts/search_pdfs.py "query" --diversify collapse
+    python scripts/search_pdfs.py "query" --hierarchical
+    python scripts/search_pdfs.py "query" --profile --profile-mode sampling
 """
 
 import sys
@@ -18,6 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from pinecone_manager import PineconeManager
 from config import Config
+import profiling
 
 
 def format_result(result: dict, index: int) -> str:
@@ -33,7 +38,10 @@ def format_result(result: dict, index: int) -> str:
     """
     lines = []
     lines.append(f"\n{'='*60}")
-    lines.append(f"Result #{index} (Score: {result['score']:.4f})")
+    if 'rerank_score' in result:
+        lines.append(f"Result #{index} (Score: {result['score']:.4f}, Rerank: {result['rerank_score']:.4f})")
+    else:
+        lines.append(f"Result #{index} (Score: {result['score']:.4f})")
     lines.append(f"{'='*60}")
 
     metadata = result.get('metadata', {})
@@ -49,9 +57,23 @@ def format_result(result: dict, index: int) -> str:
     if 'chunk_number' in metadata:
         lines.append(f"Chunk: {metadata['chunk_number']}/{metadata.get('total_chunks', '?')}")
 
+    if result.get('collapsed_ids'):
+        lines.append(f"Collapsed: {', '.join(result['collapsed_ids'])}")
+
+    if result.get('duplicates'):
+        lines.append(f"Also in: {', '.join(result['duplicates'])}")
+
+    # Context window (neighbouring chunks merged)
+    context = result.get('context')
+    if context and context.get('text'):
+        lines.append(f"\nContext (chunks {context['chunk_start']}-{context['chunk_end']}):")
+        lines.append(context['text'])
+        if len(context['merged_ids']) > 1:
+            lines.append(f"\nMerged hits: {', '.join(context['merged_ids'])}")
+
     # Text preview
     chunk_text = metadata.get('chunk_text', '')
-    if chunk_text:
+    if chunk_text and not (context and context.get('text')):
         lines.append(f"\nText Preview:")
         lines.append(f"{chunk_text[:300]}{'...' if len(chunk_text) > 300 else ''}")
 
@@ -88,12 +110,49 @@ def main():
         default=Config.SIMILARITY_THRESHOLD,
         help=f'Minimum similarity score (default: {Config.SIMILARITY_THRESHOLD})'
     )
+    parser.add_argument(
+        '--expand',
+        type=int,
+        default=0,
+        help='Include N neighbouring chunks on each side of every hit (default: 0)'
+    )
+    parser.add_argument(
+        '--diversify',
+        choices=['collapse', 'mmr'],
+        help='Remove near-duplicate hits from overlapping chunks'
+    )
+    parser.add_argument(
+        '--hierarchical',
+        action='store_true',
+        default=None,
+        help='Pick the best sections first, then search only their chunks'
+    )
+    parser.add_argument(
+        '--rerank',
+        action='store_true',
+        default=None,
+        help='Re-rank candidates with a cross-encoder'
+    )
+    parser.add_argument(
+        '--rerank-candidates',
+        type=int,
+        default=Config.RERANK_CANDIDATES,
+        help=f'Candidates to re-rank (default: {Config.RERANK_CANDIDATES})'
+    )
+    parser.add_argument(
+        '--rerank-budget-ms',
+        type=int,
+        default=Config.RERANK_BUDGET_MS,
+        help=f'Time budget for re-ranking in ms, 0 = no limit (default: {Config.RERANK_BUDGET_MS})'
+    )
     parser.add_argument(
         '--json',
         action='store_true',
         help='Output results as JSON'
     )
 
+    profiling.add_arguments(parser)
+
     args = parser.parse_args()
 
     if not args.json:
@@ -135,7 +194,13 @@ def main():
             query=args.query,
             top_k=args.top_k,
             filter_metadata=filter_metadata,
-            include_metadata=True
+            include_metadata=True,
+            expand=args.expand,
+            diversify=args.diversify,
+            hierarchical=args.hierarchical,
+            rerank=args.rerank,
+            rerank_candidates=args.rerank_candidates,
+            rerank_budget=args.rerank_budget_ms / 1000 if args.rerank_budget_ms > 0 else None
         )
 
         # Filter by threshold
@@ -183,5 +248,5 @@ def main():
 
 
 if __name__ == "__main__":
-    exit_code = main()
+    exit_code = profiling.run(main, 'search_pdfs')
     sys.exit(exit_code)
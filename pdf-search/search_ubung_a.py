@@ -23,32 +23,22 @@ def search_term_in_document(manager, term, document_id, page_start, page_end, to
     Returns:
         List of search results
     """
-    # Search with document filter
+    # Filter by document and page range before expanding, so context
+    # windows only merge hits that are inside the range
     results = manager.search(
         query=f"{term} Definition Begriffsbestimmung",
         top_k=50,  # Get more results initially
-        filter_metadata={'document_id': document_id},
-        include_metadata=True
+        filter_metadata={
+            'document_id': document_id,
+            # Chunk overlaps with our target page range
+            'page_start': {'$lte': page_end},
+            'page_end': {'$gte': page_start}
+        },
+        include_metadata=True,
+        expand=1  # Previous and next chunk, so definitions are not cut off
     )
 
-    # Filter by page range manually
-    filtered_results = []
-    for result in results:
-        metadata = result.get('metadata', {})
-
-        # Check if chunk overlaps with our target page range
-        chunk_page_start = metadata.get('page_start')
-        chunk_page_end = metadata.get('page_end')
-
-        if chunk_page_start is not None and chunk_page_end is not None:
-            # Check if there's any overlap with target range
-            if not (chunk_page_end < page_start or chunk_page_start > page_end):
-                filtered_results.append(result)
-
-        if len(filtered_results) >= top_k:
-            break
-
-    return filtered_results
+    return results[:top_k]
 
 
 def format_excerpt(term, results, document_title):
@@ -85,7 +75,8 @@ def format_excerpt(term, results, document_title):
             output.append(f"- 🌐 **Direkter Link**: {direct_link}")
         output.append(f"\n**Text**:")
         output.append("```")
-        output.append(metadata.get('chunk_text', '').strip())
+        context = result.get('context') or {}
+        output.append((context.get('text') or metadata.get('chunk_text', '')).strip())
         output.append("```")
         output.append("")
 
@@ -0,0 +1,154 @@
+"""
+Request sizing and retry policy for Pinecone upserts.
+Plans batches by serialized bytes and classifies errors as retryable.
+"""
+
+import json
+import random
+import time
+from typing import List, Dict, Any, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Pinecone rejects upsert requests over 2 MB or 1000 vectors
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+MAX_REQUEST_VECTORS = 1000
+
+# JSON bytes per float32 value, e.g. "-0.012345678," (upper bound)
+BYTES_PER_VALUE = 22
+
+# Envelope per vector: braces, keys and separators around id/values/metadata
+VECTOR_OVERHEAD_BYTES = 48
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+TRANSIENT_MESSAGES = ('timed out', 'timeout', 'temporarily unavailable', 'connection reset',
+                      'connection aborted', 'too many requests', 'service unavailable')
+SIZE_MESSAGES = ('too large', 'request size', 'payload size', 'message length', 'exceeds the maximum')
+
+
+def estimate_vector_bytes(vector: Dict[str, Any]) -> int:
+    """
+    Upper-bound estimate of one vector's size in a JSON upsert request.
+
+    Args:
+        vector: Vector dict with 'id', 'values' and optional 'metadata'
+
+    Returns:
+        Estimated bytes
+    """
+    size = VECTOR_OVERHEAD_BYTES + len(vector['id'].encode('utf-8'))
+    size += len(vector['values']) * BYTES_PER_VALUE
+    metadata = vector.get('metadata')
+    if metadata:
+        size += len(json.dumps(metadata, ensure_ascii=False, default=str).encode('utf-8'))
+    return size
+
+
+def batch_end(
+    sizes: List[int],
+    start: int,
+    max_bytes: int,
+    max_vectors: int
+) -> int:
+    """
+    End of the next batch of consecutive vectors under a byte and count budget.
+
+    A vector larger than max_bytes on its own still gets a batch, so the
+    server decides; a size error is then reported for that vector alone.
+
+    Args:
+        sizes: Estimated bytes per vector, in upsert order
+        start: Index of the first vector of the batch
+        max_bytes: Byte budget per request
+        max_vectors: Vector count limit per request
+
+    Returns:
+        End index (exclusive) of the batch
+    """
+    end = start
+    batch_bytes = 0
+    limit = min(len(sizes), start + max_vectors)
+    while end < limit and (end == start or batch_bytes + sizes[end] <= max_bytes):
+        batch_bytes += sizes[end]
+        end += 1
+    return end
+
+
+class PartialUpsertError(Exception):
+    """The index confirmed fewer vectors than the request contained."""
+
+
+def _status(error: Exception) -> Optional[int]:
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_size_error(error: Exception) -> bool:
+    """True if the request was rejected for its size (HTTP 413 or an equivalent message)."""
+    if _status(error) == 413:
+        return True
+    message = str(error).lower()
+    return any(text in message for text in SIZE_MESSAGES)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for errors worth retrying: throttling, 5xx, timeouts and dropped connections."""
+    if isinstance(error, (ConnectionError, TimeoutError, PartialUpsertError)):
+        return True
+    status = _status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    # Transport errors from urllib3/the gRPC client carry no status code
+    name = type(error).__name__
+    if name in ('PineconeProtocolError', 'ProtocolError', 'MaxRetryError', 'NewConnectionError'):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff.
+
+    Args:
+        attempt: Retry number, starting at 0
+        base: Delay ceiling of the first retry in seconds
+        cap: Maximum delay ceiling in seconds
+
+    Returns:
+        Seconds to wait, uniform in [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retries(
+    call: Callable[[], T],
+    max_retries: int,
+    base: float,
+    cap: float
+) -> T:
+    """
+    Call a request function, retrying transient errors with backoff.
+
+    Args:
+        call: Function performing one request
+        max_retries: Retries after the first attempt
+        base: Backoff ceiling of the first retry in seconds
+        cap: Maximum backoff ceiling in seconds
+
+    Returns:
+        The call's result
+
+    Raises:
+        The last error when it is not transient or retries are exhausted
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if not is_transient_error(e) or attempt == max_retries:
+                raise
+        time.sleep(backoff_delay(attempt, base, cap))